@@ -21,6 +21,8 @@ interface UseAbelChatReturn {
   isConnected: boolean
   isThinking: boolean
   sendMessage: (content: string) => void
+  sendTyping: (draft: string) => void
+  cancelGeneration: () => void
   clearHistory: () => void
   reconnect: () => void
 }
@@ -42,6 +44,7 @@ export function useAbelChat(options: UseAbelChatOptions = {}): UseAbelChatReturn
   const wsRef = useRef<WebSocket | null>(null)
   const reconnectTimeoutRef = useRef<NodeJS.Timeout | null>(null)
   const streamingMessageRef = useRef<string>('')
+  const typingTimeoutRef = useRef<NodeJS.Timeout | null>(null)
 
   const connect = useCallback(() => {
     if (wsRef.current?.readyState === WebSocket.OPEN) return
@@ -121,7 +124,9 @@ export function useAbelChat(options: UseAbelChatOptions = {}): UseAbelChatReturn
 
             case 'assistant':
               if (data.complete) {
-                // Finalize streaming message
+                // Finalize streaming message (the server may omit the
+                // full text since stream frames were already accumulated)
+                const finalContent = data.content ?? streamingMessageRef.current
                 setMessages((prev) => {
                   const lastMessage = prev[prev.length - 1]
                   if (lastMessage?.isStreaming) {
@@ -129,7 +134,7 @@ export function useAbelChat(options: UseAbelChatOptions = {}): UseAbelChatReturn
                       ...prev.slice(0, -1),
                       {
                         ...lastMessage,
-                        content: data.content,
+                        content: finalContent,
                         isStreaming: false
                       }
                     ]
@@ -181,9 +186,10 @@ export function useAbelChat(options: UseAbelChatOptions = {}): UseAbelChatReturn
       return
     }
 
-    // Add user message immediately
+    // Add user message immediately; an answer still streaming is
+    // cancelled by the server and kept as is
     setMessages((prev) => [
-      ...prev,
+      ...prev.map((m) => (m.isStreaming ? { ...m, isStreaming: false } : m)),
       {
         id: generateId(),
         role: 'user',
@@ -195,6 +201,11 @@ export function useAbelChat(options: UseAbelChatOptions = {}): UseAbelChatReturn
     // Reset streaming ref
     streamingMessageRef.current = ''
 
+    // A pending typing frame is superseded by the message itself
+    if (typingTimeoutRef.current) {
+      clearTimeout(typingTimeoutRef.current)
+    }
+
     // Send to server
     wsRef.current.send(
       JSON.stringify({
@@ -205,6 +216,31 @@ export function useAbelChat(options: UseAbelChatOptions = {}): UseAbelChatReturn
     )
   }, [userId])
 
+  // Let the server start memory retrieval while the user is still typing
+  const sendTyping = useCallback((draft: string) => {
+    if (typingTimeoutRef.current) {
+      clearTimeout(typingTimeoutRef.current)
+    }
+    typingTimeoutRef.current = setTimeout(() => {
+      if (draft.trim() && wsRef.current?.readyState === WebSocket.OPEN) {
+        wsRef.current.send(
+          JSON.stringify({
+            type: 'typing',
+            content: draft,
+            user_id: userId
+          })
+        )
+      }
+    }, 300)
+  }, [userId])
+
+  // Stop the answer in progress (the server keeps the partial text)
+  const cancelGeneration = useCallback(() => {
+    if (wsRef.current?.readyState === WebSocket.OPEN) {
+      wsRef.current.send(JSON.stringify({ type: 'cancel' }))
+    }
+  }, [])
+
   const clearHistory = useCallback(() => {
     if (wsRef.current?.readyState === WebSocket.OPEN) {
       wsRef.current.send(JSON.stringify({ type: 'clear' }))
@@ -239,6 +275,8 @@ export function useAbelChat(options: UseAbelChatOptions = {}): UseAbelChatReturn
     isConnected,
     isThinking,
     sendMessage,
+    sendTyping,
+    cancelGeneration,
     clearHistory,
     reconnect
   }
@@ -3,6 +3,7 @@ import { motion, AnimatePresence } from 'framer-motion'
 import { Link } from 'react-router-dom'
 import {
   Send,
+  Square,
   ArrowLeft,
   Mic,
   MicOff,
@@ -24,6 +25,8 @@ export default function Chat() {
     isConnected,
     isThinking,
     sendMessage,
+    sendTyping,
+    cancelGeneration,
     clearHistory,
     reconnect
   } = useAbelChat({
@@ -46,6 +49,8 @@ export default function Chat() {
     scrollToBottom()
   }, [messages])
 
+  const isGenerating = isThinking || messages[messages.length - 1]?.isStreaming === true
+
   const handleSend = async () => {
     if (!input.trim() || isThinking || !isConnected) return
     sendMessage(input.trim())
@@ -242,20 +247,34 @@ export default function Chat() {
               ref={inputRef}
               type="text"
               value={input}
-              onChange={(e) => setInput(e.target.value)}
+              onChange={(e) => {
+                setInput(e.target.value)
+                sendTyping(e.target.value)
+              }}
               onKeyDown={handleKeyDown}
               placeholder={isConnected ? "Écrivez votre message..." : "Connexion en cours..."}
               className="flex-1 bg-transparent border-none outline-none text-white placeholder-white/30 px-2"
               disabled={isThinking || !isConnected}
             />
 
-            <Button
-              onClick={handleSend}
-              disabled={!input.trim() || isThinking || !isConnected}
-              size="sm"
-            >
-              <Send className="w-5 h-5" />
-            </Button>
+            {isGenerating && !input.trim() ? (
+              <Button
+                variant="ghost"
+                onClick={cancelGeneration}
+                disabled={!isConnected}
+                size="sm"
+              >
+                <Square className="w-5 h-5" />
+              </Button>
+            ) : (
+              <Button
+                onClick={handleSend}
+                disabled={!input.trim() || isThinking || !isConnected}
+                size="sm"
+              >
+                <Send className="w-5 h-5" />
+              </Button>
+            )}
           </GlassPanel>
 
           <div className="flex items-center justify-center gap-2 mt-2">
@@ -1 +1,5 @@
 # A.B.E.L Backend - Adam Beloucif Est Là
+import time
+
+# Reference point for the cold start time reported at boot
+BOOT_STARTED = time.perf_counter()
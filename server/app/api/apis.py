@@ -0,0 +1,37 @@
+"""
+A.B.E.L API Routes - Public API directory search
+"""
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.services.api_directory import api_directory
+
+router = APIRouter(prefix="/api/apis", tags=["apis"])
+
+
+@router.get("")
+async def search_apis(
+    q: str = "",
+    category: Optional[str] = None,
+    auth_type: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+    mode: str = Query("keyword", pattern="^(keyword|semantic|hybrid)$")
+):
+    """Search the API directory (no `q`: most popular first)."""
+    results = await api_directory.search(q, category, auth_type, limit, mode)
+    return {"query": q, "count": len(results), "results": results}
+
+
+@router.get("/categories")
+async def list_categories():
+    """Categories with their number of APIs."""
+    return {"categories": api_directory.categories()}
+
+
+@router.get("/{api_id}")
+async def get_api(api_id: str):
+    api = api_directory.get(api_id)
+    if api is None:
+        raise HTTPException(status_code=404, detail="API introuvable")
+    return api
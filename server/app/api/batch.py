@@ -0,0 +1,100 @@
+"""
+A.B.E.L API Routes - Batch chat jobs (NDJSON)
+"""
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.services.batch import BatchError, batch_service
+
+router = APIRouter(prefix="/api/batch", tags=["batch"])
+
+NDJSON = "application/x-ndjson"
+
+
+async def _lines(job_id: str) -> AsyncIterator[str]:
+    async for line in batch_service.follow(job_id):
+        yield json.dumps(line, ensure_ascii=False) + "\n"
+
+
+async def _stream(job_id: str) -> StreamingResponse:
+    if await batch_service.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    return StreamingResponse(_lines(job_id), media_type=NDJSON)
+
+
+@router.post("")
+async def create_batch(
+    request: Request,
+    user_id: Optional[str] = None,
+    use_memory: bool = True,
+    stream: bool = True
+):
+    """Start a batch job.
+
+    Body: `{"conversations": [{"id", "user_id", "messages": [...]}, ...]}`
+    or one conversation per line as NDJSON. Results are streamed as NDJSON
+    as they complete (`stream=false`: only the job is returned).
+    """
+    if not settings.OPENAI_API_KEY:
+        raise HTTPException(status_code=503, detail="OPENAI_API_KEY non configurée")
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith(NDJSON):
+            conversations = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            payload = json.loads(body or b"{}")
+            if isinstance(payload, dict):
+                conversations = payload.get("conversations")
+                user_id = payload.get("user_id", user_id)
+                use_memory = payload.get("use_memory", use_memory)
+            else:
+                conversations = payload
+        if not isinstance(conversations, list):
+            raise BatchError("Le champ 'conversations' doit être une liste")
+        job = await batch_service.submit(conversations, user_id=user_id, use_memory=bool(use_memory))
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="JSON invalide")
+    except BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not stream:
+        return job.as_dict()
+    return await _stream(job.id)
+
+
+@router.get("/{job_id}")
+async def get_batch(job_id: str):
+    job = await batch_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    return job.as_dict()
+
+
+@router.get("/{job_id}/results")
+async def batch_results(job_id: str):
+    """Results so far, then live ones while the job runs (NDJSON)."""
+    return await _stream(job_id)
+
+
+@router.post("/{job_id}/resume")
+async def resume_batch(job_id: str):
+    """Run the conversations left unanswered or failed, streaming the results."""
+    if not settings.OPENAI_API_KEY:
+        raise HTTPException(status_code=503, detail="OPENAI_API_KEY non configurée")
+    if await batch_service.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    if not batch_service.resume(job_id):
+        raise HTTPException(status_code=409, detail="Job déjà en cours")
+    return await _stream(job_id)
+
+
+@router.delete("/{job_id}")
+async def delete_batch(job_id: str):
+    """Stop the job and delete its files."""
+    if not await batch_service.delete(job_id):
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    return {"deleted": job_id}
@@ -18,9 +18,146 @@ class Settings(BaseSettings):
     # OpenAI
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4-turbo-preview"
+    OPENAI_FALLBACK_MODELS: str = ""  # Comma-separated, tried in order when OPENAI_MODEL fails
+    OPENAI_BASE_URL: str = ""  # Any OpenAI-compatible endpoint (e.g. a local stub server)
     OPENAI_TTS_MODEL: str = "tts-1"
     OPENAI_TTS_VOICE: str = "onyx"
 
+    # Embeddings
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_BATCH_WINDOW_MS: float = 10.0
+    EMBEDDING_MAX_CONCURRENCY: int = 4
+    EMBEDDING_CACHE_SIZE: int = 10000
+    EMBEDDING_CACHE_TTL: float = 60 * 60 * 24 * 7  # 1 week, 0 = never expire
+    EMBEDDING_CACHE_DIR: str = ""  # Empty = memory only
+    # Disk tier rows (~6 KB each at 1536-d) that trigger compaction, 0 = unbounded
+    EMBEDDING_CACHE_DISK_MAX: int = 50000
+
+    # Database access (blocking Supabase client runs in a bounded thread pool)
+    DB_MAX_CONCURRENCY: int = 8
+    DB_TIMEOUT: float = 10.0
+    DB_BATCH_SIZE: int = 500
+
+    # Vector store: supabase, local, or auto (Supabase, optionally mirrored locally)
+    VECTOR_STORE_BACKEND: str = "auto"
+    VECTOR_STORE_DIR: str = ""  # Snapshot directory for the local store
+    # auto: most recently active users whose new memories are also kept in
+    # process as a Supabase fallback (~6 KB per 1536-d memory, per worker), 0 = no mirror
+    VECTOR_STORE_MIRROR_USERS: int = 0
+    ANN_MIN_ROWS: int = 10000  # Build an IVF index past this many memories per user, 0 = never
+    ANN_NLIST: int = 0  # Inverted lists, 0 = auto (~4 * sqrt(n))
+    ANN_NPROBE: int = 16  # Lists scanned per query (recall vs latency)
+
+    # Memory write-behind queue
+    MEMORY_WRITE_BATCH_SIZE: int = 32
+    MEMORY_WRITE_FLUSH_INTERVAL: float = 0.5  # seconds to wait for a batch to fill
+    MEMORY_WRITE_MAX_RETRIES: int = 3
+    MEMORY_WRITE_MAX_QUEUE: int = 10000
+
+    # Memory consolidation (dedup, merge, decay, prune)
+    MEMORY_CONSOLIDATION_INTERVAL: float = 60 * 60  # Seconds between runs, 0 = off
+    MEMORY_CONSOLIDATION_USERS: int = 20  # Users processed per run
+    MEMORY_CONSOLIDATION_BATCH: int = 1000  # Memories per user per run
+    MEMORY_CONSOLIDATION_SUMMARIES: int = 20  # LLM merges per run
+    MEMORY_DUPLICATE_THRESHOLD: float = 0.97  # Cosine similarity of near-identical memories
+    MEMORY_MERGE_THRESHOLD: float = 0.88  # Similar enough to merge into a summary
+    MEMORY_MERGE_MIN_CLUSTER: int = 3
+    MEMORY_HALF_LIFE_DAYS: float = 30.0  # Importance halves every N days without use, 0 = no decay
+    MEMORY_PRUNE_THRESHOLD: float = 0.0  # Delete memories whose decayed importance falls under this, 0 = never
+
+    # Conversation sessions: memory (per process), sqlite (one host) or redis (any node)
+    SESSION_BACKEND: str = "memory"
+    SESSION_DB_PATH: str = "data/sessions.db"
+    SESSION_MAX_SESSIONS: int = 10000
+    SESSION_IDLE_TTL: float = 60 * 60 * 6  # 6 hours, 0 = never expire
+    SESSION_MAX_MESSAGES: int = 100  # Hard cap; the token budget usually trims first
+    SESSION_MAX_BYTES: int = 64 * 1024
+
+    # Prompt context (tokens)
+    CONTEXT_TOKEN_BUDGET: int = 8000
+    CONTEXT_RESPONSE_RESERVE: int = 1024
+    CONTEXT_MAX_MEMORY_TOKENS: int = 1000
+    CONTEXT_SUMMARY_TOKENS: int = 300
+    RETRIEVAL_DEADLINE_MS: float = 400.0  # Answer without memory context past this
+
+    # Hybrid memory retrieval (BM25 + vector, fusion, rerank, MMR)
+    RETRIEVAL_HYBRID: bool = True  # False = vector search only
+    RETRIEVAL_CANDIDATES: int = 20  # Per search, before fusion
+    RETRIEVAL_VECTOR_THRESHOLD: float = 0.3  # Low: reranking filters the rest
+    RETRIEVAL_VECTOR_BUDGET_MS: float = 300.0  # Embedding + vector query
+    RETRIEVAL_LEXICAL_BUDGET_MS: float = 20.0
+    RETRIEVAL_RERANK_BUDGET_MS: float = 20.0  # Rerank + MMR, past it the fused order is kept
+    RETRIEVAL_RERANK: bool = True
+    RETRIEVAL_MIN_SCORE: float = 0.35  # Reranked score floor (0-1.1)
+    RETRIEVAL_MMR_LAMBDA: float = 0.7  # 1 = relevance only, lower = more diverse
+    RETRIEVAL_LEXICAL_TTL: float = 600.0  # Rebuild a user's BM25 index after this many seconds
+    RETRIEVAL_LEXICAL_MAX_DOCS: int = 20000  # Per user
+    RETRIEVAL_LEXICAL_USERS: int = 1000  # Indexes kept in memory (LRU)
+
+    # Semantic response cache (first turn of a session only)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_THRESHOLD: float = 0.95  # Cosine similarity for a hit
+    RESPONSE_CACHE_SCOPE: str = "user"  # user or global
+    RESPONSE_CACHE_TTL: float = 60 * 60  # 1 hour
+    RESPONSE_CACHE_MAX_ENTRIES: int = 5000
+
+    # WebSocket streaming
+    STREAM_WINDOW_MS: float = 40.0  # Chunks within this window share a frame
+    STREAM_MAX_FRAME_BYTES: int = 2048
+    STREAM_SEND_TIMEOUT: float = 10.0  # Abort the stream if a client stalls this long
+    STREAM_FINAL_FULL_TEXT: bool = False  # Repeat the full answer in the final frame
+
+    # Provider HTTP pool and call policy
+    HTTP_HTTP2: bool = True
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    LLM_TIMEOUT: float = 30.0  # Whole call, or first token when streaming
+    LLM_STREAM_IDLE_TIMEOUT: float = 15.0  # Max gap between streamed chunks
+    # Duplicate calls slower than this when the scheduler has a free slot, 0 = never
+    LLM_HEDGE_AFTER_MS: float = 0.0
+    LLM_BREAKER_THRESHOLD: int = 5  # Consecutive failures before skipping a model
+    LLM_BREAKER_RESET: float = 30.0
+
+    # LLM admission control (rate limits: 0 = unlimited)
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_MAX_CONCURRENCY_PER_USER: int = 2
+    LLM_REQUESTS_PER_MINUTE: float = 500
+    LLM_TOKENS_PER_MINUTE: float = 200000
+    LLM_MAX_QUEUE: int = 200
+    LLM_QUEUE_TIMEOUT: float = 30.0  # Give up on a queued request after this many seconds
+
+    # Startup
+    STARTUP_WARMUP: bool = False  # Build LLM clients at boot (slower start, faster first reply)
+    STARTUP_BUDGET_MS: float = 1500.0  # Cold start target, a warning is logged past it
+
+    # Health probes
+    HEALTH_PROBE_INTERVAL: float = 10.0
+    HEALTH_PROBE_TIMEOUT: float = 3.0
+    HEALTH_CRITICAL: str = ""  # Comma-separated dependencies that fail readiness (supabase, openai)
+
+    # API directory (auto, supabase, catalog or a JSON file path)
+    API_DIRECTORY_SOURCE: str = "auto"
+    API_DIRECTORY_REFRESH: float = 60.0  # Seconds between change checks, 0 = load once
+    API_DIRECTORY_EMBEDDINGS: bool = False  # Embed entries for semantic search
+
+    # Batch chat jobs (/api/batch)
+    BATCH_DIR: str = "data/batch"  # Job inputs and NDJSON results
+    BATCH_CONCURRENCY: int = 16  # Workers per job, the LLM scheduler still applies its limits
+    BATCH_MAX_ITEMS: int = 10000  # Conversations per job
+    BATCH_RETRIES: int = 3  # On a full LLM queue or unavailable provider
+    BATCH_RETENTION_DAYS: float = 7  # Jobs older than this are deleted at startup, 0 = keep
+
+    # Metrics (Prometheus at /metrics)
+    METRICS_ENABLED: bool = True
+    METRICS_SPAN_FILE: str = ""  # Append each pipeline stage as a JSON line to this file
+
+    # Multi-worker routing: memory (single process) or redis
+    BROKER_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+
     # Security
     JWT_SECRET_KEY: str = "your-super-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
@@ -38,6 +175,15 @@ class Settings(BaseSettings):
     def cors_origins_list(self) -> list[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
 
+    @property
+    def health_critical_list(self) -> list[str]:
+        return [name.strip() for name in self.HEALTH_CRITICAL.split(",") if name.strip()]
+
+    @property
+    def llm_models_list(self) -> list[str]:
+        fallbacks = [model.strip() for model in self.OPENAI_FALLBACK_MODELS.split(",")]
+        return list(dict.fromkeys([self.OPENAI_MODEL] + [model for model in fallbacks if model]))
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
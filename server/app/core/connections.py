@@ -0,0 +1,104 @@
+"""
+A.B.E.L Connections - WebSocket registry routed across workers
+"""
+import logging
+import os
+import socket
+import uuid
+from typing import Optional
+
+from fastapi import WebSocket
+
+from .metrics import metrics
+from .pubsub import Broker, create_broker
+from .streaming import StreamWriter
+
+logger = logging.getLogger("abel.connections")
+
+PRESENCE_KEY = "clients"
+BROADCAST_CHANNEL = "broadcast"
+
+
+class ConnectionManager:
+    """Tracks the WebSockets held by this worker.
+
+    Each worker has a `node_id` and records which node owns every client
+    in the broker's presence hash. `send_message` writes directly to a
+    local socket, otherwise it publishes to the owning node's channel, so
+    any worker can reach any client when running behind several uvicorn
+    workers or hosts.
+    """
+
+    def __init__(self, broker: Optional[Broker] = None):
+        self.broker = broker or create_broker()
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.active_connections: dict[str, WebSocket] = {}
+
+    async def start(self):
+        await self.broker.subscribe(f"node:{self.node_id}", self._deliver)
+        await self.broker.subscribe(BROADCAST_CHANNEL, self._deliver_all)
+        await self.broker.start()
+        logger.info(f"Connection manager {self.node_id} on {self.broker.name} broker")
+
+    async def connect(self, websocket: WebSocket, client_id: str):
+        await websocket.accept()
+        self.active_connections[client_id] = websocket
+        await self.broker.hset(PRESENCE_KEY, client_id, self.node_id)
+        logger.info(f"Client {client_id} connected. Total: {len(self.active_connections)}")
+
+    async def disconnect(self, client_id: str):
+        if client_id in self.active_connections:
+            del self.active_connections[client_id]
+            logger.info(f"Client {client_id} disconnected. Total: {len(self.active_connections)}")
+            try:
+                # Only clear presence we own (client may have reconnected elsewhere)
+                if await self.broker.hget(PRESENCE_KEY, client_id) == self.node_id:
+                    await self.broker.hdel(PRESENCE_KEY, client_id)
+            except Exception as e:
+                logger.warning(f"Could not clear presence of {client_id}: {e}")
+
+    async def send_message(self, client_id: str, message: dict):
+        websocket = self.active_connections.get(client_id)
+        if websocket is not None:
+            await websocket.send_json(message)
+            return
+        node = await self.broker.hget(PRESENCE_KEY, client_id)
+        if node and node != self.node_id:
+            await self.broker.publish(f"node:{node}", {"client_id": client_id, "message": message})
+
+    async def broadcast(self, message: dict):
+        """Send a message to every client on every worker."""
+        await self.broker.publish(BROADCAST_CHANNEL, {"message": message})
+
+    async def _deliver(self, payload: dict):
+        websocket = self.active_connections.get(payload.get("client_id"))
+        if websocket is not None:
+            await websocket.send_json(payload["message"])
+
+    async def _deliver_all(self, payload: dict):
+        for client_id, websocket in list(self.active_connections.items()):
+            try:
+                await websocket.send_json(payload["message"])
+            except Exception as e:
+                logger.warning(f"Broadcast to {client_id} failed: {e}")
+
+    def stream(self, client_id: str) -> StreamWriter:
+        """Coalescing writer for streaming an answer to a client."""
+        return StreamWriter(self.active_connections[client_id])
+
+    async def stop(self):
+        if self.active_connections:
+            try:
+                await self.broker.hdel(PRESENCE_KEY, *self.active_connections)
+            except Exception as e:
+                logger.warning(f"Could not clear presence: {e}")
+        await self.broker.close()
+
+
+# Singleton instance
+manager = ConnectionManager()
+
+metrics.gauge(
+    "abel_ws_connections", "WebSocket clients connected to this worker",
+    lambda: len(manager.active_connections)
+)
@@ -1,28 +1,41 @@
-from supabase import create_client, Client
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Optional
 from functools import lru_cache
 from .config import settings
 
+if TYPE_CHECKING:
+    from supabase import Client
 
-@lru_cache()
-def get_supabase_client() -> Client:
-    """Get Supabase client singleton."""
+
+def _create_client(key: str) -> "Client":
+    # supabase is imported on first use: it is slow to import
+    from supabase import create_client, ClientOptions
     return create_client(
         settings.SUPABASE_URL,
-        settings.SUPABASE_ANON_KEY
+        key,
+        options=ClientOptions(postgrest_client_timeout=settings.DB_TIMEOUT)
     )
 
 
 @lru_cache()
-def get_supabase_admin() -> Client:
+def get_supabase_client() -> "Client":
+    """Get Supabase client singleton."""
+    return _create_client(settings.SUPABASE_ANON_KEY)
+
+
+@lru_cache()
+def get_supabase_admin() -> "Client":
     """Get Supabase admin client with service role key."""
-    return create_client(
-        settings.SUPABASE_URL,
-        settings.SUPABASE_SERVICE_ROLE_KEY
-    )
+    return _create_client(settings.SUPABASE_SERVICE_ROLE_KEY)
 
 
-# Convenience exports
-supabase = get_supabase_client()
+def __getattr__(name: str):
+    # Convenience export, created on first access: `database.supabase`
+    if name == "supabase":
+        return get_supabase_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class DatabaseError(Exception):
@@ -30,10 +43,59 @@ class DatabaseError(Exception):
     pass
 
 
+# Dedicated pool for the blocking Supabase client: bounds concurrent
+# queries per worker and keeps them off the event loop. The clients above
+# are shared by all threads, so HTTP connections are reused.
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.DB_MAX_CONCURRENCY,
+            thread_name_prefix="abel-db"
+        )
+    return _executor
+
+
+async def run_db(fn: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+    """Run a blocking database call in the DB pool, with a deadline.
+
+    Usage: `await run_db(query.execute)`. The deadline includes time spent
+    waiting for a free pool thread; a query still queued at the deadline
+    is dropped, one already running finishes in the background.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_get_executor(), functools.partial(fn, *args))
+    try:
+        return await asyncio.wait_for(future, timeout or settings.DB_TIMEOUT)
+    except asyncio.TimeoutError as e:
+        raise DatabaseError(f"Database call timed out after {timeout or settings.DB_TIMEOUT:.1f}s") from e
+
+
+def chunked(rows: list, size: Optional[int] = None) -> list[list]:
+    """Split rows into DB_BATCH_SIZE batches for multi-row statements."""
+    size = size or settings.DB_BATCH_SIZE
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+def close_db():
+    """Stop the DB pool (pending queries are abandoned)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _ping_database():
+    get_supabase_client().table("api_directory").select("id").limit(1).execute()
+
+
 async def check_database_connection() -> bool:
-    """Check if database connection is healthy."""
+    """Check if database connection is healthy (off the event loop)."""
     try:
-        result = supabase.table("api_directory").select("id").limit(1).execute()
+        await run_db(_ping_database)
         return True
     except Exception:
         return False
@@ -0,0 +1,187 @@
+"""
+A.B.E.L Health Monitor - Background dependency probes with cached readiness
+"""
+import asyncio
+import bisect
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from .config import settings
+
+logger = logging.getLogger("abel.health")
+
+Check = Callable[[], Awaitable[bool]]
+
+# Upper bounds of the latency buckets, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; quantiles are bucket upper bounds."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return float(self.buckets[i]) if i < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count, 1) if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max, 1)
+        }
+
+
+class Dependency:
+    """Last known state of one probed dependency."""
+
+    def __init__(self, name: str, check: Check, critical: bool):
+        self.name = name
+        self.check = check
+        self.critical = critical
+        self.status = "unknown"
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.failures = 0
+        self.latency = LatencyHistogram()
+
+    def snapshot(self) -> dict:
+        return {
+            "status": self.status,
+            "critical": self.critical,
+            "error": self.error,
+            "checked_at": self.checked_at,
+            "consecutive_failures": self.failures,
+            "latency": self.latency.snapshot()
+        }
+
+
+class HealthMonitor:
+    """Probes dependencies in the background and caches the result.
+
+    Probe endpoints only read the cached snapshot, so they cost no I/O.
+    Readiness fails when a critical dependency is down (or nothing has
+    been probed yet); a non-critical one being down only reports the
+    service as degraded.
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        timeout: Optional[float] = None,
+        critical: Optional[list[str]] = None
+    ):
+        self.interval = interval or settings.HEALTH_PROBE_INTERVAL
+        self.timeout = timeout or settings.HEALTH_PROBE_TIMEOUT
+        self.critical = set(critical if critical is not None else settings.health_critical_list)
+        self.dependencies: dict[str, Dependency] = {}
+        self.started_at = time.time()
+        self._probed = False
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, check: Check, critical: Optional[bool] = None):
+        """Add a dependency; `check()` returns True when it is usable."""
+        if critical is None:
+            critical = name in self.critical
+        self.dependencies[name] = Dependency(name, check, critical)
+
+    async def _probe(self, dependency: Dependency):
+        started = time.perf_counter()
+        try:
+            ok = await asyncio.wait_for(dependency.check(), self.timeout)
+            error = None if ok else "check failed"
+        except asyncio.TimeoutError:
+            ok, error = False, f"timeout after {self.timeout:.1f}s"
+        except Exception as e:
+            ok, error = False, str(e) or type(e).__name__
+        dependency.latency.observe((time.perf_counter() - started) * 1000)
+
+        status = "up" if ok else "down"
+        if status != dependency.status and dependency.status != "unknown":
+            log = logger.info if ok else logger.warning
+            log(f"Dependency {dependency.name} is {status}" + (f": {error}" if error else ""))
+        dependency.status = status
+        dependency.error = error
+        dependency.checked_at = time.time()
+        dependency.failures = 0 if ok else dependency.failures + 1
+
+    async def probe_all(self):
+        """Probe every dependency once, concurrently."""
+        await asyncio.gather(*(self._probe(d) for d in self.dependencies.values()))
+        self._probed = True
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.error(f"Health probe round failed: {e}")
+
+    async def start(self):
+        """Probe once (so readiness is known at boot), then keep probing."""
+        await self.probe_all()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def ready(self) -> bool:
+        return self._probed and all(
+            d.status == "up" for d in self.dependencies.values() if d.critical
+        )
+
+    @property
+    def status(self) -> str:
+        """ready, degraded (non-critical dependency down) or unavailable."""
+        if not self.ready:
+            return "unavailable"
+        if any(d.status != "up" for d in self.dependencies.values()):
+            return "degraded"
+        return "ready"
+
+    def is_up(self, name: str) -> bool:
+        dependency = self.dependencies.get(name)
+        return dependency is not None and dependency.status == "up"
+
+    def snapshot(self) -> dict:
+        return {
+            "status": self.status,
+            "uptime": round(time.time() - self.started_at, 1),
+            "dependencies": {name: d.snapshot() for name, d in self.dependencies.items()}
+        }
+
+
+# Singleton instance
+health_monitor = HealthMonitor()
@@ -0,0 +1,228 @@
+"""
+A.B.E.L Metrics - Counters, histograms and stage spans with Prometheus export
+"""
+import bisect
+import contextvars
+import json
+import logging
+import time
+import uuid
+from typing import Callable, Optional
+
+from .config import settings
+
+logger = logging.getLogger("abel.metrics")
+
+# Seconds; covers sub-millisecond cache hits up to slow LLM turns
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("abel_trace", default=None)
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values."""
+
+    kind = "counter"
+
+    def __init__(self, registry: "Metrics", name: str, help: str, labels: tuple = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        if not self.registry.enabled:
+            return
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{_labels(self.labels, key)} {value}" for key, value in self.values.items()]
+
+
+class Gauge:
+    """Value read from a callback at scrape time (no hot-path cost)."""
+
+    kind = "gauge"
+
+    def __init__(self, registry: "Metrics", name: str, help: str, read: Callable[[], float]):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.read = read
+
+    def render(self) -> list[str]:
+        try:
+            return [f"{self.name} {float(self.read())}"]
+        except Exception as e:
+            logger.debug(f"Gauge {self.name} unavailable: {e}")
+            return []
+
+
+class Histogram:
+    """Fixed-bucket histogram, optionally split by label values."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        registry: "Metrics",
+        name: str,
+        help: str,
+        labels: tuple = (),
+        buckets: tuple = DEFAULT_BUCKETS
+    ):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [bucket counts..., +Inf count, sum]
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values):
+        if not self.registry.enabled:
+            return
+        series = self.values.get(label_values)
+        if series is None:
+            series = self.values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labels + ('le',), key + (bound,))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """Times a pipeline stage into abel_stage_seconds (and the span file)."""
+
+    __slots__ = ("registry", "name", "attrs", "started")
+
+    def __init__(self, registry: "Metrics", name: str, attrs: dict):
+        self.registry = registry
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.registry.stage(self.name, time.perf_counter() - self.started, **self.attrs)
+        return False
+
+
+class Metrics:
+    """Process-wide metric registry.
+
+    With METRICS_ENABLED off every record call returns immediately and
+    `span()` hands back a shared no-op context manager. When
+    METRICS_SPAN_FILE is set, each stage is also appended to that file as
+    a JSON line carrying the current trace id (one per chat turn).
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, span_file: Optional[str] = None):
+        self.enabled = settings.METRICS_ENABLED if enabled is None else enabled
+        self.span_file = span_file if span_file is not None else settings.METRICS_SPAN_FILE
+        self._metrics: dict[str, object] = {}
+        self._file = None
+        self.stages = self.histogram(
+            "abel_stage_seconds", "Duration of chat pipeline stages", ("stage",)
+        )
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self._metrics.get(name) or self._register(Counter(self, name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.get(name) or self._register(Histogram(self, name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, read: Callable[[], float]) -> Gauge:
+        return self._register(Gauge(self, name, help, read))
+
+    def span(self, name: str, **attrs):
+        """Context manager timing a stage: `with metrics.span("embedding"):`."""
+        if not self.enabled:
+            return _NOOP
+        return Span(self, name, attrs)
+
+    def stage(self, name: str, seconds: float, **attrs):
+        """Record a stage measured by the caller."""
+        if not self.enabled:
+            return
+        self.stages.observe(seconds, name)
+        if self.span_file:
+            self._export(name, seconds, attrs)
+
+    def _export(self, name: str, seconds: float, attrs: dict):
+        try:
+            if self._file is None:
+                self._file = open(self.span_file, "a", encoding="utf-8")
+            record = {
+                "trace": _trace_id.get(),
+                "span": name,
+                "end": round(time.time(), 6),
+                "ms": round(seconds * 1000, 3),
+                **attrs
+            }
+            self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            logger.error(f"Span export disabled: {e}")
+            self.span_file = ""
+
+    def new_trace(self) -> str:
+        """Start a trace for the current task (and tasks it creates)."""
+        trace_id = uuid.uuid4().hex[:16]
+        _trace_id.set(trace_id)
+        return trace_id
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# Singleton instance
+metrics = Metrics()
@@ -0,0 +1,184 @@
+"""
+A.B.E.L Pub/Sub - Message routing and shared state between workers
+"""
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Optional
+
+from .config import settings
+
+logger = logging.getLogger("abel.pubsub")
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class Broker(ABC):
+    """Pub/sub channels plus small shared hashes (e.g. client presence).
+
+    The memory broker only connects components inside one process; the
+    Redis broker lets any worker or node reach any other.
+    """
+
+    name: str = "base"
+
+    async def start(self):
+        """Connect to the backend."""
+
+    @abstractmethod
+    async def publish(self, channel: str, payload: dict):
+        """Send a JSON-serialisable payload to all subscribers of channel."""
+
+    @abstractmethod
+    async def subscribe(self, channel: str, handler: Handler):
+        """Call handler(payload) for every message published on channel."""
+
+    @abstractmethod
+    async def hset(self, key: str, field: str, value: str):
+        """Set a field of a shared hash."""
+
+    @abstractmethod
+    async def hget(self, key: str, field: str) -> Optional[str]:
+        """Get a field of a shared hash."""
+
+    @abstractmethod
+    async def hdel(self, key: str, *fields: str):
+        """Delete fields of a shared hash."""
+
+    async def close(self):
+        """Disconnect from the backend."""
+
+
+class MemoryBroker(Broker):
+    """In-process broker for single-worker deployments and tests."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._handlers: dict[str, list[Handler]] = {}
+        self._hashes: dict[str, dict[str, str]] = {}
+
+    async def publish(self, channel, payload):
+        for handler in list(self._handlers.get(channel, [])):
+            try:
+                await handler(payload)
+            except Exception as e:
+                logger.error(f"Handler for {channel} failed: {e}")
+
+    async def subscribe(self, channel, handler):
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def hset(self, key, field, value):
+        self._hashes.setdefault(key, {})[field] = value
+
+    async def hget(self, key, field):
+        return self._hashes.get(key, {}).get(field)
+
+    async def hdel(self, key, *fields):
+        values = self._hashes.get(key, {})
+        for field in fields:
+            values.pop(field, None)
+
+
+class RedisBroker(Broker):
+    """Broker on any Redis-protocol server (Redis, Valkey, KeyDB, ...).
+
+    One listener task per process dispatches channel messages to the
+    registered handlers. Channels and keys are namespaced with `prefix`.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "abel:"):
+        self.url = url or settings.REDIS_URL
+        self.prefix = prefix
+        self._redis = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._handlers: dict[str, list[Handler]] = {}
+
+    @property
+    def redis(self):
+        """Lazy Redis client."""
+        if self._redis is None:
+            try:
+                from redis import asyncio as aioredis
+            except ImportError as e:
+                raise RuntimeError("redis package not installed. Run: pip install redis") from e
+            self._redis = aioredis.from_url(self.url, decode_responses=True)
+        return self._redis
+
+    async def start(self):
+        self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        if self._handlers:
+            await self._pubsub.subscribe(*(self.prefix + channel for channel in self._handlers))
+            self._ensure_listener()
+        logger.info(f"Redis broker connected: {self.url}")
+
+    def _ensure_listener(self):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    channel = message["channel"][len(self.prefix):]
+                    payload = json.loads(message["data"])
+                    for handler in list(self._handlers.get(channel, [])):
+                        try:
+                            await handler(payload)
+                        except Exception as e:
+                            logger.error(f"Handler for {channel} failed: {e}")
+                # listen() returns when nothing is subscribed
+                await asyncio.sleep(0.1)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis listener error, reconnecting: {e}")
+                await asyncio.sleep(1.0)
+
+    async def publish(self, channel, payload):
+        await self.redis.publish(self.prefix + channel, json.dumps(payload, ensure_ascii=False))
+
+    async def subscribe(self, channel, handler):
+        first = channel not in self._handlers
+        self._handlers.setdefault(channel, []).append(handler)
+        if first and self._pubsub is not None:
+            await self._pubsub.subscribe(self.prefix + channel)
+            self._ensure_listener()
+
+    async def hset(self, key, field, value):
+        await self.redis.hset(self.prefix + key, field, value)
+
+    async def hget(self, key, field):
+        return await self.redis.hget(self.prefix + key, field)
+
+    async def hdel(self, key, *fields):
+        if fields:
+            await self.redis.hdel(self.prefix + key, *fields)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+def create_broker(backend: Optional[str] = None) -> Broker:
+    """Build the broker selected by BROKER_BACKEND."""
+    backend = (backend or settings.BROKER_BACKEND).lower()
+    if backend == "memory":
+        return MemoryBroker()
+    if backend == "redis":
+        return RedisBroker()
+    raise ValueError(f"Unknown broker backend: {backend}")
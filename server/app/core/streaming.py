@@ -0,0 +1,144 @@
+"""
+A.B.E.L Stream Writer - Coalesced WebSocket stream frames with backpressure
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from fastapi import WebSocket
+
+from .config import settings
+from .metrics import metrics
+
+logger = logging.getLogger("abel.streaming")
+
+SEND_TIME = metrics.histogram("abel_ws_send_seconds", "Time to send one WebSocket stream frame")
+FRAMES = metrics.counter("abel_ws_frames_total", "WebSocket stream frames sent")
+
+
+class StreamWriter:
+    """Turns many small LLM chunks into a few "stream" frames.
+
+    `write` only appends to a list buffer. A sender task flushes the
+    buffer every `window_ms` (or immediately once it holds `max_bytes`),
+    so there is at most one frame in flight: while a slow client is still
+    receiving, new chunks merge into the next frame instead of queueing
+    up. A send that takes longer than `send_timeout` aborts the stream.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        window_ms: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        send_timeout: Optional[float] = None
+    ):
+        self.websocket = websocket
+        self.window = (window_ms if window_ms is not None else settings.STREAM_WINDOW_MS) / 1000
+        self.max_bytes = max_bytes or settings.STREAM_MAX_FRAME_BYTES
+        self.send_timeout = send_timeout or settings.STREAM_SEND_TIMEOUT
+
+        self._buffer: list[str] = []
+        self._buffered = 0
+        self._parts: list[str] = []
+        self._pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._closing = False
+        self._error: Optional[BaseException] = None
+        self._sender: Optional[asyncio.Task] = None
+
+        self.chunks = 0
+        self.frames = 0
+        self.slow_sends = 0
+
+    @property
+    def text(self) -> str:
+        """Everything written so far."""
+        return "".join(self._parts)
+
+    def write(self, chunk: str):
+        """Queue a chunk; raises if the connection already failed."""
+        if self._error is not None:
+            raise self._error
+        if not chunk:
+            return
+        if self._sender is None:
+            self._sender = asyncio.create_task(self._run())
+
+        self._buffer.append(chunk)
+        self._parts.append(chunk)
+        self._buffered += len(chunk)
+        self.chunks += 1
+        self._pending.set()
+        if self._buffered >= self.max_bytes:
+            self._full.set()
+
+    def _take(self) -> str:
+        content = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        self._pending.clear()
+        self._full.clear()
+        return content
+
+    async def _send(self, message: dict):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.wait_for(self.websocket.send_json(message), self.send_timeout)
+        elapsed = loop.time() - started
+        SEND_TIME.observe(elapsed)
+        FRAMES.inc()
+        if elapsed > self.window:
+            # Consumer slower than the coalescing window: frames merge
+            self.slow_sends += 1
+
+    async def _run(self):
+        try:
+            while True:
+                await self._pending.wait()
+                if not self._closing:
+                    # Coalescing window, cut short when the buffer is full
+                    try:
+                        await asyncio.wait_for(self._full.wait(), self.window)
+                    except asyncio.TimeoutError:
+                        pass
+                content = self._take()
+                if content:
+                    await self._send({"type": "stream", "content": content})
+                    self.frames += 1
+                if self._closing and not self._buffer:
+                    return
+        except Exception as e:
+            self._error = e
+            logger.warning(f"Stream aborted after {self.frames} frames: {e!r}")
+
+    async def close(self, final_frame: bool = True, full_text: Optional[bool] = None):
+        """Flush buffered chunks, then send the completion frame.
+
+        The final "assistant" frame repeats the whole answer only when
+        `full_text` (default STREAM_FINAL_FULL_TEXT) is set; clients that
+        accumulate stream frames do not need it.
+        """
+        self._closing = True
+        self._pending.set()
+        self._full.set()
+        if self._sender is not None:
+            await self._sender
+        if self._error is not None:
+            raise self._error
+
+        if final_frame:
+            include = settings.STREAM_FINAL_FULL_TEXT if full_text is None else full_text
+            message = {"type": "assistant", "complete": True}
+            if include:
+                message["content"] = self.text
+            await self._send(message)
+            self.frames += 1
+
+        logger.debug(f"Stream closed: {self.chunks} chunks in {self.frames} frames")
+
+    def abort(self):
+        """Stop sending without flushing (connection gone or cancelled)."""
+        self._closing = True
+        if self._sender is not None and not self._sender.done():
+            self._sender.cancel()
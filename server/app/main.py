@@ -1,13 +1,29 @@
-from contextlib import asynccontextmanager
+import asyncio
+import time
+from contextlib import aclosing, asynccontextmanager
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import logging
 import uuid
+from typing import Optional
 
+from app import BOOT_STARTED
+from app.api.apis import router as apis_router
+from app.api.batch import router as batch_router
 from app.core.config import settings
-from app.core.database import check_database_connection
+from app.core.connections import manager
+from app.core.database import check_database_connection, close_db
+from app.core.health import health_monitor
+from app.core.metrics import metrics
+from app.services.api_directory import api_directory
+from app.services.batch import batch_service
 from app.services.brain import brain_service
+from app.services.consolidation import consolidator
+from app.services.gateway import gateway
+from app.services.memory import memory_service
+from app.services.memory_writer import memory_writer
+from app.services.scheduler import scheduler
 
 # Configure logging
 logging.basicConfig(
@@ -16,28 +32,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger("abel")
 
+IMPORTS_DONE = time.perf_counter()
+startup_stats: dict = {}
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: dict[str, WebSocket] = {}
-
-    async def connect(self, websocket: WebSocket, client_id: str):
-        await websocket.accept()
-        self.active_connections[client_id] = websocket
-        logger.info(f"Client {client_id} connected. Total: {len(self.active_connections)}")
-
-    def disconnect(self, client_id: str):
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
-            logger.info(f"Client {client_id} disconnected. Total: {len(self.active_connections)}")
-
-    async def send_message(self, client_id: str, message: dict):
-        if client_id in self.active_connections:
-            await self.active_connections[client_id].send_json(message)
-
-
-manager = ConnectionManager()
+WS_FRAME_TYPES = {"message", "cancel", "typing", "ping", "clear"}
+WS_MESSAGES = metrics.counter("abel_ws_messages_total", "WebSocket frames received", ("type",))
 
 
 @asynccontextmanager
@@ -49,23 +48,64 @@ async def lifespan(app: FastAPI):
     logger.info(f"  Version: {settings.APP_VERSION}")
     logger.info("=" * 50)
 
+    # Dependency probes: first round now, then in the background
+    health_monitor.register("supabase", check_database_connection)
+    if settings.OPENAI_API_KEY:
+        health_monitor.register("openai", gateway.ping)
+    await health_monitor.start()
+
     # Check database
-    db_ok = await check_database_connection()
-    if db_ok:
+    if health_monitor.is_up("supabase"):
         logger.info("Database connection: OK")
     else:
         logger.warning("Database connection: FAILED (running in mock mode)")
+    logger.info(f"Vector store: {memory_service.store.name}")
+    logger.info(f"Session store: {brain_service.sessions.name}")
+    memory_writer.start()
+    consolidator.start()
+    await manager.start()
+    api_directory.start()
+    batch_service.start()
+
+    # Tokenizer files may need a download: never inside a chat turn
+    await asyncio.to_thread(brain_service.context.counter.warm)
 
     # Check OpenAI
     if settings.OPENAI_API_KEY:
         logger.info("OpenAI API: Configured")
+        if settings.STARTUP_WARMUP:
+            await asyncio.to_thread(gateway.warm)
     else:
         logger.warning("OpenAI API: NOT CONFIGURED (chat will use mock mode)")
 
+    # Cold start: module imports + lifespan startup
+    now = time.perf_counter()
+    startup_stats.update(
+        imports_ms=round((IMPORTS_DONE - BOOT_STARTED) * 1000, 1),
+        cold_start_ms=round((now - BOOT_STARTED) * 1000, 1),
+        budget_ms=settings.STARTUP_BUDGET_MS
+    )
+    log = logger.info if startup_stats["cold_start_ms"] <= settings.STARTUP_BUDGET_MS else logger.warning
+    log(
+        f"Cold start: {startup_stats['cold_start_ms']:.0f}ms "
+        f"(imports {startup_stats['imports_ms']:.0f}ms, budget {settings.STARTUP_BUDGET_MS:.0f}ms)"
+    )
+
     yield
 
     # Shutdown
     logger.info("Shutting down A.B.E.L...")
+    await health_monitor.stop()
+    await api_directory.stop()
+    await batch_service.stop()
+    await manager.stop()
+    await consolidator.stop()
+    await memory_writer.stop()
+    await memory_service.close()
+    await brain_service.close()
+    await gateway.close()
+    close_db()
+    metrics.close()
 
 
 # Create FastAPI app
@@ -85,21 +125,55 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(apis_router)
+app.include_router(batch_router)
+
+
+# Health checks
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the event loop is serving requests."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe from the cached dependency status (no I/O)."""
+    snapshot = health_monitor.snapshot()
+    return JSONResponse(snapshot, status_code=200 if health_monitor.ready else 503)
+
 
-# Health check
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    db_status = await check_database_connection()
+    """Detailed status for humans and dashboards (cached, no I/O)."""
     return {
-        "status": "healthy",
+        "status": "healthy" if health_monitor.status == "ready" else health_monitor.status,
         "app": settings.APP_NAME,
         "version": settings.APP_VERSION,
-        "database": "connected" if db_status else "disconnected",
-        "openai": "configured" if settings.OPENAI_API_KEY else "not_configured"
+        "database": "connected" if health_monitor.is_up("supabase") else "disconnected",
+        "openai": "configured" if settings.OPENAI_API_KEY else "not_configured",
+        "memory_queue": memory_writer.stats(),
+        "memory_consolidation": consolidator.stats(),
+        "llm_scheduler": scheduler.stats(),
+        "llm_gateway": gateway.stats(),
+        "api_directory": api_directory.stats(),
+        "batch": batch_service.stats(),
+        "dependencies": health_monitor.snapshot()["dependencies"],
+        "startup": startup_stats,
+        "node": {
+            "id": manager.node_id,
+            "broker": manager.broker.name,
+            "connections": len(manager.active_connections)
+        }
     }
 
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint for this worker."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # API info
 @app.get("/api/info")
 async def api_info():
@@ -110,8 +184,12 @@ async def api_info():
         "description": "Adam Beloucif Est Là - Assistant Personnel Intelligent",
         "endpoints": {
             "health": "/health",
+            "liveness": "/health/live",
+            "readiness": "/health/ready",
+            "metrics": "/metrics",
             "chat": "/ws/chat/{client_id}",
             "apis": "/api/apis",
+            "batch": "/api/batch",
             "docs": "/api/docs"
         }
     }
@@ -119,10 +197,79 @@ async def api_info():
 
 # WebSocket chat endpoint with Brain integration
 @app.websocket("/ws/chat/{client_id}")
-async def websocket_chat(websocket: WebSocket, client_id: str):
-    """WebSocket endpoint for real-time chat with AI."""
+async def websocket_chat(websocket: WebSocket, client_id: str, session_id: Optional[str] = None):
+    """WebSocket endpoint for real-time chat with AI.
+
+    Pass `?session_id=` to resume an existing conversation after a
+    reconnect; idle sessions are evicted by the session store.
+
+    Answers are generated in a task so frames keep being read meanwhile:
+    a "cancel" frame, a new "message", "clear" or a disconnect stop the
+    current answer (and its upstream LLM stream) right away.
+    """
     await manager.connect(websocket, client_id)
-    session_id = str(uuid.uuid4())
+    session_id = session_id or str(uuid.uuid4())
+    generation: Optional[asyncio.Task] = None
+
+    async def report_queue(position: int):
+        await manager.send_message(client_id, {
+            "type": "thinking",
+            "content": f"En file d'attente (position {position})...",
+            "position": position
+        })
+
+    async def respond(user_message: str, user_id: Optional[str]):
+        metrics.new_trace()
+        # Send thinking indicator
+        await manager.send_message(client_id, {
+            "type": "thinking",
+            "content": "Analyse en cours..."
+        })
+
+        # Check if OpenAI key is configured
+        if not settings.OPENAI_API_KEY:
+            # Mock response if no API key
+            await manager.send_message(client_id, {
+                "type": "assistant",
+                "content": f"[Mode Mock] J'ai bien reçu votre message: \"{user_message}\"\n\nPour activer les réponses IA, configurez OPENAI_API_KEY dans le fichier .env"
+            })
+            return
+
+        # Stream response from Brain, coalescing chunks into frames
+        stream = manager.stream(client_id)
+        try:
+            async with aclosing(brain_service.stream_message(
+                message=user_message,
+                session_id=session_id,
+                user_id=user_id,
+                on_queued=report_queue
+            )) as chunks:
+                async for chunk in chunks:
+                    stream.write(chunk)
+        except BaseException:
+            stream.abort()
+            raise
+
+        # Flush and send completion signal
+        await stream.close()
+
+    def log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Generation failed for {client_id}: {task.exception()}")
+
+    async def cancel_generation(notify: bool = True):
+        nonlocal generation
+        task, generation = generation, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        await asyncio.wait({task})
+        if notify:
+            await manager.send_message(client_id, {
+                "type": "assistant",
+                "complete": True,
+                "cancelled": True
+            })
 
     try:
         # Send welcome message
@@ -135,60 +282,53 @@ async def websocket_chat(websocket: WebSocket, client_id: str):
         while True:
             # Receive message from client
             data = await websocket.receive_json()
+            WS_MESSAGES.inc(data.get("type") if data.get("type") in WS_FRAME_TYPES else "other")
 
             if data.get("type") == "message":
                 user_message = data.get("content", "")
                 user_id = data.get("user_id")
 
-                # Send thinking indicator
-                await manager.send_message(client_id, {
-                    "type": "thinking",
-                    "content": "Analyse en cours..."
-                })
+                # A new message supersedes the answer in progress
+                await cancel_generation()
+
+                # Start memory retrieval while the thinking frame goes out
+                if settings.OPENAI_API_KEY:
+                    brain_service.prefetch_context(session_id, user_message, user_id)
+
+                generation = asyncio.create_task(respond(user_message, user_id))
+                generation.add_done_callback(log_failure)
+
+            elif data.get("type") == "cancel":
+                await cancel_generation()
 
-                # Check if OpenAI key is configured
-                if not settings.OPENAI_API_KEY:
-                    # Mock response if no API key
-                    await manager.send_message(client_id, {
-                        "type": "assistant",
-                        "content": f"[Mode Mock] J'ai bien reçu votre message: \"{user_message}\"\n\nPour activer les réponses IA, configurez OPENAI_API_KEY dans le fichier .env"
-                    })
-                else:
-                    # Stream response from Brain
-                    full_response = ""
-                    async for chunk in brain_service.stream_message(
-                        message=user_message,
-                        session_id=session_id,
-                        user_id=user_id
-                    ):
-                        full_response += chunk
-                        await manager.send_message(client_id, {
-                            "type": "stream",
-                            "content": chunk
-                        })
-
-                    # Send completion signal
-                    await manager.send_message(client_id, {
-                        "type": "assistant",
-                        "content": full_response,
-                        "complete": True
-                    })
+            elif data.get("type") == "typing":
+                # Speculative retrieval on the draft being typed
+                if settings.OPENAI_API_KEY:
+                    brain_service.prefetch_context(
+                        session_id,
+                        data.get("content", ""),
+                        data.get("user_id")
+                    )
 
             elif data.get("type") == "ping":
                 await manager.send_message(client_id, {"type": "pong"})
 
             elif data.get("type") == "clear":
-                brain_service.clear_history(session_id)
+                await cancel_generation()
+                await brain_service.clear_history(session_id)
                 await manager.send_message(client_id, {
                     "type": "system",
                     "content": "Historique de conversation effacé."
                 })
 
     except WebSocketDisconnect:
-        manager.disconnect(client_id)
+        await manager.disconnect(client_id)
     except Exception as e:
         logger.error(f"WebSocket error for {client_id}: {e}")
-        manager.disconnect(client_id)
+        await manager.disconnect(client_id)
+    finally:
+        await cancel_generation(notify=False)
+        brain_service.discard_prefetch(session_id)
 
 
 # Root endpoint
@@ -1,5 +1,6 @@
 # A.B.E.L Services
 from .brain import BrainService
+from .embeddings import EmbeddingService
 from .memory import MemoryService
 
-__all__ = ["BrainService", "MemoryService"]
+__all__ = ["BrainService", "EmbeddingService", "MemoryService"]
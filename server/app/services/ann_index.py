@@ -0,0 +1,147 @@
+"""
+A.B.E.L ANN Index - Inverted-file (IVF) approximate nearest neighbour search
+"""
+import logging
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger("abel.ann")
+
+
+def auto_nlist(size: int) -> int:
+    """Number of inverted lists for a collection size (~4 * sqrt(n))."""
+    return int(np.clip(4 * np.sqrt(size), 16, 4096))
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 4096) -> np.ndarray:
+    """Nearest centroid (by inner product) for every row, in chunks."""
+    assign = np.empty(vectors.shape[0], dtype=np.int32)
+    for start in range(0, vectors.shape[0], chunk):
+        block = np.asarray(vectors[start:start + chunk])
+        assign[start:start + chunk] = np.argmax(block @ centroids.T, axis=1)
+    return assign
+
+
+def train_centroids(
+    vectors: np.ndarray,
+    nlist: int,
+    iterations: int = 10,
+    sample_per_list: int = 64,
+    seed: int = 0
+) -> np.ndarray:
+    """Spherical k-means over a sample of unit vectors."""
+    rng = np.random.default_rng(seed)
+    size = vectors.shape[0]
+    nlist = min(nlist, size)
+
+    sample_size = min(size, nlist * sample_per_list)
+    sample = np.asarray(vectors[rng.choice(size, sample_size, replace=False)], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        assign = assign_lists(sample, centroids)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=nlist)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+
+        sums = np.empty_like(centroids)
+        sums[filled] = np.add.reduceat(sample[order], starts, axis=0)
+        empty = np.flatnonzero(counts == 0)
+        if empty.size:
+            # Re-seed dead centroids on random sample points
+            sums[empty] = sample[rng.choice(sample_size, empty.size, replace=False)]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+
+    return centroids
+
+
+class IVFIndex:
+    """IVF-Flat index over the rows of a vector matrix.
+
+    The index does not copy vectors: it maps each row of the owning
+    matrix to its nearest centroid. A query scores the centroids, keeps
+    the `nprobe` best lists and only computes exact similarities for the
+    rows in those lists. Larger `nprobe` trades latency for recall.
+    """
+
+    def __init__(self, centroids: np.ndarray, trained_size: int):
+        self.centroids = centroids.astype(np.float32)
+        self.trained_size = trained_size
+        self.assign = np.empty(0, dtype=np.int32)
+        self.members: list[set[int]] = [set() for _ in range(self.nlist)]
+        self._arrays: dict[int, np.ndarray] = {}
+
+    @property
+    def nlist(self) -> int:
+        return self.centroids.shape[0]
+
+    def build(self, assign: np.ndarray):
+        """Install precomputed list assignments for rows 0..len(assign)."""
+        self.assign = np.array(assign, dtype=np.int32)
+        self.members = [set() for _ in range(self.nlist)]
+        for row, list_id in enumerate(self.assign.tolist()):
+            self.members[list_id].add(row)
+        self._arrays.clear()
+
+    def _set(self, row: int, list_id: int):
+        if row >= self.assign.shape[0]:
+            grown = np.full(max(row + 1, self.assign.shape[0] * 2, 64), -1, dtype=np.int32)
+            grown[:self.assign.shape[0]] = self.assign
+            self.assign = grown
+        self.assign[row] = list_id
+        self.members[list_id].add(row)
+        self._arrays.pop(list_id, None)
+
+    def add(self, row: int, vector: np.ndarray):
+        """Assign a newly appended row to its nearest list."""
+        self._set(row, int(np.argmax(self.centroids @ vector)))
+
+    def remove(self, row: int, last: int):
+        """Mirror a swap-delete: `last` moves into `row`, `last` disappears."""
+        list_id = int(self.assign[row])
+        self.members[list_id].discard(row)
+        self._arrays.pop(list_id, None)
+        if row != last:
+            moved = int(self.assign[last])
+            self.members[moved].discard(last)
+            self._arrays.pop(moved, None)
+            self._set(row, moved)
+        self.assign[last] = -1
+
+    def _rows(self, list_id: int) -> np.ndarray:
+        rows = self._arrays.get(list_id)
+        if rows is None:
+            rows = np.fromiter(self.members[list_id], dtype=np.int64, count=len(self.members[list_id]))
+            self._arrays[list_id] = rows
+        return rows
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Rows in the `nprobe` lists whose centroids are closest to query."""
+        nprobe = min(nprobe, self.nlist)
+        scores = self.centroids @ query
+        probes = np.argpartition(scores, -nprobe)[-nprobe:] if nprobe < self.nlist else range(self.nlist)
+        parts = [self._rows(int(list_id)) for list_id in probes]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def state(self, size: int) -> dict:
+        """Arrays needed to restore the index (for np.savez)."""
+        return {
+            "centroids": self.centroids,
+            "assign": self.assign[:size],
+            "trained_size": np.array(self.trained_size)
+        }
+
+    @classmethod
+    def from_state(cls, state, size: int) -> Optional["IVFIndex"]:
+        """Restore an index saved with `state`, or None if it is stale."""
+        assign = state["assign"]
+        if assign.shape[0] != size:
+            return None
+        index = cls(state["centroids"], int(state["trained_size"]))
+        index.build(assign)
+        return index
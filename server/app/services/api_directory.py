@@ -0,0 +1,437 @@
+"""
+A.B.E.L API Directory - In-memory ranked search over the public API catalog
+"""
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import time
+import unicodedata
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.database import get_supabase_client, run_db
+from app.core.health import health_monitor
+from app.core.metrics import metrics
+
+logger = logging.getLogger("abel.api_directory")
+
+CATALOG_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "api_catalog.json"
+)
+COLUMNS = "id,name,category,description,base_url,auth_type,documentation_url,popularity_score"
+
+# Field weights: a hit in the name counts more than one in the description
+FIELD_WEIGHTS = (("name", 3.0), ("category", 2.0), ("description", 1.0))
+PREFIX_WEIGHT = 0.5  # "weath" still finds "weather", ranked below exact tokens
+MAX_PREFIX_EXPANSIONS = 8
+NAME_MATCH_BONUS = 10.0
+POPULARITY_WEIGHT = 0.1
+RRF_K = 60
+
+STOPWORDS = frozenset((
+    "a", "an", "and", "api", "apis", "de", "des", "du", "en", "et", "for", "in", "la", "le",
+    "les", "of", "on", "or", "pour", "sur", "the", "to", "un", "une", "with"
+))
+
+SEARCH_TIME = metrics.histogram(
+    "abel_api_search_seconds", "API directory lookups", ("mode",),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.25, 1.0)
+)
+
+
+def normalize(text: str) -> str:
+    """Lowercase without accents ("Météo" -> "meteo")."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in re.findall(r"[a-z0-9]+", normalize(text)) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", normalize(text)).strip("-")
+
+
+@dataclass(slots=True)
+class ApiEntry:
+    id: str
+    name: str
+    category: str
+    description: str
+    base_url: str
+    auth_type: str
+    documentation_url: str
+    popularity: float
+
+    @classmethod
+    def from_row(cls, row: dict) -> "ApiEntry":
+        category = row.get("category") or "Other"
+        return cls(
+            id=str(row.get("id") or _slug(f"{category}-{row['name']}")),
+            name=row["name"],
+            category=category,
+            description=row.get("description") or "",
+            base_url=row.get("base_url") or "",
+            auth_type=row.get("auth_type") or "none",
+            documentation_url=row.get("documentation_url") or row.get("docs_url") or "",
+            popularity=float(row.get("popularity_score") or 0.0)
+        )
+
+    def text(self) -> str:
+        """Text embedded for semantic search."""
+        return f"{self.name} ({self.category}): {self.description}"
+
+
+class ApiIndex:
+    """Immutable search snapshot of the catalog.
+
+    Postings hold precomputed `field weight * idf` scores, so a lookup is
+    a few dict reads and additions per query token. Reloads build a new
+    index off the event loop and swap it in whole.
+    """
+
+    def __init__(self, entries: list[ApiEntry]):
+        self.entries = entries
+        self.by_id = {entry.id: i for i, entry in enumerate(entries)}
+        self.by_name = {normalize(entry.name): i for i, entry in enumerate(entries)}
+        self.vectors: Optional[np.ndarray] = None
+
+        weights: dict[str, dict[int, float]] = {}
+        self.categories: dict[str, set[int]] = {}
+        self.auth_types: dict[str, set[int]] = {}
+        for doc, entry in enumerate(entries):
+            for field, weight in FIELD_WEIGHTS:
+                for token in tokenize(getattr(entry, field)):
+                    postings = weights.setdefault(token, {})
+                    postings[doc] = postings.get(doc, 0.0) + weight
+            self.categories.setdefault(normalize(entry.category), set()).add(doc)
+            self.auth_types.setdefault(entry.auth_type.lower(), set()).add(doc)
+
+        count = len(entries)
+        self.postings: dict[str, tuple[tuple[int, float], ...]] = {}
+        for token, postings in weights.items():
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            self.postings[token] = tuple((doc, weight * idf) for doc, weight in postings.items())
+        self.vocabulary = sorted(self.postings)
+
+    def _expand(self, token: str) -> list[tuple[str, float]]:
+        """The token itself plus vocabulary words it is a prefix of."""
+        matches = [(token, 1.0)] if token in self.postings else []
+        if len(token) >= 3:
+            start = bisect.bisect_left(self.vocabulary, token)
+            for word in self.vocabulary[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+                if not word.startswith(token):
+                    break
+                if word != token:
+                    matches.append((word, PREFIX_WEIGHT))
+        return matches
+
+    def allowed(self, category: Optional[str], auth_type: Optional[str]) -> Optional[set[int]]:
+        """Documents passing the filters (None = no filter)."""
+        allowed = None
+        if category:
+            allowed = self.categories.get(normalize(category), set())
+        if auth_type:
+            docs = self.auth_types.get(auth_type.lower(), set())
+            allowed = docs if allowed is None else allowed & docs
+        return allowed
+
+    def keyword(self, query: str, allowed: Optional[set[int]]) -> list[tuple[int, float]]:
+        scores: dict[int, float] = {}
+        for token in tokenize(query):
+            for word, factor in self._expand(token):
+                for doc, score in self.postings[word]:
+                    if allowed is None or doc in allowed:
+                        scores[doc] = scores.get(doc, 0.0) + score * factor
+        exact = self.by_name.get(normalize(query).strip())
+        if exact is not None and (allowed is None or exact in allowed):
+            scores[exact] = scores.get(exact, 0.0) + NAME_MATCH_BONUS
+        for doc in scores:
+            scores[doc] += POPULARITY_WEIGHT * self.entries[doc].popularity
+        return sorted(scores.items(), key=lambda item: -item[1])
+
+    def semantic(self, embedding: list[float], allowed: Optional[set[int]], limit: int) -> list[tuple[int, float]]:
+        query = np.asarray(embedding, dtype=np.float32)
+        if self.vectors is None or query.shape[0] != self.vectors.shape[1]:
+            return []
+        norm = np.linalg.norm(query)
+        if not norm:
+            return []
+        if allowed is None:
+            docs = np.arange(len(self.entries))
+        else:
+            docs = np.fromiter(sorted(allowed), dtype=np.int64, count=len(allowed))
+        if not docs.size:
+            return []
+        scores = self.vectors[docs] @ (query / norm)
+        top = np.argsort(-scores)[:limit]
+        return [(int(docs[i]), float(scores[i])) for i in top]
+
+    def browse(self, allowed: Optional[set[int]]) -> list[tuple[int, float]]:
+        """No query: most popular first, then by name."""
+        docs = range(len(self.entries)) if allowed is None else allowed
+        ranked = sorted(docs, key=lambda doc: (-self.entries[doc].popularity, self.entries[doc].name.lower()))
+        return [(doc, self.entries[doc].popularity) for doc in ranked]
+
+
+def _fuse(*rankings: list[tuple[int, float]]) -> list[tuple[int, float]]:
+    """Reciprocal rank fusion of several rankings."""
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, (doc, _) in enumerate(ranking):
+            scores[doc] = scores.get(doc, 0.0) + 1 / (RRF_K + rank + 1)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+class ApiDirectory:
+    """Searchable API catalog, loaded once and kept in memory.
+
+    API_DIRECTORY_SOURCE picks where entries come from: "supabase" (the
+    api_directory table), "catalog" (app/data/api_catalog.json, also seeded by scripts/seed_apis.py),
+    a path to a JSON file shaped like api_seed_data.json, or "auto"
+    (Supabase when it is up, else the catalog). Every
+    API_DIRECTORY_REFRESH seconds the source is checked again and the
+    index is rebuilt only when its content changed. For Supabase the check
+    is one small query (row count and latest `updated_at`); the table is
+    only re-read when that changes.
+
+    Keyword lookups (`lookup`) are synchronous and sub-millisecond, cheap
+    enough for every chat turn. With API_DIRECTORY_EMBEDDINGS on, entries
+    are embedded too and `search` also supports semantic and hybrid modes.
+    """
+
+    def __init__(
+        self,
+        source: Optional[str] = None,
+        refresh: Optional[float] = None,
+        embeddings: Optional[bool] = None
+    ):
+        self.source = source or settings.API_DIRECTORY_SOURCE
+        self.refresh = refresh if refresh is not None else settings.API_DIRECTORY_REFRESH
+        self.embeddings = embeddings if embeddings is not None else settings.API_DIRECTORY_EMBEDDINGS
+        self.index = ApiIndex([])
+        self.loaded_from: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        self._fingerprint: Optional[str] = None
+        self._mtime: Optional[float] = None
+        self._version: Optional[tuple] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ---- Sources ----
+
+    def _resolve_source(self) -> str:
+        if self.source != "auto":
+            return self.source
+        return "supabase" if health_monitor.is_up("supabase") else "catalog"
+
+    @staticmethod
+    def _read_catalog() -> list[dict]:
+        with open(CATALOG_FILE, encoding="utf-8") as f:
+            catalog = json.load(f)
+        return [
+            {**api, "category": category}
+            for category, apis in catalog.items()
+            for api in apis
+        ]
+
+    @staticmethod
+    def _read_file(path: str) -> list[dict]:
+        with open(path, encoding="utf-8") as f:
+            return [row for row in json.load(f) if row.get("is_active", True)]
+
+    @staticmethod
+    async def _probe_supabase() -> Optional[tuple]:
+        """(row count, latest updated_at): moves on any insert, update or delete."""
+        query = (
+            get_supabase_client().table("api_directory").select("updated_at", count="exact")
+            .order("updated_at", desc=True).limit(1)
+        )
+        result = await run_db(query.execute)
+        return result.count, (result.data[0]["updated_at"] if result.data else None)
+
+    @staticmethod
+    async def _read_supabase() -> list[dict]:
+        rows: list[dict] = []
+        page = settings.DB_BATCH_SIZE
+        while True:
+            query = (
+                get_supabase_client().table("api_directory").select(COLUMNS)
+                .eq("is_active", True).order("name").order("id").range(len(rows), len(rows) + page - 1)
+            )
+            result = await run_db(query.execute)
+            rows += result.data or []
+            if len(result.data or []) < page:
+                return rows
+
+    async def _fetch(self, source: str) -> Optional[list[dict]]:
+        """Rows from the source, or None when a file source is unchanged."""
+        if source == "supabase":
+            try:
+                version = await self._probe_supabase()
+            except Exception as e:  # e.g. updated_at not migrated yet: always re-read
+                logger.debug(f"API directory probe failed: {e}")
+                version = None
+            if version is not None and version == self._version and source == self.loaded_from:
+                return None
+            rows = await self._read_supabase()
+            self._version = version
+            return rows
+        # Files are only re-read when their mtime moves
+        path = CATALOG_FILE if source == "catalog" else source
+        mtime = os.path.getmtime(path)
+        if mtime == self._mtime and source == self.loaded_from:
+            return None
+        if source == "catalog":
+            rows = await asyncio.to_thread(self._read_catalog)
+        else:
+            rows = await asyncio.to_thread(self._read_file, path)
+        self._mtime = mtime
+        return rows
+
+    # ---- Loading ----
+
+    async def _embed(self, index: ApiIndex):
+        from .memory import memory_service
+        vectors = await memory_service.get_embeddings([entry.text() for entry in index.entries])
+        if not vectors or any(not vector for vector in vectors):
+            logger.warning("API directory embeddings unavailable, semantic search disabled")
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        index.vectors = matrix
+
+    async def load(self) -> bool:
+        """Reload the catalog if it changed. Returns True when swapped."""
+        source = self._resolve_source()
+        rows = await self._fetch(source)
+        if rows is None:
+            return False
+        fingerprint = hashlib.sha1(
+            json.dumps(rows, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        if fingerprint == self._fingerprint and source == self.loaded_from:
+            return False
+
+        started = time.perf_counter()
+        index = await asyncio.to_thread(ApiIndex, [ApiEntry.from_row(row) for row in rows])
+        if self.embeddings and settings.OPENAI_API_KEY and index.entries:
+            await self._embed(index)
+        self.index = index
+        self._fingerprint = fingerprint
+        self.loaded_from = source
+        self.loaded_at = time.time()
+        logger.info(
+            f"API directory: {len(index.entries)} APIs from {source} "
+            f"indexed in {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+        return True
+
+    async def _run(self):
+        while True:
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"API directory reload failed: {e}")
+            if self.refresh <= 0:
+                return
+            await asyncio.sleep(self.refresh)
+
+    def start(self):
+        """Load in the background (startup is not delayed), then watch for changes."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ---- Queries ----
+
+    def _results(self, index: ApiIndex, ranking: list[tuple[int, float]], limit: int) -> list[dict]:
+        return [
+            {**asdict(index.entries[doc]), "score": round(score, 4)}
+            for doc, score in ranking[:limit]
+        ]
+
+    def lookup(
+        self,
+        query: str = "",
+        category: Optional[str] = None,
+        auth_type: Optional[str] = None,
+        limit: int = 10
+    ) -> list[dict]:
+        """Ranked keyword search (synchronous, no I/O)."""
+        started = time.perf_counter()
+        index = self.index
+        allowed = index.allowed(category, auth_type)
+        ranking = index.keyword(query, allowed) if query.strip() else index.browse(allowed)
+        results = self._results(index, ranking, limit)
+        SEARCH_TIME.observe(time.perf_counter() - started, "keyword")
+        return results
+
+    async def search(
+        self,
+        query: str = "",
+        category: Optional[str] = None,
+        auth_type: Optional[str] = None,
+        limit: int = 10,
+        mode: str = "keyword"
+    ) -> list[dict]:
+        """Keyword, semantic or hybrid (rank fusion of both) search.
+
+        Falls back to keyword search while entries have no embeddings.
+        """
+        index = self.index
+        if mode == "keyword" or index.vectors is None or not query.strip():
+            return self.lookup(query, category, auth_type, limit)
+
+        from .memory import memory_service
+        embedding = await memory_service.get_embedding(query)
+        if not embedding:
+            return self.lookup(query, category, auth_type, limit)
+
+        started = time.perf_counter()
+        allowed = index.allowed(category, auth_type)
+        pool = max(limit * 5, 50)
+        semantic = index.semantic(embedding, allowed, pool)
+        ranking = semantic if mode == "semantic" else _fuse(index.keyword(query, allowed)[:pool], semantic)
+        results = self._results(index, ranking, limit)
+        SEARCH_TIME.observe(time.perf_counter() - started, mode)
+        return results
+
+    def get(self, api_id: str) -> Optional[dict]:
+        index = self.index
+        doc = index.by_id.get(api_id)
+        return asdict(index.entries[doc]) if doc is not None else None
+
+    def categories(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for entry in self.index.entries:
+            counts[entry.category] = counts.get(entry.category, 0) + 1
+        return dict(sorted(counts.items()))
+
+    def stats(self) -> dict:
+        return {
+            "apis": len(self.index.entries),
+            "source": self.loaded_from,
+            "loaded_at": self.loaded_at,
+            "semantic": self.index.vectors is not None
+        }
+
+
+# Singleton instance
+api_directory = ApiDirectory()
@@ -0,0 +1,442 @@
+"""
+A.B.E.L Batch - Bulk chat jobs streamed as NDJSON and resumable from a local job store
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: runners are only seen by their own process
+    fcntl = None
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from .brain import BrainService, brain_service
+from .gateway import GatewayUnavailable
+from .memory import MemoryService, memory_service
+from .scheduler import PRIORITY_BACKGROUND, SchedulerBusy
+from .sessions import ROLE_USER, ROLES, Turn
+
+logger = logging.getLogger("abel.batch")
+
+JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+EMBED_CHUNK = 256  # Queries embedded per request when warming retrieval
+FOLLOW_INTERVAL = 1.0  # Seconds between reads of a job run by another worker
+
+ITEMS = metrics.counter("abel_batch_items_total", "Batch conversations processed", ("result",))
+
+
+class BatchError(ValueError):
+    """Invalid batch request (message in French, shown to the caller)."""
+
+
+@dataclass
+class BatchJob:
+    id: str
+    total: int
+    created_at: float
+    use_memory: bool = True
+    status: str = "pending"  # pending | running | done | partial (stopped with items left)
+    completed: int = 0
+    failed: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def parse_conversation(raw: dict, user_id: Optional[str] = None) -> dict:
+    """Validate one conversation: `messages` ending with a user message,
+    optional `id` and `user_id` (defaults to the batch's)."""
+    if not isinstance(raw, dict):
+        raise BatchError("Chaque conversation doit être un objet JSON")
+    messages = raw.get("messages")
+    if not isinstance(messages, list) or not messages:
+        raise BatchError("Chaque conversation doit contenir une liste 'messages' non vide")
+    turns: list[list] = []
+    for message in messages:
+        if not isinstance(message, dict) or message.get("role") not in ROLES or not isinstance(message.get("content"), str):
+            raise BatchError("Message invalide: 'role' (user ou assistant) et 'content' sont requis")
+        turns.append([ROLES[message["role"]], message["content"]])
+    if turns[-1][0] != ROLE_USER:
+        raise BatchError("Chaque conversation doit se terminer par un message utilisateur")
+    return {
+        "id": str(raw["id"]) if raw.get("id") is not None else None,
+        "user_id": raw.get("user_id") or user_id,
+        "turns": turns
+    }
+
+
+class JobStore:
+    """Jobs on disk, one set of files per job id:
+
+    - `<id>.json`: job header (total, options, creation time);
+    - `<id>.input.ndjson`: the validated conversations, one per line;
+    - `<id>.ndjson`: results, appended as they complete;
+    - `<id>.lock`: flock held by the process running the job, so workers
+      sharing the directory never run a job twice and see it as running.
+      The kernel drops it if that process dies.
+
+    A result line is final unless it holds an error; the last line for an
+    index wins, so a resumed job simply appends retried items.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory if directory is not None else settings.BATCH_DIR
+
+    def _path(self, job_id: str, suffix: str) -> str:
+        if not JOB_ID.match(job_id):
+            raise KeyError(job_id)
+        return os.path.join(self.directory, job_id + suffix)
+
+    def create(self, conversations: Iterable[dict], use_memory: bool) -> BatchJob:
+        os.makedirs(self.directory, exist_ok=True)
+        job = BatchJob(id=uuid.uuid4().hex, total=0, created_at=time.time(), use_memory=use_memory)
+        with open(self._path(job.id, ".input.ndjson"), "w", encoding="utf-8") as f:
+            for conversation in conversations:
+                f.write(json.dumps(conversation, ensure_ascii=False) + "\n")
+                job.total += 1
+        header = {"id": job.id, "total": job.total, "created_at": job.created_at, "use_memory": use_memory}
+        with open(self._path(job.id, ".json"), "w", encoding="utf-8") as f:
+            json.dump(header, f)
+        return job
+
+    def load(self, job_id: str) -> Optional[BatchJob]:
+        """The job with counts taken from its results (None if unknown)."""
+        try:
+            with open(self._path(job_id, ".json"), encoding="utf-8") as f:
+                job = BatchJob(**json.load(f))
+        except (KeyError, FileNotFoundError):
+            return None
+        results = self.results(job_id)
+        job.failed = sum(1 for result in results.values() if result.get("error"))
+        job.completed = len(results) - job.failed
+        if self.locked(job_id):
+            job.status = "running"
+        else:
+            job.status = "done" if job.completed == job.total else ("partial" if results else "pending")
+        return job
+
+    def lock(self, job_id: str) -> Optional[int]:
+        """Take the job's run lock: a file descriptor to pass to `unlock`,
+        or None when another runner holds it."""
+        fd = os.open(self._path(job_id, ".lock"), os.O_CREAT | os.O_RDWR, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return None
+        return fd
+
+    @staticmethod
+    def unlock(fd: int):
+        os.close(fd)  # Releases the flock
+
+    def locked(self, job_id: str) -> bool:
+        """Whether a runner, in this process or another, holds the job's lock."""
+        if fcntl is None:
+            return False
+        try:
+            fd = os.open(self._path(job_id, ".lock"), os.O_RDONLY)
+        except (KeyError, FileNotFoundError):
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            return False
+        except BlockingIOError:
+            return True
+        finally:
+            os.close(fd)
+
+    def conversations(self, job_id: str) -> Iterable[tuple[int, dict]]:
+        with open(self._path(job_id, ".input.ndjson"), encoding="utf-8") as f:
+            for index, line in enumerate(f):
+                yield index, json.loads(line)
+
+    def results(self, job_id: str) -> dict[int, dict]:
+        """Latest result per conversation index."""
+        latest: dict[int, dict] = {}
+        try:
+            with open(self._path(job_id, ".ndjson"), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn last line after a crash
+                    latest[result["index"]] = result
+        except FileNotFoundError:
+            pass
+        return latest
+
+    def open_results(self, job_id: str):
+        return open(self._path(job_id, ".ndjson"), "a", encoding="utf-8")
+
+    def delete(self, job_id: str) -> bool:
+        if not JOB_ID.match(job_id):
+            return False
+        removed = False
+        for suffix in (".json", ".input.ndjson", ".ndjson", ".lock"):
+            try:
+                os.remove(self._path(job_id, suffix))
+                removed = True
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def purge(self, max_age: float) -> int:
+        """Delete jobs created more than `max_age` seconds ago."""
+        if max_age <= 0 or not os.path.isdir(self.directory):
+            return 0
+        cutoff = time.time() - max_age
+        purged = 0
+        for name in os.listdir(self.directory):
+            job_id, _, extension = name.partition(".")
+            if extension == "json" and JOB_ID.match(job_id):
+                if os.path.getmtime(os.path.join(self.directory, name)) < cutoff and self.delete(job_id):
+                    purged += 1
+        return purged
+
+
+class BatchService:
+    """Runs bulk chat jobs in the background.
+
+    Conversations are answered by BATCH_CONCURRENCY workers through
+    `BrainService.complete`, at background priority: the LLM scheduler
+    keeps interactive chat first and its rate limits are the only
+    throttle. Memory retrieval is shared: the last user messages are
+    embedded in bulk up front and identical (user, query) pairs are
+    retrieved once.
+
+    Results are appended to the job store as they complete and fanned out
+    to followers, so a job outlives the request that started it. A job
+    stopped by a restart is resumed with `resume(job_id)`: only items
+    without a successful result run again. The job's lock keeps other
+    workers from starting a second runner; their followers tail the
+    results file instead.
+    """
+
+    def __init__(
+        self,
+        brain: Optional[BrainService] = None,
+        memory: Optional[MemoryService] = None,
+        store: Optional[JobStore] = None
+    ):
+        self.brain = brain or brain_service
+        self.memory = memory or memory_service
+        self.store = store or JobStore()
+        self._runners: dict[str, asyncio.Task] = {}
+        self._locks: dict[str, int] = {}
+        self._followers: dict[str, set[asyncio.Queue]] = {}
+
+    async def submit(self, conversations: list[dict], user_id: Optional[str] = None, use_memory: bool = True) -> BatchJob:
+        """Validate and store a job, then start it."""
+        if not conversations:
+            raise BatchError("Aucune conversation fournie")
+        if len(conversations) > settings.BATCH_MAX_ITEMS:
+            raise BatchError(f"Trop de conversations (maximum {settings.BATCH_MAX_ITEMS})")
+        parsed = [parse_conversation(raw, user_id) for raw in conversations]
+        job = await asyncio.to_thread(self.store.create, parsed, use_memory)
+        self.resume(job.id)
+        return await self.get(job.id)
+
+    async def get(self, job_id: str) -> Optional[BatchJob]:
+        job = await asyncio.to_thread(self.store.load, job_id)
+        if job is not None and job_id in self._runners:
+            job.status = "running"
+        return job
+
+    def resume(self, job_id: str) -> bool:
+        """Run (or resume) a stored job; False if it is already running here or in another worker."""
+        if job_id in self._runners:
+            return False
+        lock = self.store.lock(job_id)
+        if lock is None:
+            return False
+        self._locks[job_id] = lock
+        task = asyncio.create_task(self._run(job_id))
+        self._runners[job_id] = task
+        task.add_done_callback(lambda done: self._finish(job_id, done))
+        return True
+
+    def _finish(self, job_id: str, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Batch {job_id} stopped: {task.exception()!r}")
+        self._runners.pop(job_id, None)
+        self.store.unlock(self._locks.pop(job_id))
+        for queue in self._followers.pop(job_id, ()):
+            queue.put_nowait(None)
+
+    async def cancel(self, job_id: str) -> bool:
+        task = self._runners.get(job_id)
+        if task is None:
+            return False
+        task.cancel()
+        await asyncio.wait({task})
+        return True
+
+    async def delete(self, job_id: str) -> bool:
+        await self.cancel(job_id)
+        return await asyncio.to_thread(self.store.delete, job_id)
+
+    # ---- Execution ----
+
+    async def _run(self, job_id: str):
+        job = await asyncio.to_thread(self.store.load, job_id)
+        if job is None:
+            return
+        done = await asyncio.to_thread(self.store.results, job_id)
+        pending = await asyncio.to_thread(lambda: [
+            (index, conversation) for index, conversation in self.store.conversations(job_id)
+            if index not in done or done[index].get("error")
+        ])
+        if not pending:
+            return
+        logger.info(f"Batch {job_id}: {len(pending)}/{job.total} conversations to answer")
+
+        contexts: dict[tuple[str, str], asyncio.Task] = {}
+        if job.use_memory and settings.OPENAI_API_KEY:
+            await self._warm([c["turns"][-1][1] for _, c in pending if c["user_id"]])
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in pending:
+            queue.put_nowait(item)
+        started = time.perf_counter()
+        write_lock = asyncio.Lock()
+        with self.store.open_results(job_id) as output:
+            def write(line: str):
+                output.write(line)
+                output.flush()
+
+            async def worker(slot: int):
+                while not queue.empty():
+                    index, conversation = queue.get_nowait()
+                    result = await self._answer(job, slot, index, conversation, contexts)
+                    async with write_lock:  # One thread writes the file at a time
+                        await asyncio.to_thread(write, json.dumps(result, ensure_ascii=False) + "\n")
+                    self._publish(job_id, result)
+
+            workers = min(settings.BATCH_CONCURRENCY, len(pending))
+            await asyncio.gather(*(worker(slot) for slot in range(workers)))
+        logger.info(f"Batch {job_id}: {len(pending)} conversations in {time.perf_counter() - started:.1f}s")
+
+    async def _warm(self, queries: list[str]):
+        """Embed every distinct query in a few requests (fills the embedding cache)."""
+        unique = list(dict.fromkeys(queries))
+        for start in range(0, len(unique), EMBED_CHUNK):
+            await self.memory.get_embeddings(unique[start:start + EMBED_CHUNK])
+
+    def _context(self, contexts: dict, user_id: str, query: str) -> asyncio.Task:
+        key = (user_id, query)
+        if key not in contexts:
+            contexts[key] = asyncio.create_task(self.memory.get_context_for_chat(query=query, user_id=user_id))
+        return contexts[key]
+
+    async def _answer(self, job: BatchJob, slot: int, index: int, conversation: dict, contexts: dict) -> dict:
+        turns: list[Turn] = [tuple(turn) for turn in conversation["turns"]]
+        message = turns[-1][1]
+        user_id = conversation["user_id"]
+        result = {"type": "result", "index": index, "id": conversation["id"]}
+        started = time.perf_counter()
+        try:
+            memory = ""
+            if job.use_memory and user_id:
+                memory = await asyncio.shield(self._context(contexts, user_id, message))
+            for attempt in range(settings.BATCH_RETRIES + 1):
+                try:
+                    # One scheduler key per worker: the per-user cap does not apply to batches
+                    response, prompt_tokens, completion_tokens = await self.brain.complete(
+                        message, turns[:-1], memory,
+                        key=f"batch:{job.id}:{slot}", priority=PRIORITY_BACKGROUND
+                    )
+                    break
+                except (SchedulerBusy, GatewayUnavailable):
+                    if attempt == settings.BATCH_RETRIES:
+                        raise
+                    await asyncio.sleep(min(2 ** attempt, 30))
+            result.update(response=response, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+            ITEMS.inc("ok")
+        except Exception as e:
+            logger.warning(f"Batch {job.id} item {index} failed: {e!r}")
+            result["error"] = str(e) or type(e).__name__
+            ITEMS.inc("error")
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    # ---- Results ----
+
+    def _publish(self, job_id: str, result: dict):
+        for queue in self._followers.get(job_id, ()):
+            queue.put_nowait(result)
+
+    async def follow(self, job_id: str) -> AsyncIterator[dict]:
+        """Stored results, then live ones until the job stops.
+
+        A job running in another worker is followed by re-reading its
+        results file every FOLLOW_INTERVAL seconds. Yields a `job` line first and a `done` line (with final counts) last.
+        """
+        job = await self.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        yield {"type": "job", **job.as_dict()}
+
+        queue: asyncio.Queue = asyncio.Queue()
+        live = job_id in self._runners
+        remote = not live and job.status == "running"
+        if live:
+            # Subscribe before reading the file so no result falls in between
+            self._followers.setdefault(job_id, set()).add(queue)
+        try:
+            stored = await asyncio.to_thread(self.store.results, job_id)
+            for index in sorted(stored):
+                yield stored[index]
+            while live:
+                result = await queue.get()
+                if result is None:
+                    break
+                if stored.get(result["index"]) != result:  # Not already read from the file
+                    yield result
+            while remote:
+                await asyncio.sleep(FOLLOW_INTERVAL)
+                # Checked before reading so the last results are never missed
+                remote = await asyncio.to_thread(self.store.locked, job_id)
+                latest = await asyncio.to_thread(self.store.results, job_id)
+                for index in sorted(latest):
+                    if stored.get(index) != latest[index]:
+                        yield latest[index]
+                stored = latest
+        finally:
+            self._followers.get(job_id, set()).discard(queue)
+
+        job = await self.get(job_id)
+        yield {"type": "done", **job.as_dict()}
+
+    async def run(self, conversations: list[dict], **options) -> AsyncIterator[dict]:
+        """Submit a job and yield its results as they complete (Python API)."""
+        job = await self.submit(conversations, **options)
+        async for line in self.follow(job.id):
+            yield line
+
+    def start(self):
+        """Drop jobs older than BATCH_RETENTION_DAYS."""
+        purged = self.store.purge(settings.BATCH_RETENTION_DAYS * 86400)
+        if purged:
+            logger.info(f"Purged {purged} old batch jobs")
+
+    async def stop(self):
+        """Stop running jobs; they can be resumed after restart."""
+        for job_id in list(self._runners):
+            await self.cancel(job_id)
+
+    def stats(self) -> dict:
+        return {"running": len(self._runners), "followers": sum(len(f) for f in self._followers.values())}
+
+
+# Singleton instance
+batch_service = BatchService()
@@ -1,183 +1,437 @@
 """
 A.B.E.L Brain Service - LLM Orchestration with LangChain
 """
+import asyncio
 import logging
+import time
+from contextlib import aclosing
 from typing import AsyncGenerator, Optional
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from .consolidation import score_importance
+from .context import ContextBuilder, context_builder
+from .gateway import GatewayUnavailable, ProviderGateway, gateway
 from .memory import memory_service
+from .memory_writer import memory_writer
+from .prompts import PromptLayout, prompt_layout
+from .response_cache import SemanticCache, replay_chunks, response_cache
+from .scheduler import (
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, LLMScheduler, PositionCallback, SchedulerBusy, scheduler
+)
+from .sessions import ROLE_USER, ROLES, SessionStore, Turn, create_session_store
 
 logger = logging.getLogger("abel.brain")
 
+RESPONSE_CACHE = metrics.counter("abel_response_cache_total", "Semantic response cache lookups", ("result",))
+TOKENS = metrics.counter("abel_llm_tokens_total", "LLM tokens (estimated)", ("kind",))
+TTFT = metrics.histogram("abel_llm_ttft_seconds", "Time from message to first streamed token")
+TOKEN_RATE = metrics.histogram(
+    "abel_llm_tokens_per_second", "Streaming speed of LLM answers",
+    buckets=(5, 10, 20, 40, 60, 80, 120, 160, 240)
+)
+TURNS = metrics.histogram("abel_chat_turn_seconds", "Duration of a streamed chat turn", ("source",))
 
-ABEL_SYSTEM_PROMPT = """Tu es A.B.E.L (Adam Beloucif Est Là), un assistant personnel intelligent avec une personnalité unique.
 
-PERSONNALITÉ:
-- Tu es professionnel mais amical, avec un léger côté cyberpunk
-- Tu réponds toujours en français sauf si l'utilisateur te parle dans une autre langue
-- Tu es proactif et anticipe les besoins de l'utilisateur
-- Tu as accès à plus de 1400 APIs publiques pour aider l'utilisateur
+SUMMARY_PROMPT = """Résume la conversation suivante entre un utilisateur et A.B.E.L en quelques phrases.
+Conserve les faits importants (noms, chiffres, préférences, décisions) et intègre le résumé précédent.
 
-CAPACITÉS:
-- Chat conversationnel intelligent
-- Recherche d'informations via APIs publiques
-- Gestion de la mémoire à long terme (RAG)
-- Synthèse vocale (TTS)
+RÉSUMÉ PRÉCÉDENT:
+{previous}
 
-RÈGLES:
-- Sois concis mais informatif
-- Utilise des emojis avec parcimonie pour ajouter de la personnalité
-- Si tu ne sais pas quelque chose, admets-le honnêtement
-- Rappelle-toi du contexte des conversations précédentes quand c'est pertinent
+NOUVEAUX ÉCHANGES:
+{transcript}
 
-{context}"""
+RÉSUMÉ MIS À JOUR:"""
+
+
+BUSY_MESSAGE = "A.B.E.L est très sollicité en ce moment. Réessayez dans quelques instants."
+UNAVAILABLE_MESSAGE = "A.B.E.L ne parvient pas à joindre son modèle de langage. Réessayez dans quelques instants."
+
+# Appended to answers cut short by the user, so the model knows later on
+INTERRUPTED_MARKER = "\n\n[Réponse interrompue]"
 
 
 class BrainService:
     """Main AI brain orchestrating LLM and tools."""
 
-    def __init__(self):
-        self._llm: Optional[ChatOpenAI] = None
-        self.conversation_history: dict[str, list] = {}
-
-    @property
-    def llm(self) -> ChatOpenAI:
-        """Lazy load LLM."""
-        if self._llm is None:
-            self._llm = ChatOpenAI(
-                model=settings.OPENAI_MODEL,
-                api_key=settings.OPENAI_API_KEY,
-                temperature=0.7,
-                streaming=True
-            )
-        return self._llm
-
-    def _get_history(self, session_id: str) -> list:
-        """Get conversation history for a session."""
-        if session_id not in self.conversation_history:
-            self.conversation_history[session_id] = []
-        return self.conversation_history[session_id]
-
-    def _add_to_history(self, session_id: str, role: str, content: str):
-        """Add message to conversation history."""
-        history = self._get_history(session_id)
-        if role == "user":
-            history.append(HumanMessage(content=content))
-        elif role == "assistant":
-            history.append(AIMessage(content=content))
-
-        # Keep only last 20 messages
-        if len(history) > 20:
-            self.conversation_history[session_id] = history[-20:]
+    def __init__(
+        self,
+        sessions: Optional[SessionStore] = None,
+        context: Optional[ContextBuilder] = None,
+        cache: Optional[SemanticCache] = None,
+        llm_scheduler: Optional[LLMScheduler] = None,
+        llm_gateway: Optional[ProviderGateway] = None,
+        layout: Optional[PromptLayout] = None
+    ):
+        self.gateway = llm_gateway or gateway
+        self.layout = layout or prompt_layout
+        self.sessions = sessions or create_session_store()
+        self.context = context or context_builder
+        self.cache = cache or response_cache
+        self.scheduler = llm_scheduler or scheduler
+        self._summarizing: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+        # session_id -> (query, user_id, retrieval task) started ahead of time
+        self._prefetch: dict[str, tuple[str, str, asyncio.Task]] = {}
+        self.retrieval_timeouts = 0
+
+    def prefetch_context(self, session_id: str, text: str, user_id: Optional[str]):
+        """Start memory retrieval before the turn needs it.
+
+        Called on "typing" frames (speculatively, with the draft) and as
+        soon as a message arrives. A prefetch for a different draft of the
+        same session replaces the previous one.
+        """
+        text = text.strip()
+        if not user_id or not text:
+            return
+        current = self._prefetch.get(session_id)
+        if current is not None:
+            if current[0] == text and current[1] == user_id:
+                return
+            current[2].cancel()
+
+        task = asyncio.create_task(
+            memory_service.get_context_for_chat(query=text, user_id=user_id)
+        )
+        self._prefetch[session_id] = (text, user_id, task)
+
+    def discard_prefetch(self, session_id: str):
+        """Drop any pending prefetch for a session (e.g. on disconnect)."""
+        current = self._prefetch.pop(session_id, None)
+        if current is not None:
+            current[2].cancel()
+
+    def _retrieval_task(
+        self,
+        session_id: str,
+        message: str,
+        user_id: Optional[str]
+    ) -> Optional[asyncio.Task]:
+        """Reuse a matching prefetch or start retrieval now."""
+        if not user_id:
+            self.discard_prefetch(session_id)
+            return None
+        self.prefetch_context(session_id, message, user_id)
+        current = self._prefetch.pop(session_id, None)
+        return current[2] if current else None
+
+    async def _await_retrieval(self, task: Optional[asyncio.Task], started: float) -> str:
+        """Wait for retrieval until the deadline, then go on without context."""
+        if task is None:
+            return ""
+        remaining = settings.RETRIEVAL_DEADLINE_MS / 1000 - (time.monotonic() - started)
+        try:
+            # Shielded: a late retrieval still warms the embedding cache
+            return await asyncio.wait_for(asyncio.shield(task), max(remaining, 0))
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            return ""
+        except asyncio.TimeoutError:
+            self.retrieval_timeouts += 1
+            logger.warning(f"Memory retrieval exceeded {settings.RETRIEVAL_DEADLINE_MS:.0f}ms, answering without it")
+            return ""
+        except Exception as e:
+            logger.error(f"Memory retrieval failed: {e}")
+            return ""
 
-    async def process_message(
+    async def _build_messages(
         self,
         message: str,
         session_id: str,
-        user_id: Optional[str] = None
-    ) -> str:
-        """Process a user message and return response."""
+        user_id: Optional[str]
+    ) -> tuple[list, int]:
+        """Context assembly shared by process_message and stream_message.
+
+        Memory retrieval runs concurrently with history loading and is
+        bounded by RETRIEVAL_DEADLINE_MS. Returns the prompt messages and
+        how many of the oldest history turns fell outside the token budget.
+        """
+        started = time.monotonic()
+        retrieval = self._retrieval_task(session_id, message, user_id)
+
+        history, summary = await asyncio.gather(
+            self.sessions.get(session_id),
+            self.sessions.get_summary(session_id)
+        )
+        with metrics.span("retrieval_wait"):
+            context = await self._await_retrieval(retrieval, started)
+        return self._assemble(message, history, summary, context)
+
+    def _assemble(self, message: str, history: list[Turn], summary: Optional[str], memory: str) -> tuple[list, int]:
+        """Fit memory, summary and history into the budget around `message`."""
+        built = self.context.build(
+            system_prompt=self.layout.system_prompt,
+            memory=memory,
+            history=history,
+            message=message,
+            summary=summary
+        )
+        return self.layout.messages(message, built.history, summary, built.memory), built.evicted
+
+    def _prompt_tokens(self, messages: list) -> int:
+        """Prompt size, reserved against the tokens-per-minute limit."""
+        count = self.context.counter.message
+        return sum(count(m.content) for m in messages)
+
+    def _schedule_summary(self, session_id: str, evicted: int):
+        """Fold turns that no longer fit into the rolling summary (background)."""
+        if evicted <= 0 or session_id in self._summarizing:
+            return
+        self._summarizing.add(session_id)
+        task = asyncio.create_task(self._summarize(session_id, evicted))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _summarize(self, session_id: str, count: int):
         try:
-            # Get relevant context from memory
-            context = ""
-            if user_id:
-                context = await memory_service.get_context_for_chat(
-                    query=message,
-                    user_id=user_id
-                )
-
-            # Build system message with context
-            system_content = ABEL_SYSTEM_PROMPT.format(
-                context=f"\nCONTEXTE MÉMOIRE:\n{context}" if context else ""
+            turns = (await self.sessions.get(session_id))[:count]
+            if not turns:
+                return
+            previous = await self.sessions.get_summary(session_id)
+            transcript = "\n".join(
+                f"{'Utilisateur' if role == ROLE_USER else 'Abel'}: {content}"
+                for role, content in turns
             )
+            from langchain_core.messages import HumanMessage
+            prompt = [HumanMessage(content=SUMMARY_PROMPT.format(
+                previous=previous or "(aucun)",
+                transcript=transcript
+            ))]
+            tokens = self.context.counter.message(prompt[0].content) + settings.CONTEXT_SUMMARY_TOKENS
+            async with self.scheduler.slot(session_id, tokens, PRIORITY_BACKGROUND):
+                response = await self.gateway.ainvoke(prompt, max_tokens=settings.CONTEXT_SUMMARY_TOKENS)
+
+            # Only drop the turns once their summary exists
+            await self.sessions.pop_oldest(session_id, len(turns))
+            await self.sessions.set_summary(session_id, response.content.strip())
+            logger.info(f"Summarized {len(turns)} turns for session {session_id}")
+        except Exception as e:
+            logger.error(f"History summarization failed: {e}")
+        finally:
+            self._summarizing.discard(session_id)
 
-            # Get conversation history
-            history = self._get_history(session_id)
+    async def _add_to_history(self, session_id: str, role: str, content: str):
+        """Add message to conversation history (limits enforced by the store)."""
+        if role in ROLES:
+            await self.sessions.append(session_id, ROLES[role], content)
 
-            # Build messages
-            messages = [
-                SystemMessage(content=system_content),
-                *history,
-                HumanMessage(content=message)
-            ]
+    async def _cache_lookup(
+        self,
+        message: str,
+        session_id: str,
+        user_id: Optional[str]
+    ) -> tuple[Optional[str], Optional[list[float]]]:
+        """Look the question up in the semantic cache.
+
+        Only the first turn of a session is cacheable: later answers depend
+        on the conversation. Returns (cached answer, query embedding); the
+        embedding is kept to cache the live answer on a miss.
+        """
+        if not settings.RESPONSE_CACHE_ENABLED or await self.sessions.get(session_id):
+            return None, None
+        try:
+            embedding = await asyncio.wait_for(
+                memory_service.get_embedding(message),
+                settings.RETRIEVAL_DEADLINE_MS / 1000
+            )
+        except asyncio.TimeoutError:
+            return None, None
+        if not embedding:
+            return None, None
+        cached = self.cache.get(embedding, user_id)
+        RESPONSE_CACHE.inc("miss" if cached is None else "hit")
+        return cached, embedding
+
+    def _remember(self, message: str, response: str, session_id: str, user_id: Optional[str]):
+        """Queue the turn for long-term memory if meaningful (non-blocking)."""
+        if user_id and len(message) > 20:
+            memory_writer.enqueue(
+                user_id=user_id,
+                content=f"User: {message}\nAbel: {response[:200]}...",
+                metadata={"session_id": session_id, "type": "conversation"},
+                importance=score_importance(message)
+            )
 
-            # Get response from LLM
-            response = await self.llm.ainvoke(messages)
-            response_text = response.content
+    async def process_message(
+        self,
+        message: str,
+        session_id: str,
+        user_id: Optional[str] = None,
+        on_queued: Optional[PositionCallback] = None
+    ) -> str:
+        """Process a user message and return response."""
+        try:
+            # Retrieval starts while the cache is checked
+            self.prefetch_context(session_id, message, user_id)
+            cached, embedding = await self._cache_lookup(message, session_id, user_id)
+            if cached is not None:
+                self.discard_prefetch(session_id)
+                await self._add_to_history(session_id, "user", message)
+                await self._add_to_history(session_id, "assistant", cached)
+                return cached
+
+            messages, evicted = await self._build_messages(message, session_id, user_id)
+
+            # Get response from LLM once admitted by the scheduler
+            prompt_tokens = self._prompt_tokens(messages)
+            async with self.scheduler.slot(
+                user_id or session_id,
+                prompt_tokens + self.context.response_reserve,
+                on_position=on_queued
+            ) as ticket:
+                response = await self.gateway.ainvoke(messages, hedge_slot=lambda: self.scheduler.hedge(ticket))
+                response_text = response.content
+                self.scheduler.settle(ticket, prompt_tokens + self.context.counter.count(response_text))
 
             # Add to history
-            self._add_to_history(session_id, "user", message)
-            self._add_to_history(session_id, "assistant", response_text)
-
-            # Store in long-term memory if meaningful
-            if user_id and len(message) > 20:
-                await memory_service.store_memory(
-                    user_id=user_id,
-                    content=f"User: {message}\nAbel: {response_text[:200]}...",
-                    metadata={"session_id": session_id, "type": "conversation"},
-                    importance=0.3
-                )
+            await self._add_to_history(session_id, "user", message)
+            await self._add_to_history(session_id, "assistant", response_text)
+            self._schedule_summary(session_id, evicted)
+            self._remember(message, response_text, session_id, user_id)
+            if embedding:
+                self.cache.put(embedding, response_text, user_id, message, personalized=self.layout.personalized(messages))
 
             return response_text
 
+        except SchedulerBusy as e:
+            logger.warning(f"LLM scheduler rejected session {session_id}: {e}")
+            return BUSY_MESSAGE
+        except GatewayUnavailable as e:
+            logger.error(f"LLM unavailable for session {session_id}: {e.__cause__!r}")
+            return UNAVAILABLE_MESSAGE
         except Exception as e:
             logger.error(f"Brain processing error: {e}")
             return f"Désolé, j'ai rencontré une erreur: {str(e)}"
 
+    async def complete(
+        self,
+        message: str,
+        history: list[Turn],
+        memory: str = "",
+        key: str = "anonymous",
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> tuple[str, int, int]:
+        """Answer a message outside any session (batch jobs).
+
+        History and memory context come from the caller and nothing is
+        stored. Scheduler and gateway errors propagate so the caller can
+        retry. Returns (answer, prompt tokens, completion tokens).
+        """
+        messages, _ = self._assemble(message, history, "", memory)
+        prompt_tokens = self._prompt_tokens(messages)
+        async with self.scheduler.slot(key, prompt_tokens + self.context.response_reserve, priority) as ticket:
+            response = await self.gateway.ainvoke(messages, hedge_slot=lambda: self.scheduler.hedge(ticket))
+            completion_tokens = self.context.counter.count(response.content)
+            self.scheduler.settle(ticket, prompt_tokens + completion_tokens)
+        TOKENS.inc("prompt", amount=prompt_tokens)
+        TOKENS.inc("completion", amount=completion_tokens)
+        return response.content, prompt_tokens, completion_tokens
+
     async def stream_message(
         self,
         message: str,
         session_id: str,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        on_queued: Optional[PositionCallback] = None
     ) -> AsyncGenerator[str, None]:
-        """Stream response chunks for real-time display."""
-        try:
-            # Get relevant context from memory
-            context = ""
-            if user_id:
-                context = await memory_service.get_context_for_chat(
-                    query=message,
-                    user_id=user_id
-                )
-
-            # Build system message with context
-            system_content = ABEL_SYSTEM_PROMPT.format(
-                context=f"\nCONTEXTE MÉMOIRE:\n{context}" if context else ""
-            )
+        """Stream response chunks for real-time display.
 
-            # Get conversation history
-            history = self._get_history(session_id)
-
-            # Build messages
-            messages = [
-                SystemMessage(content=system_content),
-                *history,
-                HumanMessage(content=message)
-            ]
-
-            # Stream response from LLM
-            full_response = ""
-            async for chunk in self.llm.astream(messages):
-                if chunk.content:
-                    full_response += chunk.content
-                    yield chunk.content
+        Cache hits are replayed as chunks too, so clients see the same
+        protocol for cached and live answers. `on_queued(position)` is
+        awaited while the call waits for an LLM slot.
+        """
+        started = time.perf_counter()
+        try:
+            self.prefetch_context(session_id, message, user_id)
+            with metrics.span("cache_lookup"):
+                cached, embedding = await self._cache_lookup(message, session_id, user_id)
+            if cached is not None:
+                self.discard_prefetch(session_id)
+                for chunk in replay_chunks(cached):
+                    yield chunk
+                await self._add_to_history(session_id, "user", message)
+                await self._add_to_history(session_id, "assistant", cached)
+                TURNS.observe(time.perf_counter() - started, "cache")
+                return
+
+            with metrics.span("prompt_build"):
+                messages, evicted = await self._build_messages(message, session_id, user_id)
+
+            # Stream response from LLM once admitted by the scheduler
+            parts = []
+            prompt_tokens = self._prompt_tokens(messages)
+            completion_tokens = 0
+            queued = time.perf_counter()
+            try:
+                async with self.scheduler.slot(
+                    user_id or session_id,
+                    prompt_tokens + self.context.response_reserve,
+                    on_position=on_queued
+                ) as ticket:
+                    llm_started = first_token = time.perf_counter()
+                    metrics.stage("llm_queue", llm_started - queued)
+                    try:
+                        # Closing the upstream generator aborts the HTTP stream
+                        upstream = self.gateway.astream(messages, hedge_slot=lambda: self.scheduler.hedge(ticket))
+                        async with aclosing(upstream) as upstream:
+                            async for chunk in upstream:
+                                if chunk.content:
+                                    if not parts:
+                                        first_token = time.perf_counter()
+                                        TTFT.observe(first_token - started)
+                                        metrics.stage("llm_first_token", first_token - llm_started)
+                                    parts.append(chunk.content)
+                                    yield chunk.content
+                    finally:
+                        completion_tokens = self.context.counter.count("".join(parts))
+                        self.scheduler.settle(ticket, prompt_tokens + completion_tokens)
+                        TOKENS.inc("prompt", amount=prompt_tokens)
+                        TOKENS.inc("completion", amount=completion_tokens)
+            except (asyncio.CancelledError, GeneratorExit):
+                # Cancelled or abandoned mid-answer: keep what the user saw
+                if parts:
+                    await self._add_to_history(session_id, "user", message)
+                    await self._add_to_history(session_id, "assistant", "".join(parts) + INTERRUPTED_MARKER)
+                    logger.info(f"Generation cancelled for session {session_id} after {len(parts)} chunks")
+                raise
+            full_response = "".join(parts)
+            finished = time.perf_counter()
+            metrics.stage("llm_stream", finished - first_token, tokens=completion_tokens)
+            if parts and finished > first_token:
+                TOKEN_RATE.observe(completion_tokens / (finished - first_token))
 
             # Add to history after complete
-            self._add_to_history(session_id, "user", message)
-            self._add_to_history(session_id, "assistant", full_response)
-
+            await self._add_to_history(session_id, "user", message)
+            await self._add_to_history(session_id, "assistant", full_response)
+            self._schedule_summary(session_id, evicted)
+            self._remember(message, full_response, session_id, user_id)
+            if embedding:
+                self.cache.put(embedding, full_response, user_id, message, personalized=self.layout.personalized(messages))
+            TURNS.observe(time.perf_counter() - started, "live")
+
+        except SchedulerBusy as e:
+            logger.warning(f"LLM scheduler rejected session {session_id}: {e}")
+            yield BUSY_MESSAGE
+        except GatewayUnavailable as e:
+            logger.error(f"LLM unavailable for session {session_id}: {e.__cause__!r}")
+            yield UNAVAILABLE_MESSAGE
         except Exception as e:
             logger.error(f"Brain streaming error: {e}")
             yield f"Erreur: {str(e)}"
 
-    def clear_history(self, session_id: str):
+    async def clear_history(self, session_id: str):
         """Clear conversation history for a session."""
-        if session_id in self.conversation_history:
-            del self.conversation_history[session_id]
-            logger.info(f"History cleared for session {session_id}")
+        await self.sessions.clear(session_id)
+        logger.info(f"History cleared for session {session_id}")
+
+    async def close(self):
+        """Wait for pending summaries and release the session store."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.sessions.close()
 
 
 # Singleton instance
@@ -0,0 +1,285 @@
+"""
+A.B.E.L Memory Consolidation - Importance scoring, merging, decay and pruning
+"""
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from .gateway import gateway
+from .memory import MemoryService, memory_service
+from .memory_writer import memory_writer
+from .retrieval import decayed_importance
+from .scheduler import PRIORITY_BACKGROUND, scheduler
+
+logger = logging.getLogger("abel.consolidation")
+
+REINFORCEMENT = 0.1  # Importance gained per memory folded into another
+
+# Statements about the user worth remembering longer than small talk
+SALIENT = re.compile(
+    r"\b(je m'appelle|mon nom|j'habite|je vis|je travaille|mon (?:travail|métier|mari|fils|chien|chat)|"
+    r"ma (?:femme|fille|famille)|mes enfants|j'aime|je n'aime pas|je préfère|je déteste|anniversaire|"
+    r"allergi|souviens-toi|rappelle-toi|n'oublie pas|retiens|my name|i live|i work|i prefer|remember)",
+    re.IGNORECASE
+)
+
+MERGE_PROMPT = """Fusionne ces souvenirs d'un même utilisateur en un seul souvenir concis (2 à 3 phrases).
+Conserve les faits durables (noms, chiffres, préférences, décisions) et ignore les formules de politesse.
+
+SOUVENIRS:
+{memories}
+
+SOUVENIR FUSIONNÉ:"""
+
+ACTIONS = metrics.counter(
+    "abel_memory_consolidation_total", "Memories changed by consolidation", ("action",)
+)
+
+
+def score_importance(message: str) -> float:
+    """Heuristic importance (0-1) of a conversation turn, from the user message."""
+    salient = SALIENT.search(message) is not None
+    score = 0.3 + (0.4 if salient else 0.0)
+    if re.search(r"\d", message):
+        score += 0.05  # Dates, amounts, phone numbers...
+    score += min(len(message), 400) / 4000
+    if message.rstrip().endswith("?") and not salient:
+        score -= 0.1  # Plain questions rarely need recalling
+    return round(min(max(score, 0.1), 1.0), 2)
+
+
+@dataclass
+class Plan:
+    clusters: list[list[int]]  # Row positions, representative first
+    duplicates: list[bool]  # Cluster is near-identical (no summary needed)
+    prune: list[int]
+
+
+def plan_consolidation(
+    rows: list[dict],
+    now: float,
+    merge_threshold: float,
+    duplicate_threshold: float,
+    half_life_days: float,
+    prune_threshold: float
+) -> Plan:
+    """Group similar memories and pick the ones decayed below the floor.
+
+    Greedy clustering on cosine similarity: the most important (then
+    newest) unassigned memory takes every unassigned one within
+    `merge_threshold`. Pure NumPy, run in a worker thread.
+
+    Decay counts from a memory's last use. Memories never used since
+    access tracking began (`accessed_at` None) are never pruned, and a
+    `prune_threshold` of 0 disables pruning.
+    """
+    usable = [i for i, row in enumerate(rows) if len(row["embedding"])]
+    clusters: list[list[int]] = []
+    duplicates: list[bool] = []
+    clustered: set[int] = set()
+
+    if len(usable) > 1:
+        matrix = np.asarray([rows[i]["embedding"] for i in usable], dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        similarity = matrix @ matrix.T
+        assigned = np.zeros(len(usable), dtype=bool)
+        order = sorted(
+            range(len(usable)),
+            key=lambda k: (-rows[usable[k]]["importance"], -rows[usable[k]]["created_at"])
+        )
+        for k in order:
+            if assigned[k]:
+                continue
+            members = np.flatnonzero((similarity[k] >= merge_threshold) & ~assigned)
+            assigned[members] = True
+            if members.size < 2:
+                continue
+            members = [k] + [int(m) for m in members if m != k]
+            clusters.append([usable[m] for m in members])
+            duplicates.append(bool(similarity[k, members].min() >= duplicate_threshold))
+            clustered.update(usable[m] for m in members)
+
+    prune = [
+        i for i, row in enumerate(rows)
+        if i not in clustered and row.get("accessed_at") is not None
+        and decayed_importance(row["importance"], row["accessed_at"], now, half_life_days) < prune_threshold
+    ] if prune_threshold > 0 else []
+    return Plan(clusters, duplicates, prune)
+
+
+class MemoryConsolidator:
+    """Background job keeping each user's memory set small and relevant.
+
+    Every MEMORY_CONSOLIDATION_INTERVAL seconds it takes up to
+    MEMORY_CONSOLIDATION_USERS users (those with new memories first, then
+    everyone in turn) and processes one window of MEMORY_CONSOLIDATION_BATCH
+    memories each:
+
+    - near-identical memories are folded into one, reinforced copy;
+    - clusters of similar ones are merged into an LLM summary (background
+      priority, at most MEMORY_CONSOLIDATION_SUMMARIES per run);
+    - when MEMORY_PRUNE_THRESHOLD is set, memories whose importance,
+      halved every MEMORY_HALF_LIFE_DAYS without being recalled, fell under
+      it are deleted.
+
+    Large sets are covered over several runs, window after window.
+    """
+
+    def __init__(self, memory: Optional[MemoryService] = None, interval: Optional[float] = None):
+        self.memory = memory or memory_service
+        self.interval = interval if interval is not None else settings.MEMORY_CONSOLIDATION_INTERVAL
+        self._dirty: dict[str, None] = {}
+        self._sweep: list[str] = []
+        self._cursors: dict[str, int] = {}
+        self._summaries_left = 0
+        self._task: Optional[asyncio.Task] = None
+
+        self.runs = 0
+        self.last_run: Optional[float] = None
+        self.last_duration = 0.0
+        self.counts = {"merged": 0, "deduplicated": 0, "summarized": 0, "pruned": 0}
+
+    async def _next_users(self) -> list[str]:
+        """Users with new memories first, then a round-robin over everyone."""
+        for user_id in memory_writer.take_touched():
+            self._dirty[user_id] = None
+        users: list[str] = []
+        while self._dirty and len(users) < settings.MEMORY_CONSOLIDATION_USERS:
+            users.append(next(iter(self._dirty)))
+            del self._dirty[users[-1]]
+        if not self._sweep:
+            self._sweep = list(reversed(await self.memory.store.user_ids()))
+        while self._sweep and len(users) < settings.MEMORY_CONSOLIDATION_USERS:
+            user_id = self._sweep.pop()
+            if user_id not in users:
+                users.append(user_id)
+        return users
+
+    async def _summarize(self, user_id: str, contents: list[str]) -> Optional[str]:
+        from langchain_core.messages import HumanMessage
+        prompt = [HumanMessage(content=MERGE_PROMPT.format(
+            memories="\n".join(f"- {content}" for content in contents)
+        ))]
+        tokens = sum(len(content) for content in contents) // 3 + settings.CONTEXT_SUMMARY_TOKENS
+        async with scheduler.slot(user_id, tokens, PRIORITY_BACKGROUND):
+            response = await gateway.ainvoke(prompt, max_tokens=settings.CONTEXT_SUMMARY_TOKENS)
+        return response.content.strip() or None
+
+    async def _merge(self, user_id: str, members: list[dict], duplicate: bool):
+        """Replace a cluster with one memory (the representative or a summary)."""
+        keeper = members[0]
+        content, embedding = keeper["content"], keeper["embedding"]
+        if not duplicate:
+            if (
+                len(members) < settings.MEMORY_MERGE_MIN_CLUSTER
+                or self._summaries_left <= 0
+                or not settings.OPENAI_API_KEY
+            ):
+                return
+            self._summaries_left -= 1
+            content = await self._summarize(user_id, [m["content"] for m in members])
+            embedding = await self.memory.get_embedding(content) if content else []
+            if not embedding:
+                return
+
+        merged = sum(m["metadata"].get("merged", 1) for m in members)
+        metadata = {**keeper["metadata"], "merged": merged}
+        if not duplicate:
+            metadata["type"] = "summary"
+        importance = round(min(1.0, max(m["importance"] for m in members) + REINFORCEMENT * (len(members) - 1)), 3)
+
+        new_id = await self.memory.store.add(
+            user_id, content, np.asarray(embedding, dtype=np.float32).tolist(), metadata, importance
+        )
+        if new_id is None:
+            return
+        await self.memory.store.delete_many([m["id"] for m in members], user_id)
+        action = "deduplicated" if duplicate else "summarized"
+        self.counts[action] += 1
+        self.counts["merged"] += len(members)
+        ACTIONS.inc(action)
+        ACTIONS.inc("merged", amount=len(members))
+
+    async def consolidate_user(self, user_id: str):
+        """Process the user's next window of memories."""
+        batch = settings.MEMORY_CONSOLIDATION_BATCH
+        offset = self._cursors.pop(user_id, 0)
+        rows = await self.memory.store.scan(user_id, offset, batch)
+        if not rows:
+            return
+
+        plan = await asyncio.to_thread(
+            plan_consolidation, rows, time.time(),
+            settings.MEMORY_MERGE_THRESHOLD, settings.MEMORY_DUPLICATE_THRESHOLD,
+            settings.MEMORY_HALF_LIFE_DAYS, settings.MEMORY_PRUNE_THRESHOLD
+        )
+        removed_before = self.counts["merged"]
+        for cluster, duplicate in zip(plan.clusters, plan.duplicates):
+            await self._merge(user_id, [rows[i] for i in cluster], duplicate)
+        if plan.prune:
+            pruned = await self.memory.store.delete_many([rows[i]["id"] for i in plan.prune], user_id)
+            self.counts["pruned"] += pruned
+            ACTIONS.inc("pruned", amount=pruned)
+        if plan.clusters or plan.prune:
+            self.memory.retriever.invalidate(user_id)
+
+        if len(rows) == batch:
+            # Rows removed from this window shift the next one back
+            removed = self.counts["merged"] - removed_before + len(plan.prune)
+            self._cursors[user_id] = offset + len(rows) - removed
+
+    async def run_once(self):
+        started = time.perf_counter()
+        self._summaries_left = settings.MEMORY_CONSOLIDATION_SUMMARIES
+        users = await self._next_users()
+        for user_id in users:
+            try:
+                await self.consolidate_user(user_id)
+            except Exception as e:
+                logger.error(f"Memory consolidation failed for user {user_id}: {e}")
+        self.runs += 1
+        self.last_run = time.time()
+        self.last_duration = time.perf_counter() - started
+        if users:
+            logger.info(f"Consolidated memories of {len(users)} users in {self.last_duration:.2f}s")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Memory consolidation run failed: {e}")
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "last_run": self.last_run,
+            "last_duration_seconds": round(self.last_duration, 3),
+            "pending_users": len(self._dirty),
+            **self.counts
+        }
+
+
+# Singleton instance
+consolidator = MemoryConsolidator()
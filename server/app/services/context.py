@@ -0,0 +1,140 @@
+"""
+A.B.E.L Context Builder - Token-budgeted prompt assembly
+"""
+import logging
+from functools import lru_cache
+from typing import Callable, Optional
+
+from app.core.config import settings
+from .sessions import Turn
+
+logger = logging.getLogger("abel.context")
+
+# Tokens added by the chat format around each message
+MESSAGE_OVERHEAD = 4
+
+
+class TokenCounter:
+    """Counts tokens with tiktoken, memoised per message content.
+
+    Falls back to a ~4 characters/token estimate when tiktoken or its
+    encoding files are unavailable (e.g. offline containers). The encoding
+    may be downloaded on first load: the app calls `warm` in a thread at
+    startup so this never happens on the event loop.
+    """
+
+    def __init__(self, model: Optional[str] = None, cache_size: int = 8192):
+        self.model = model or settings.OPENAI_MODEL
+        self._encode: Optional[Callable[[str], list]] = None
+        self._loaded = False
+        self.count = lru_cache(maxsize=cache_size)(self._count)
+
+    def warm(self):
+        """Load the encoding now (blocking, possibly a download)."""
+        if not self._loaded:
+            self._load()
+
+    def _load(self):
+        self._loaded = True
+        try:
+            import tiktoken
+            try:
+                encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("cl100k_base")
+            self._encode = encoding.encode_ordinary
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable, estimating tokens: {e}")
+
+    def _count(self, text: str) -> int:
+        if not self._loaded:
+            self._load()  # Not warmed (scripts, tests)
+        if self._encode is None:
+            return (len(text) + 3) // 4
+        return len(self._encode(text))
+
+    def message(self, content: str) -> int:
+        """Tokens for one chat message including format overhead."""
+        return self.count(content) + MESSAGE_OVERHEAD
+
+
+class BuiltContext:
+    """Result of a context build."""
+
+    __slots__ = ("memory", "history", "evicted", "tokens")
+
+    def __init__(self, memory: str, history: list[Turn], evicted: int, tokens: int):
+        self.memory = memory
+        self.history = history
+        # Oldest turns that did not fit and should be folded into the summary
+        self.evicted = evicted
+        self.tokens = tokens
+
+
+class ContextBuilder:
+    """Fits system prompt + RAG context + history into a token budget.
+
+    The system prompt, rolling summary and new user message are always
+    kept. RAG context is capped at `max_memory_tokens`, then history is
+    filled newest-first with whatever budget remains; the oldest turns
+    that do not fit are reported as evicted.
+    """
+
+    def __init__(
+        self,
+        counter: Optional[TokenCounter] = None,
+        budget: Optional[int] = None,
+        response_reserve: Optional[int] = None,
+        max_memory_tokens: Optional[int] = None
+    ):
+        self.counter = counter or TokenCounter()
+        self.budget = budget or settings.CONTEXT_TOKEN_BUDGET
+        self.response_reserve = response_reserve if response_reserve is not None else settings.CONTEXT_RESPONSE_RESERVE
+        self.max_memory_tokens = max_memory_tokens if max_memory_tokens is not None else settings.CONTEXT_MAX_MEMORY_TOKENS
+
+    def fit_text(self, text: str, max_tokens: int) -> str:
+        """Drop trailing lines of text until it fits in max_tokens."""
+        if not text or self.counter.count(text) <= max_tokens:
+            return text
+        lines = text.split("\n")
+        while lines and self.counter.count("\n".join(lines)) > max_tokens:
+            lines.pop()
+        return "\n".join(lines)
+
+    def build(
+        self,
+        system_prompt: str,
+        memory: str,
+        history: list[Turn],
+        message: str,
+        summary: str = ""
+    ) -> BuiltContext:
+        count = self.counter.message
+        available = self.budget - self.response_reserve
+        available -= count(system_prompt) + count(message)
+        if summary:
+            available -= count(summary)
+
+        memory = self.fit_text(memory, min(self.max_memory_tokens, max(available, 0)))
+        if memory:
+            available -= self.counter.count(memory)
+
+        kept = 0
+        for _, content in reversed(history):
+            cost = count(content)
+            if cost > available:
+                break
+            available -= cost
+            kept += 1
+
+        evicted = len(history) - kept
+        return BuiltContext(
+            memory=memory,
+            history=history[evicted:],
+            evicted=evicted,
+            tokens=self.budget - self.response_reserve - available
+        )
+
+
+# Singleton instance
+context_builder = ContextBuilder()
@@ -0,0 +1,296 @@
+"""
+A.B.E.L Embedding Cache - Content-hash keyed LRU/TTL cache with disk tier
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger("abel.embedding_cache")
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache keyed by a hash of (model, text).
+
+    The memory tier is an LRU of float32 arrays with an optional TTL. The
+    optional disk tier appends vectors to a flat float32 file that is read
+    back through a memory map, so cached embeddings survive restarts
+    without being loaded as Python lists. When the file reaches
+    `disk_max_entries` rows it is compacted in place: expired entries go,
+    then the oldest ones, down to three quarters of the cap.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    INDEX_FILE = "index.log"
+    META_FILE = "meta.json"
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        disk_path: Optional[str] = None,
+        model: Optional[str] = None,
+        disk_max_entries: Optional[int] = None
+    ):
+        self.max_entries = max_entries if max_entries is not None else settings.EMBEDDING_CACHE_SIZE
+        self.ttl = ttl_seconds if ttl_seconds is not None else settings.EMBEDDING_CACHE_TTL
+        self.disk_path = disk_path if disk_path is not None else settings.EMBEDDING_CACHE_DIR
+        self.model = model or settings.EMBEDDING_MODEL
+        self.disk_max_entries = (
+            disk_max_entries if disk_max_entries is not None else settings.EMBEDDING_CACHE_DISK_MAX
+        )
+
+        self._memory: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self.compactions = 0
+
+        # Disk tier state
+        self._dim: Optional[int] = None
+        self._disk_index: dict[str, tuple[int, float]] = {}
+        self._disk_rows = 0
+        self._mmap: Optional[np.memmap] = None
+        self._vectors_file = None
+        self._index_file = None
+
+        if self.disk_path:
+            try:
+                self._open_disk()
+            except Exception as e:
+                logger.error(f"Embedding disk cache disabled: {e}")
+                self.disk_path = ""
+
+    def key(self, text: str) -> str:
+        """Content hash for a text under the current embedding model."""
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl > 0 and now - created_at > self.ttl
+
+    def get(self, text: str) -> Optional[list[float]]:
+        """Return the cached embedding for text, or None."""
+        key = self.key(text)
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            created_at, vector = entry
+            if not self._expired(created_at, now):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector.tolist()
+            del self._memory[key]
+
+        if self.disk_path:
+            vector, created_at = self._disk_get(key, now)
+            if vector is not None:
+                self._memory_put(key, vector, created_at)
+                self.disk_hits += 1
+                return vector.tolist()
+
+        self.misses += 1
+        return None
+
+    def put(self, text: str, embedding: list[float]):
+        """Cache an embedding in memory and, if enabled, on disk."""
+        if not embedding:
+            return
+        key = self.key(text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        now = time.time()
+
+        self._memory_put(key, vector, now)
+        if self.disk_path and key not in self._disk_index:
+            try:
+                self._disk_put(key, vector, now)
+            except Exception as e:
+                logger.error(f"Embedding disk cache write failed: {e}")
+
+    def _memory_put(self, key: str, vector: np.ndarray, created_at: float):
+        self._memory[key] = (created_at, vector)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    # ---- Disk tier -------------------------------------------------------
+
+    def _open_disk(self):
+        """Load the disk index, dropping expired entries by compaction."""
+        os.makedirs(self.disk_path, exist_ok=True)
+        meta_path = os.path.join(self.disk_path, self.META_FILE)
+        vectors_path = os.path.join(self.disk_path, self.VECTORS_FILE)
+        index_path = os.path.join(self.disk_path, self.INDEX_FILE)
+
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("model") != self.model:
+                logger.info("Embedding model changed, resetting disk cache")
+                for path in (vectors_path, index_path, meta_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+            else:
+                self._dim = meta["dim"]
+
+        if self._dim and os.path.exists(index_path):
+            row_bytes = self._dim * 4
+            self._disk_rows = os.path.getsize(vectors_path) // row_bytes if os.path.exists(vectors_path) else 0
+            now = time.time()
+            expired = 0
+            with open(index_path, encoding="utf-8") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) != 3:
+                        continue
+                    key, slot, created_at = parts[0], int(parts[1]), float(parts[2])
+                    if slot >= self._disk_rows:
+                        continue
+                    if self._expired(created_at, now):
+                        expired += 1
+                        continue
+                    self._disk_index[key] = (slot, created_at)
+            if expired:
+                self._compact()
+
+        self._open_files()
+        logger.info(f"Embedding disk cache: {len(self._disk_index)} entries in {self.disk_path}")
+
+    def _open_files(self):
+        self._vectors_file = open(os.path.join(self.disk_path, self.VECTORS_FILE), "ab")
+        self._index_file = open(os.path.join(self.disk_path, self.INDEX_FILE), "a", encoding="utf-8")
+
+    def _write_meta(self):
+        with open(os.path.join(self.disk_path, self.META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "dim": self._dim}, f)
+
+    def _map(self) -> Optional[np.memmap]:
+        """(Re)map the vectors file when rows were appended since last map."""
+        if self._disk_rows == 0:
+            return None
+        if self._mmap is None or self._mmap.shape[0] < self._disk_rows:
+            self._mmap = np.memmap(
+                os.path.join(self.disk_path, self.VECTORS_FILE),
+                dtype=np.float32,
+                mode="r",
+                shape=(self._disk_rows, self._dim)
+            )
+        return self._mmap
+
+    def _disk_get(self, key: str, now: float) -> tuple[Optional[np.ndarray], float]:
+        entry = self._disk_index.get(key)
+        if entry is None:
+            return None, 0.0
+        slot, created_at = entry
+        if self._expired(created_at, now):
+            del self._disk_index[key]
+            return None, 0.0
+        vectors = self._map()
+        if vectors is None:
+            return None, 0.0
+        return np.array(vectors[slot]), created_at
+
+    def _disk_put(self, key: str, vector: np.ndarray, created_at: float):
+        if self._vectors_file is None:
+            return
+        if self._dim is None:
+            self._dim = int(vector.shape[0])
+            self._write_meta()
+        if vector.shape[0] != self._dim:
+            return
+
+        slot = self._disk_rows
+        self._vectors_file.write(vector.tobytes())
+        self._vectors_file.flush()
+        self._index_file.write(f"{key} {slot} {created_at}\n")
+        self._index_file.flush()
+        self._disk_rows += 1
+        self._disk_index[key] = (slot, created_at)
+        if self.disk_max_entries > 0 and self._disk_rows >= self.disk_max_entries:
+            self._shrink(created_at)
+
+    def _shrink(self, now: float):
+        """Drop expired entries, then the oldest, and compact the files."""
+        index = {key: entry for key, entry in self._disk_index.items() if not self._expired(entry[1], now)}
+        keep = self.disk_max_entries * 3 // 4
+        if len(index) > keep:
+            newest = sorted(index.items(), key=lambda item: item[1][1])[len(index) - keep:]
+            self.disk_evictions += len(index) - keep
+            index = dict(newest)
+        self._disk_index = index
+
+        self.close()
+        self._compact()
+        self._open_files()
+        self.compactions += 1
+
+    def _compact(self):
+        """Rewrite the disk tier keeping only live entries.
+
+        Rows are copied in chunks into temporary files that then replace
+        the originals, so a crash mid-way leaves the old files intact.
+        """
+        vectors_path = os.path.join(self.disk_path, self.VECTORS_FILE)
+        index_path = os.path.join(self.disk_path, self.INDEX_FILE)
+        vectors = self._map()
+        items = sorted(self._disk_index.items(), key=lambda item: item[1][0])
+        slots = [slot for _, (slot, _) in items]
+
+        with open(vectors_path + ".tmp", "wb") as f:
+            for start in range(0, len(slots), 1024):
+                f.write(np.ascontiguousarray(vectors[slots[start:start + 1024]]).tobytes())
+        with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+            for new_slot, (key, (_, created_at)) in enumerate(items):
+                f.write(f"{key} {new_slot} {created_at}\n")
+        del vectors
+        self._mmap = None
+        os.replace(vectors_path + ".tmp", vectors_path)
+        os.replace(index_path + ".tmp", index_path)
+
+        self._disk_index = {
+            key: (new_slot, created_at)
+            for new_slot, (key, (_, created_at)) in enumerate(items)
+        }
+        self._disk_rows = len(items)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and tier sizes."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._disk_index),
+            "disk_evictions": self.disk_evictions,
+            "compactions": self.compactions
+        }
+
+    def clear(self):
+        """Drop the memory tier (the disk tier is left intact)."""
+        self._memory.clear()
+
+    def close(self):
+        """Close disk tier file handles."""
+        for handle in (self._vectors_file, self._index_file):
+            if handle is not None:
+                handle.close()
+        self._vectors_file = None
+        self._index_file = None
+        self._mmap = None
+
+
+# Singleton instance
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,114 @@
+"""
+A.B.E.L Embedding Service - Async OpenAI embeddings with request coalescing
+"""
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Optional
+
+from app.core.config import settings
+from .gateway import gateway
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger("abel.embeddings")
+
+
+class EmbeddingService:
+    """Coalesces concurrent embedding requests into multi-input API calls.
+
+    Calls to `embed` made within the same short window (from any session)
+    are queued and sent as a single `embeddings.create` request, so the
+    event loop never blocks and 200 concurrent chats cost a handful of
+    HTTP round-trips instead of 200.
+    """
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        max_batch_size: Optional[int] = None,
+        batch_window_ms: Optional[float] = None,
+        max_concurrency: Optional[int] = None
+    ):
+        self.model = model or settings.EMBEDDING_MODEL
+        self.max_batch_size = max_batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.batch_window = (
+            batch_window_ms if batch_window_ms is not None
+            else settings.EMBEDDING_BATCH_WINDOW_MS
+        ) / 1000
+        self._semaphore = asyncio.Semaphore(
+            max_concurrency or settings.EMBEDDING_MAX_CONCURRENCY
+        )
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        """Async OpenAI client on the gateway's shared connection pool."""
+        return gateway.openai
+
+    async def embed(self, text: str) -> list[float]:
+        """Embed a single text, sharing the API call with concurrent callers."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+
+        return await future
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """Embed several texts; they join the same coalescing window."""
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    def _flush(self):
+        """Send everything queued so far as one batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: list[tuple[str, asyncio.Future]]):
+        """Execute one multi-input embeddings request and resolve waiters."""
+        # Identical texts (e.g. repeated greetings) are only sent once
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+
+        try:
+            async with self._semaphore:
+                response = await self.client.embeddings.create(
+                    model=self.model,
+                    input=unique_texts
+                )
+            vectors = {
+                unique_texts[item.index]: item.embedding
+                for item in response.data
+            }
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(vectors.get(text, []))
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(unique_texts)} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def close(self):
+        """Flush queued requests and wait for in-flight batches."""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+# Singleton instance
+embedding_service = EmbeddingService()
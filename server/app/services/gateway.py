@@ -0,0 +1,366 @@
+"""
+A.B.E.L Provider Gateway - Pooled HTTP clients, deadlines, hedging and failover
+"""
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Callable, Optional
+
+from app.core.config import settings
+from .prompts import prefix_cache
+
+if TYPE_CHECKING:
+    import httpx
+    from langchain_openai import ChatOpenAI
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger("abel.gateway")
+
+# Reserves a slot for a hedged duplicate: returns its release callback, or None
+HedgeSlot = Callable[[], Optional[Callable[[], None]]]
+
+
+class GatewayUnavailable(Exception):
+    """Every configured model is failing or has an open circuit."""
+
+
+class CircuitBreaker:
+    """Stops calling a model after repeated failures.
+
+    Opens after `threshold` consecutive failures; after `reset_timeout`
+    seconds one trial call is let through (half-open) and its outcome
+    closes or re-opens the circuit. A call that ends without an outcome
+    (cancelled, bad request) must `release()` so another can be the trial.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def failure(self):
+        self.failures += 1
+        self._trial = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """Give back the half-open trial of a call that says nothing about the model."""
+        self._trial = False
+
+
+def _retryable(error: BaseException) -> bool:
+    """Provider-side failures worth a fallback: transport errors, timeouts,
+    429 and 5xx (not bad requests or bugs on our side)."""
+    import httpx
+    import openai
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, (
+        openai.APIConnectionError, httpx.TransportError, asyncio.TimeoutError, TimeoutError, ConnectionError
+    ))
+
+
+class ProviderGateway:
+    """Single entry point to the OpenAI-compatible provider.
+
+    All clients share one pooled (HTTP/2 when available) `httpx` client.
+    Chat calls try `OPENAI_MODEL` then `OPENAI_FALLBACK_MODELS` in order,
+    skipping models whose circuit is open. With `LLM_HEDGE_AFTER_MS` set,
+    a call that has not answered (or, when streaming, produced its first
+    token) by then is duplicated and the first reply wins; the duplicate
+    needs a slot from `hedge_slot` (the LLM scheduler), so hedging never
+    goes past the concurrency and rate limits.
+    `OPENAI_BASE_URL` points everything at another endpoint, e.g. a
+    local stub server. The SDKs are imported when a client is first built.
+    """
+
+    def __init__(
+        self,
+        models: Optional[list[str]] = None,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+        hedge_after_ms: Optional[float] = None
+    ):
+        self.models = models or settings.llm_models_list
+        self.base_url = base_url or settings.OPENAI_BASE_URL or None
+        self.timeout = timeout or settings.LLM_TIMEOUT
+        self.idle_timeout = idle_timeout or settings.LLM_STREAM_IDLE_TIMEOUT
+        self.hedge_after = (
+            hedge_after_ms if hedge_after_ms is not None else settings.LLM_HEDGE_AFTER_MS
+        ) / 1000
+        self.breakers = {
+            model: CircuitBreaker(settings.LLM_BREAKER_THRESHOLD, settings.LLM_BREAKER_RESET)
+            for model in self.models
+        }
+
+        self._http: Optional["httpx.AsyncClient"] = None
+        self._openai: Optional["AsyncOpenAI"] = None
+        self._chats: dict[str, "ChatOpenAI"] = {}
+
+        self.hedged = 0
+        self.hedges_skipped = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+
+    @property
+    def http_client(self) -> "httpx.AsyncClient":
+        """Shared connection pool for every provider call."""
+        if self._http is None:
+            import httpx
+            http2 = settings.HTTP_HTTP2
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    logger.warning("h2 not installed, using HTTP/1.1. Run: pip install h2")
+                    http2 = False
+            self._http = httpx.AsyncClient(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=settings.HTTP_CONNECT_TIMEOUT)
+            )
+        return self._http
+
+    @property
+    def openai(self) -> "AsyncOpenAI":
+        """Raw async OpenAI client on the shared pool (embeddings, TTS)."""
+        if self._openai is None:
+            from openai import AsyncOpenAI
+            self._openai = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                base_url=self.base_url,
+                http_client=self.http_client,
+                timeout=self.timeout
+            )
+        return self._openai
+
+    def chat(self, model: str) -> "ChatOpenAI":
+        """LangChain chat model on the shared pool.
+
+        SDK retries are disabled: failover and hedging happen here.
+        """
+        if model not in self._chats:
+            from langchain_openai import ChatOpenAI
+            self._chats[model] = ChatOpenAI(
+                model=model,
+                api_key=settings.OPENAI_API_KEY,
+                base_url=self.base_url,
+                temperature=0.7,
+                streaming=True,
+                stream_usage=True,  # Final chunk carries usage, incl. cached prompt tokens
+                max_retries=0,
+                timeout=self.timeout,
+                http_async_client=self.http_client
+            )
+        return self._chats[model]
+
+    def warm(self):
+        """Build the pool and clients now instead of on the first request."""
+        self.openai
+        for model in self.models:
+            self.chat(model)
+
+    def _runnable(self, model: str, bind: dict):
+        chat = self.chat(model)
+        return chat.bind(**bind) if bind else chat
+
+    def _candidates(self):
+        """Models to try, in order, whose circuit lets a call through."""
+        tried = False
+        for model in self.models:
+            # Checked lazily: allow() uses up a half-open circuit's trial call
+            if self.breakers[model].allow():
+                if tried:
+                    self.fallbacks += 1
+                tried = True
+                yield model
+
+    async def _hedged(self, attempt, discard=None, hedge_slot: Optional[HedgeSlot] = None) -> Any:
+        """Run attempt(); start a duplicate if it is slower than the hedge delay.
+
+        The duplicate only starts when `hedge_slot()` grants a slot.
+        Returns the first successful result and cancels the other call;
+        `discard(result)` is awaited for a loser that completed anyway.
+        """
+        tasks = [asyncio.create_task(attempt())]
+        winner: Optional[asyncio.Task] = None
+        release: Optional[Callable[[], None]] = None
+        try:
+            if self.hedge_after > 0 and hedge_slot is not None:
+                done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+                if not done:
+                    release = hedge_slot()
+                    if release is None:
+                        self.hedges_skipped += 1
+                    else:
+                        self.hedged += 1
+                        tasks.append(asyncio.create_task(attempt()))
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        if task is not tasks[0]:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if release is not None:
+                release()
+            if discard is not None:
+                for task in tasks:
+                    if task is not winner and not task.cancelled() and task.exception() is None:
+                        await discard(task.result())
+
+    async def ainvoke(self, messages: list, hedge_slot: Optional[HedgeSlot] = None, **bind):
+        """Complete a chat call with deadlines, hedging and failover."""
+        last_error: Optional[BaseException] = None
+        for model in self._candidates():
+            runnable = self._runnable(model, bind)
+            try:
+                result = await self._hedged(
+                    lambda: asyncio.wait_for(runnable.ainvoke(messages), self.timeout),
+                    hedge_slot=hedge_slot
+                )
+            except Exception as e:
+                if not _retryable(e):
+                    self.breakers[model].release()
+                    raise
+                self.breakers[model].failure()
+                logger.warning(f"Model {model} failed: {e!r}")
+                last_error = e
+                continue
+            except BaseException:
+                self.breakers[model].release()
+                raise
+            self.breakers[model].success()
+            prefix_cache.record(result.usage_metadata)
+            return result
+        raise GatewayUnavailable("No LLM model available") from last_error
+
+    async def _open_stream(self, runnable, messages: list):
+        """Start a stream and wait for its first chunk (within the deadline)."""
+        stream = runnable.astream(messages)
+        try:
+            first = await asyncio.wait_for(anext(stream), self.timeout)
+        except StopAsyncIteration:
+            first = None
+        except BaseException:
+            await stream.aclose()
+            raise
+        return stream, first
+
+    async def astream(self, messages: list, hedge_slot: Optional[HedgeSlot] = None, **bind) -> AsyncGenerator:
+        """Stream a chat answer with hedging and failover.
+
+        Both only apply until the first chunk: once tokens have been
+        yielded a failure is raised, since retrying would repeat text.
+        """
+        last_error: Optional[BaseException] = None
+        for model in self._candidates():
+            runnable = self._runnable(model, bind)
+            try:
+                stream, first = await self._hedged(
+                    lambda: self._open_stream(runnable, messages),
+                    discard=lambda opened: opened[0].aclose(),
+                    hedge_slot=hedge_slot
+                )
+            except Exception as e:
+                if not _retryable(e):
+                    self.breakers[model].release()
+                    raise
+                self.breakers[model].failure()
+                logger.warning(f"Model {model} failed: {e!r}")
+                last_error = e
+                continue
+            except BaseException:
+                self.breakers[model].release()
+                raise
+
+            try:
+                if first is not None:
+                    yield first
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(anext(stream), self.idle_timeout)
+                    except StopAsyncIteration:
+                        break
+                    if chunk.usage_metadata:
+                        prefix_cache.record(chunk.usage_metadata)
+                    yield chunk
+            except Exception as e:
+                if _retryable(e):
+                    self.breakers[model].failure()
+                else:
+                    self.breakers[model].release()
+                raise
+            except BaseException:
+                # Cancelled or closed by the consumer mid-answer
+                self.breakers[model].release()
+                raise
+            finally:
+                await stream.aclose()
+            self.breakers[model].success()
+            return
+        raise GatewayUnavailable("No LLM model available") from last_error
+
+    async def ping(self) -> bool:
+        """Cheap provider check for the health monitor."""
+        await self.openai.models.list(timeout=settings.HEALTH_PROBE_TIMEOUT)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "models": {model: breaker.state for model, breaker in self.breakers.items()},
+            "hedged": self.hedged,
+            "hedges_skipped": self.hedges_skipped,
+            "hedge_wins": self.hedge_wins,
+            "fallbacks": self.fallbacks,
+            "prompt_cache": prefix_cache.stats()
+        }
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+
+
+# Singleton instance
+gateway = ProviderGateway()
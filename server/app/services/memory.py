@@ -1,42 +1,93 @@
 """
-A.B.E.L Memory Service - RAG with Supabase pgvector
+A.B.E.L Memory Service - RAG with Supabase pgvector or a local vector store
 """
+import asyncio
 import logging
+import time
+from collections import OrderedDict
 from typing import Optional
-from openai import OpenAI
 
 from app.core.config import settings
-from app.core.database import get_supabase_admin
+from app.core.metrics import metrics
+from .embedding_cache import embedding_cache
+from .embeddings import embedding_service
+from .retrieval import HybridRetriever
+from .vector_store import VectorStore, create_vector_store
 
 logger = logging.getLogger("abel.memory")
 
+TOUCH_INTERVAL = 3600.0  # Record a memory's use at most once per hour
+TOUCH_TRACKED = 10000
+
+EMBEDDING_CACHE = metrics.counter(
+    "abel_embedding_cache_total", "Embedding cache lookups", ("result",)
+)
+
 
 class MemoryService:
-    """Manages long-term memory using pgvector for semantic search."""
+    """Manages long-term memory with semantic search over a vector store."""
 
-    def __init__(self):
-        self.supabase = get_supabase_admin()
-        self._openai: Optional[OpenAI] = None
+    def __init__(self, store: Optional[VectorStore] = None):
+        self._store = store
+        self.embeddings = embedding_service
+        self.embedding_cache = embedding_cache
+        self.retriever = HybridRetriever(self)
+        # memory id -> monotonic time its use was last recorded
+        self._touched: OrderedDict[str, float] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
 
     @property
-    def openai(self) -> OpenAI:
-        """Lazy load OpenAI client."""
-        if self._openai is None:
-            self._openai = OpenAI(api_key=settings.OPENAI_API_KEY)
-        return self._openai
+    def store(self) -> VectorStore:
+        """Lazy vector store (the local one loads its snapshots from disk)."""
+        if self._store is None:
+            self._store = create_vector_store()
+        return self._store
 
     async def get_embedding(self, text: str) -> list[float]:
-        """Generate embedding for text using OpenAI."""
+        """Generate embedding for text using OpenAI (non-blocking, coalesced)."""
+        if not text:
+            return []
+
+        cached = self.embedding_cache.get(text)
+        if cached is not None:
+            EMBEDDING_CACHE.inc("hit")
+            return cached
+        EMBEDDING_CACHE.inc("miss")
+
         try:
-            response = self.openai.embeddings.create(
-                model="text-embedding-3-small",
-                input=text
-            )
-            return response.data[0].embedding
+            with metrics.span("embedding"):
+                embedding = await self.embeddings.embed(text)
+            self.embedding_cache.put(text, embedding)
+            return embedding
         except Exception as e:
             logger.error(f"Embedding generation failed: {e}")
             return []
 
+    async def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Embed several texts; cache misses share one API request."""
+        results: list[list[float]] = []
+        missing: dict[str, list[int]] = {}
+        for i, text in enumerate(texts):
+            cached = self.embedding_cache.get(text) if text else []
+            results.append(cached or [])
+            if text and cached is None:
+                missing.setdefault(text, []).append(i)
+        EMBEDDING_CACHE.inc("hit", amount=len(texts) - len(missing))
+        EMBEDDING_CACHE.inc("miss", amount=len(missing))
+
+        if missing:
+            try:
+                with metrics.span("embedding_batch", size=len(missing)):
+                    embeddings = await self.embeddings.embed_many(list(missing))
+            except Exception as e:
+                logger.error(f"Batch embedding generation failed: {e}")
+                return results
+            for (text, positions), embedding in zip(missing.items(), embeddings):
+                self.embedding_cache.put(text, embedding)
+                for i in positions:
+                    results[i] = embedding
+        return results
+
     async def store_memory(
         self,
         user_id: str,
@@ -50,22 +101,45 @@ class MemoryService:
             if not embedding:
                 logger.warning("No embedding generated, storing without vector")
 
-            result = self.supabase.table("memories").insert({
-                "user_id": user_id,
-                "content": content,
-                "embedding": embedding if embedding else None,
-                "metadata": metadata or {},
-                "importance": importance
-            }).execute()
+            memory_id = await self.store.add(
+                user_id=user_id,
+                content=content,
+                embedding=embedding,
+                metadata=metadata,
+                importance=importance
+            )
 
-            if result.data:
+            if memory_id:
+                self.retriever.add(user_id, memory_id, content, metadata, importance)
                 logger.info(f"Memory stored for user {user_id}")
-                return result.data[0]["id"]
-            return None
+            return memory_id
         except Exception as e:
             logger.error(f"Failed to store memory: {e}")
             return None
 
+    async def store_memories(self, memories: list[dict]) -> list[Optional[str]]:
+        """Store several memories with one embeddings call and one insert.
+
+        Each dict holds `user_id`, `content` and optionally `metadata` and
+        `importance`. Raises on storage errors so callers can retry.
+        """
+        embeddings = await self.get_embeddings([m["content"] for m in memories])
+        rows = [
+            {
+                "user_id": m["user_id"],
+                "content": m["content"],
+                "embedding": embedding,
+                "metadata": m.get("metadata"),
+                "importance": m.get("importance", 0.5)
+            }
+            for m, embedding in zip(memories, embeddings)
+        ]
+        ids = await self.store.add_many(rows)
+        for row, memory_id in zip(rows, ids):
+            self.retriever.add(row["user_id"], memory_id, row["content"], row["metadata"], row["importance"])
+        logger.info(f"Stored {sum(1 for i in ids if i)}/{len(rows)} memories")
+        return ids
+
     async def search_memories(
         self,
         query: str,
@@ -79,15 +153,13 @@ class MemoryService:
             if not embedding:
                 return []
 
-            # Call the search_memories function in Supabase
-            result = self.supabase.rpc("search_memories", {
-                "query_embedding": embedding,
-                "match_threshold": threshold,
-                "match_count": limit,
-                "p_user_id": user_id
-            }).execute()
-
-            return result.data if result.data else []
+            with metrics.span("memory_search", backend=self.store.name):
+                return await self.store.search(
+                    embedding=embedding,
+                    user_id=user_id,
+                    threshold=threshold,
+                    limit=limit
+                )
         except Exception as e:
             logger.error(f"Memory search failed: {e}")
             return []
@@ -99,14 +171,22 @@ class MemoryService:
         max_memories: int = 3
     ) -> str:
         """Get relevant context for chat based on query."""
-        memories = await self.search_memories(
-            query=query,
-            user_id=user_id,
-            limit=max_memories
-        )
+        if settings.RETRIEVAL_HYBRID:
+            try:
+                memories = await self.retriever.retrieve(query, user_id, max_memories)
+            except Exception as e:
+                logger.error(f"Hybrid retrieval failed: {e}")
+                memories = []
+        else:
+            memories = await self.search_memories(
+                query=query,
+                user_id=user_id,
+                limit=max_memories
+            )
 
         if not memories:
             return ""
+        self._touch(user_id, memories)
 
         context_parts = []
         for memory in memories:
@@ -114,6 +194,44 @@ class MemoryService:
 
         return "Contexte pertinent des conversations précédentes:\n" + "\n".join(context_parts)
 
+    def _touch(self, user_id: str, memories: list[dict]):
+        """Record in the background that recalled memories were used.
+
+        Decay (and so pruning) counts from the last use: memories that keep
+        being recalled stay.
+        """
+        now = time.monotonic()
+        ids = []
+        for memory in memories:
+            memory_id = str(memory.get("id") or "")
+            last = self._touched.get(memory_id)
+            if memory_id and (last is None or now - last > TOUCH_INTERVAL):
+                ids.append(memory_id)
+                self._touched[memory_id] = now
+                self._touched.move_to_end(memory_id)
+        while len(self._touched) > TOUCH_TRACKED:
+            self._touched.popitem(last=False)
+        if ids:
+            self.retriever.touch(user_id, ids)
+            task = asyncio.create_task(self._record_touch(ids, user_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _record_touch(self, memory_ids: list[str], user_id: str):
+        try:
+            await self.store.touch(memory_ids, user_id)
+        except Exception as e:
+            logger.warning(f"Failed to record memory use: {e}")
+
+    async def close(self):
+        """Persist local state and release clients on shutdown."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.embeddings.close()
+        if self._store is not None:
+            await self._store.close()
+        self.embedding_cache.close()
+
 
 # Singleton instance
 memory_service = MemoryService()
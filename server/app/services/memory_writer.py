@@ -0,0 +1,217 @@
+"""
+A.B.E.L Memory Writer - Write-behind queue for long-term memory storage
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from .memory import MemoryService, memory_service
+
+logger = logging.getLogger("abel.memory_writer")
+
+
+@dataclass
+class PendingMemory:
+    user_id: str
+    content: str
+    metadata: dict = field(default_factory=dict)
+    importance: float = 0.5
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> dict:
+        return {
+            "user_id": self.user_id,
+            "content": self.content,
+            "metadata": self.metadata,
+            "importance": self.importance
+        }
+
+
+class MemoryWriter:
+    """Persists memories in the background so replies never wait on storage.
+
+    `enqueue` is synchronous and O(1). A single worker drains the queue in
+    batches (one embeddings call + one multi-row insert per batch), retries
+    failed batches with exponential backoff, and flushes what is left on
+    shutdown.
+    """
+
+    def __init__(
+        self,
+        memory: Optional[MemoryService] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        max_queue: Optional[int] = None
+    ):
+        self.memory = memory or memory_service
+        self.batch_size = batch_size or settings.MEMORY_WRITE_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else settings.MEMORY_WRITE_FLUSH_INTERVAL
+        self.max_retries = max_retries if max_retries is not None else settings.MEMORY_WRITE_MAX_RETRIES
+        self.max_queue = max_queue or settings.MEMORY_WRITE_MAX_QUEUE
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._gathering: list[PendingMemory] = []
+        self._writing: Optional[asyncio.Future] = None
+        self._stopping = False
+        # Users with memories written since the consolidation job last looked
+        self._touched: set[str] = set()
+
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.retries = 0
+        self.batches = 0
+        self.last_latency = 0.0
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        return self._queue
+
+    def start(self):
+        """Start the background worker (idempotent)."""
+        if self._worker is None or self._worker.done():
+            self._stopping = False
+            self._worker = asyncio.create_task(self._run())
+            logger.info("Memory write-behind queue started")
+
+    def enqueue(
+        self,
+        user_id: str,
+        content: str,
+        metadata: Optional[dict] = None,
+        importance: float = 0.5
+    ) -> bool:
+        """Queue a memory for storage; returns False if it was dropped."""
+        if self._stopping:
+            self.dropped += 1
+            return False
+        try:
+            self.queue.put_nowait(PendingMemory(user_id, content, metadata or {}, importance))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("Memory queue full, dropping memory")
+            return False
+
+        self.enqueued += 1
+        self.start()
+        return True
+
+    async def _next_batch(self) -> list[PendingMemory]:
+        """Wait for one item, then gather more until full or the window ends.
+
+        Items are collected in `_gathering` so `stop` can still flush them
+        if the worker is cancelled mid-window.
+        """
+        self._gathering = batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        self._gathering = []
+        return batch
+
+    def _drain_all(self) -> list[PendingMemory]:
+        items = []
+        while not self.queue.empty():
+            items.append(self.queue.get_nowait())
+        return items
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            # Shielded so a shutdown never interrupts a half-done insert
+            self._writing = asyncio.ensure_future(self._write(batch))
+            await asyncio.shield(self._writing)
+
+    async def _write(self, batch: list[PendingMemory]):
+        """Store a batch, retrying with exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.memory.store_memories([item.as_dict() for item in batch])
+                self._touched.update(item.user_id for item in batch)
+                self.written += len(batch)
+                self.batches += 1
+                self.last_latency = time.monotonic() - batch[0].enqueued_at
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.failed += len(batch)
+                    logger.error(f"Dropping {len(batch)} memories after {attempt + 1} attempts: {e}")
+                    return
+                self.retries += 1
+                delay = min(0.5 * 2 ** attempt, 30.0)
+                logger.warning(f"Memory batch failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop the worker and flush queued memories within timeout."""
+        self._stopping = True
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        leftover, self._gathering = self._gathering, []
+        if self._queue is not None:
+            leftover.extend(self._drain_all())
+        if not leftover and (self._writing is None or self._writing.done()):
+            return
+        logger.info(f"Flushing {len(leftover)} queued memories...")
+
+        async def flush():
+            if self._writing is not None:
+                await self._writing
+            for start in range(0, len(leftover), self.batch_size):
+                await self._write(leftover[start:start + self.batch_size])
+
+        try:
+            await asyncio.wait_for(flush(), timeout)
+        except asyncio.TimeoutError:
+            lost = self.enqueued - self.written - self.failed
+            self.failed += lost
+            logger.error(f"Memory flush timed out, {lost} memories not stored")
+
+    def take_touched(self) -> set[str]:
+        """Users written to since the last call."""
+        touched, self._touched = self._touched, set()
+        return touched
+
+    def stats(self) -> dict:
+        """Queue depth and throughput counters."""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight": self.enqueued - self.written - self.failed - (self._queue.qsize() if self._queue is not None else 0),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "retries": self.retries,
+            "batches": self.batches,
+            "last_latency_seconds": round(self.last_latency, 3)
+        }
+
+
+# Singleton instance
+memory_writer = MemoryWriter()
+
+metrics.gauge(
+    "abel_memory_queue_depth", "Memories waiting to be written",
+    lambda: memory_writer.stats()["queue_depth"]
+)
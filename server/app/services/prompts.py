@@ -0,0 +1,138 @@
+"""
+A.B.E.L Prompts - Cache-friendly message layout and provider prefix cache accounting
+"""
+from typing import TYPE_CHECKING, Optional
+
+from app.core.metrics import metrics
+from .sessions import ROLE_USER, Turn
+
+if TYPE_CHECKING:
+    from langchain_core.messages import SystemMessage
+
+PROMPT_TOKENS = metrics.counter(
+    "abel_llm_prompt_tokens_total", "Prompt tokens reported by the provider", ("cache",)
+)
+
+
+ABEL_SYSTEM_PROMPT = """Tu es A.B.E.L (Adam Beloucif Est Là), un assistant personnel intelligent avec une personnalité unique.
+
+PERSONNALITÉ:
+- Tu es professionnel mais amical, avec un léger côté cyberpunk
+- Tu réponds toujours en français sauf si l'utilisateur te parle dans une autre langue
+- Tu es proactif et anticipe les besoins de l'utilisateur
+- Tu as accès à plus de 1400 APIs publiques pour aider l'utilisateur
+
+CAPACITÉS:
+- Chat conversationnel intelligent
+- Recherche d'informations via APIs publiques
+- Gestion de la mémoire à long terme (RAG)
+- Synthèse vocale (TTS)
+
+RÈGLES:
+- Sois concis mais informatif
+- Utilise des emojis avec parcimonie pour ajouter de la personnalité
+- Si tu ne sais pas quelque chose, admets-le honnêtement
+- Rappelle-toi du contexte des conversations précédentes quand c'est pertinent"""
+
+
+class PromptLayout:
+    """Orders prompt messages from the most to the least stable.
+
+    Providers reuse the longest prompt prefix they have already seen
+    (OpenAI: prompts of 1024+ tokens, in 128-token steps), so anything
+    that changes every turn must come last:
+
+    1. persona and rules: one SystemMessage built once and shared by every
+       request, byte for byte;
+    2. the rolling summary, which only changes when history is folded;
+    3. the history, append-only within a session;
+    4. the retrieved memory, different for each message;
+    5. the user message.
+
+    LangChain message classes are imported on first use, not at startup.
+    """
+
+    def __init__(self, system_prompt: str = ABEL_SYSTEM_PROMPT):
+        self.system_prompt = system_prompt
+        self._system: Optional["SystemMessage"] = None
+
+    @property
+    def system(self) -> "SystemMessage":
+        if self._system is None:
+            from langchain_core.messages import SystemMessage
+            self._system = SystemMessage(content=self.system_prompt)
+        return self._system
+
+    @staticmethod
+    def history(turns: list[Turn]) -> list:
+        from langchain_core.messages import AIMessage, HumanMessage
+        return [
+            HumanMessage(content=content) if role == ROLE_USER else AIMessage(content=content)
+            for role, content in turns
+        ]
+
+    def messages(self, message: str, history: list[Turn], summary: Optional[str] = None, memory: str = "") -> list:
+        from langchain_core.messages import HumanMessage, SystemMessage
+        messages = [self.system]
+        if summary:
+            messages.append(SystemMessage(content=f"RÉSUMÉ DE LA CONVERSATION:\n{summary}"))
+        messages.extend(self.history(history))
+        if memory:
+            messages.append(SystemMessage(content=f"CONTEXTE MÉMOIRE:\n{memory}"))
+        messages.append(HumanMessage(content=message))
+        return messages
+
+    @staticmethod
+    def personalized(messages: list) -> bool:
+        """Whether a prompt carries more than persona and question (summary, history or memory)."""
+        return len(messages) > 2
+
+
+class PrefixCacheStats:
+    """Prompt tokens served from the provider's prefix cache.
+
+    Fed with LangChain `usage_metadata` (streamed answers need
+    `stream_usage`); providers that report no cache details count as misses.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, usage: Optional[dict]):
+        if not usage:
+            return
+        prompt = usage.get("input_tokens", 0)
+        cached = (usage.get("input_token_details") or {}).get("cache_read") or 0
+        self.calls += 1
+        self.hits += cached > 0
+        self.prompt_tokens += prompt
+        self.cached_tokens += cached
+        PROMPT_TOKENS.inc("hit", amount=cached)
+        PROMPT_TOKENS.inc("miss", amount=prompt - cached)
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of prompt tokens read from the cache."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "calls_with_hit": self.hits,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "hit_ratio": round(self.hit_ratio, 3)
+        }
+
+
+# Singleton instances
+prompt_layout = PromptLayout()
+prefix_cache = PrefixCacheStats()
+
+metrics.gauge(
+    "abel_llm_prompt_cache_hit_ratio", "Share of prompt tokens served from the provider prefix cache",
+    lambda: prefix_cache.hit_ratio
+)
@@ -0,0 +1,170 @@
+"""
+A.B.E.L Response Cache - Semantic cache of answers keyed by query embedding
+"""
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from .vector_store import UserVectors
+
+logger = logging.getLogger("abel.response_cache")
+
+
+class SemanticCache:
+    """Reuses answers for near-identical questions.
+
+    Query embeddings are kept as unit vectors in one matrix per scope (a
+    user_id, or "global" when answers are shared between users), so a
+    lookup is one matrix-vector product. Entries expire after `ttl`
+    seconds and the least recently used ones are evicted past
+    `max_entries` (across all scopes). The global scope only keeps
+    answers built from the question alone: one that used a user's memory
+    or conversation is never replayed to someone else.
+    """
+
+    GLOBAL_SCOPE = "global"
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        scope: Optional[str] = None
+    ):
+        self.threshold = threshold if threshold is not None else settings.RESPONSE_CACHE_THRESHOLD
+        self.ttl = ttl if ttl is not None else settings.RESPONSE_CACHE_TTL
+        self.max_entries = max_entries or settings.RESPONSE_CACHE_MAX_ENTRIES
+        self.scope = scope or settings.RESPONSE_CACHE_SCOPE
+
+        self._scopes: dict[str, UserVectors] = {}
+        # (scope, entry id) in least-recently-used order
+        self._lru: OrderedDict[tuple[str, str], None] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _scope_key(self, user_id: Optional[str]) -> str:
+        if self.scope == "user" and user_id:
+            return user_id
+        return self.GLOBAL_SCOPE
+
+    @staticmethod
+    def _normalize(embedding: list[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+
+    def get(self, embedding: list[float], user_id: Optional[str] = None) -> Optional[str]:
+        """Cached answer for a query embedding, or None."""
+        query = self._normalize(embedding) if embedding else None
+        scope = self._scope_key(user_id)
+        entries = self._scopes.get(scope)
+        if query is None or entries is None or entries.dim != query.shape[0]:
+            self.misses += 1
+            return None
+
+        now = time.time()
+        answer: Optional[str] = None
+        expired: list[str] = []
+        for row, _ in entries.top_k(query, 3, self.threshold):
+            entry_id = entries.ids[row]
+            if self.ttl > 0 and now - entries.created_at[row] > self.ttl:
+                expired.append(entry_id)
+                continue
+            self._lru.move_to_end((scope, entry_id))
+            answer = entries.contents[row]
+            break
+
+        # Removing swaps rows around, so only once the ranked rows are read
+        for entry_id in expired:
+            self._remove(scope, entry_id)
+        if answer is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return answer
+
+    def put(
+        self,
+        embedding: list[float],
+        answer: str,
+        user_id: Optional[str] = None,
+        query: str = "",
+        personalized: bool = False
+    ):
+        """Cache an answer for a query embedding.
+
+        `personalized`: the prompt carried memory, summary or history.
+        """
+        vector = self._normalize(embedding) if embedding else None
+        if vector is None or not answer:
+            return
+        scope = self._scope_key(user_id)
+        if personalized and scope == self.GLOBAL_SCOPE:
+            return
+        entries = self._scopes.get(scope)
+        if entries is None:
+            entries = self._scopes[scope] = UserVectors(dim=vector.shape[0], capacity=16)
+        if entries.dim != vector.shape[0]:
+            return
+
+        entry_id = uuid.uuid4().hex
+        entries.append(entry_id, vector, answer, {"query": query}, 0.0, time.time())
+        self._lru[(scope, entry_id)] = None
+
+        while len(self._lru) > self.max_entries:
+            (old_scope, old_id), _ = self._lru.popitem(last=False)
+            self._remove(old_scope, old_id)
+
+    def _remove(self, scope: str, entry_id: str):
+        self._lru.pop((scope, entry_id), None)
+        entries = self._scopes.get(scope)
+        if entries is None:
+            return
+        entries.remove(entry_id)
+        if entries.size == 0:
+            del self._scopes[scope]
+
+    def clear(self, user_id: Optional[str] = None):
+        """Drop a user's scope, or everything when user_id is None."""
+        if user_id is None:
+            self._scopes.clear()
+            self._lru.clear()
+            return
+        scope = self._scope_key(user_id)
+        entries = self._scopes.pop(scope, None)
+        if entries is not None:
+            for entry_id in entries.ids:
+                self._lru.pop((scope, entry_id), None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._lru),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+
+def replay_chunks(answer: str, size: int = 24) -> list[str]:
+    """Split a cached answer into stream-sized chunks on word boundaries."""
+    chunks = []
+    start = 0
+    while start < len(answer):
+        end = min(start + size, len(answer))
+        if end < len(answer):
+            space = answer.rfind(" ", start, end)
+            if space > start:
+                end = space + 1
+        chunks.append(answer[start:end])
+        start = end
+    return chunks
+
+
+# Singleton instance
+response_cache = SemanticCache()
@@ -0,0 +1,372 @@
+"""
+A.B.E.L Retrieval - Hybrid BM25 + vector memory search with reranking and MMR
+"""
+import asyncio
+import logging
+import math
+import re
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+if TYPE_CHECKING:
+    from .memory import MemoryService
+
+logger = logging.getLogger("abel.retrieval")
+
+DAY = 86400.0
+RRF_K = 60
+BM25_K1 = 1.2
+BM25_B = 0.75
+DEFAULT_IMPORTANCE = 0.3
+
+# Reranker feature weights (vector similarity, BM25, query coverage, importance)
+RERANK_WEIGHTS = (0.45, 0.25, 0.2, 0.1)
+EXACT_MATCH_BOOST = 0.1  # Numbers and names from the query found verbatim
+
+STOPWORDS = frozenset((
+    "au", "aux", "avec", "ce", "ces", "cette", "dans", "de", "des", "du", "elle", "en", "est", "et",
+    "il", "je", "la", "le", "les", "leur", "lui", "ma", "me", "mes", "moi", "mon", "ne", "nous", "on",
+    "ou", "par", "pas", "pour", "qu", "que", "qui", "sa", "se", "ses", "son", "sur", "ta", "te", "tes",
+    "toi", "ton", "tu", "un", "une", "vos", "votre", "vous", "abel", "user",
+    "a", "an", "and", "are", "is", "it", "of", "the", "to", "you"
+))
+
+BUDGET_EXCEEDED = metrics.counter(
+    "abel_retrieval_budget_exceeded_total", "Retrieval stages cut short by their budget", ("stage",)
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase, accent-free word tokens; numbers are kept whatever their length."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return [
+        t for t in re.findall(r"[a-z0-9]+", folded)
+        if (len(t) > 1 or t.isdigit()) and t not in STOPWORDS
+    ]
+
+
+def exact_terms(query: str) -> set[str]:
+    """Query terms that must match as typed: numbers and capitalised names."""
+    return {t for word in re.findall(r"\w+", query) if word[0].isupper() or word.isdigit() for t in tokenize(word)}
+
+
+def decayed_importance(importance: float, since: float, now: float, half_life_days: float) -> float:
+    """Importance halved every `half_life_days` since `since` (last use or storage)."""
+    if half_life_days <= 0:
+        return importance
+    return importance * 0.5 ** (max(now - since, 0.0) / (half_life_days * DAY))
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(count * b.get(term, 0) for term, count in a.items())
+    if not dot:
+        return 0.0
+    return dot / math.sqrt(sum(c * c for c in a.values()) * sum(c * c for c in b.values()))
+
+
+class Document:
+    __slots__ = ("id", "content", "metadata", "importance", "created_at", "accessed_at", "terms", "length")
+
+    def __init__(
+        self,
+        memory_id: str,
+        content: str,
+        metadata: dict,
+        importance: float,
+        created_at: float,
+        accessed_at: Optional[float] = None
+    ):
+        self.id = memory_id
+        self.content = content
+        self.metadata = metadata or {}
+        self.importance = importance
+        self.created_at = created_at
+        # Importance decays from the last use, as in consolidation
+        self.accessed_at = accessed_at or created_at
+        self.terms = Counter(tokenize(content))
+        self.length = sum(self.terms.values())
+
+
+class Lexicon:
+    """BM25 inverted index over one user's memories."""
+
+    def __init__(self):
+        self.docs: dict[str, Document] = {}
+        self.postings: dict[str, set[str]] = {}
+        self.total_length = 0
+        self.loaded_at = time.monotonic()
+
+    def add(self, doc: Document):
+        if doc.id in self.docs:
+            self.remove(doc.id)
+        self.docs[doc.id] = doc
+        self.total_length += doc.length
+        for term in doc.terms:
+            self.postings.setdefault(term, set()).add(doc.id)
+
+    def remove(self, memory_id: str):
+        doc = self.docs.pop(memory_id, None)
+        if doc is None:
+            return
+        self.total_length -= doc.length
+        for term in doc.terms:
+            ids = self.postings.get(term)
+            if ids is not None:
+                ids.discard(memory_id)
+                if not ids:
+                    del self.postings[term]
+
+    def search(self, terms: list[str], limit: int, deadline: float) -> list[tuple[str, float]]:
+        """(memory id, BM25 score) best first; stops adding terms past the deadline."""
+        if not self.docs:
+            return []
+        count = len(self.docs)
+        average = self.total_length / count or 1.0
+        scores: dict[str, float] = {}
+        for term in dict.fromkeys(terms):
+            if time.perf_counter() > deadline:
+                BUDGET_EXCEEDED.inc("lexical")
+                break
+            ids = self.postings.get(term)
+            if not ids:
+                continue
+            idf = math.log(1 + (count - len(ids) + 0.5) / (len(ids) + 0.5))
+            for memory_id in ids:
+                doc = self.docs[memory_id]
+                tf = doc.terms[term]
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * doc.length / average)
+                scores[memory_id] = scores.get(memory_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+        return sorted(scores.items(), key=lambda item: -item[1])[:limit]
+
+
+class HybridRetriever:
+    """Memory retrieval combining exact-term and semantic matches.
+
+    The vector search (embedding + store query, bounded by
+    RETRIEVAL_VECTOR_BUDGET_MS) and a BM25 search over the user's memories
+    run side by side; their rankings are merged with reciprocal rank
+    fusion. An optional local reranker then blends vector similarity,
+    BM25, query-term coverage and decayed importance, and MMR picks a
+    diverse final set among those scoring at least RETRIEVAL_MIN_SCORE.
+    Reranking and MMR share RETRIEVAL_RERANK_BUDGET_MS; past it the fused
+    order is kept.
+
+    Per-user BM25 indexes are loaded from the store on first use (the
+    query meanwhile runs vector-only), updated in place on writes, and
+    rebuilt after RETRIEVAL_LEXICAL_TTL seconds or an `invalidate`.
+    At most RETRIEVAL_LEXICAL_USERS indexes are kept (LRU).
+    """
+
+    def __init__(self, memory: "MemoryService"):
+        self.memory = memory
+        self._lexicons: OrderedDict[str, Lexicon] = OrderedDict()
+        self._loading: dict[str, asyncio.Task] = {}
+
+    # ---- Lexical index ----
+
+    def _lexicon(self, user_id: str) -> Optional[Lexicon]:
+        """The user's index, scheduling a (re)load when missing or stale."""
+        lexicon = self._lexicons.get(user_id)
+        if lexicon is not None:
+            self._lexicons.move_to_end(user_id)
+        stale = lexicon is None or time.monotonic() - lexicon.loaded_at > settings.RETRIEVAL_LEXICAL_TTL
+        if stale and user_id not in self._loading:
+            task = asyncio.create_task(self._load(user_id))
+            self._loading[user_id] = task
+            task.add_done_callback(lambda _: self._loading.pop(user_id, None))
+        return lexicon
+
+    async def _load(self, user_id: str):
+        try:
+            lexicon = Lexicon()
+            page = settings.MEMORY_CONSOLIDATION_BATCH
+            offset = 0
+            while offset < settings.RETRIEVAL_LEXICAL_MAX_DOCS:
+                rows = await self.memory.store.scan(user_id, offset, page, with_embedding=False)
+                for row in rows:
+                    lexicon.add(Document(
+                        row["id"], row["content"], row.get("metadata"),
+                        row.get("importance", DEFAULT_IMPORTANCE), row.get("created_at", time.time()),
+                        row.get("accessed_at")
+                    ))
+                offset += len(rows)
+                if len(rows) < page:
+                    break
+            self._lexicons[user_id] = lexicon
+            self._lexicons.move_to_end(user_id)
+            while len(self._lexicons) > settings.RETRIEVAL_LEXICAL_USERS:
+                self._lexicons.popitem(last=False)
+        except NotImplementedError:
+            pass
+        except Exception as e:
+            logger.warning(f"Lexical index load failed for user {user_id}: {e}")
+
+    def add(self, user_id: str, memory_id: Optional[str], content: str, metadata: Optional[dict], importance: float):
+        """Index a memory just stored (users without a loaded index are skipped)."""
+        lexicon = self._lexicons.get(user_id)
+        if lexicon is not None and memory_id:
+            lexicon.add(Document(memory_id, content, metadata, importance, time.time()))
+
+    def touch(self, user_id: str, memory_ids: list[str]):
+        """Restart the decay of memories just recalled (loaded index only)."""
+        lexicon = self._lexicons.get(user_id)
+        if lexicon is None:
+            return
+        now = time.time()
+        for memory_id in memory_ids:
+            doc = lexicon.docs.get(memory_id)
+            if doc is not None:
+                doc.accessed_at = now
+
+    def invalidate(self, user_id: str):
+        """Forget the user's index after bulk changes (rebuilt on next query)."""
+        self._lexicons.pop(user_id, None)
+
+    # ---- Stages ----
+
+    async def _vector(self, query: str, user_id: str) -> list[dict]:
+        with metrics.span("retrieval_vector"):
+            embedding = await self.memory.get_embedding(query)
+            if not embedding:
+                return []
+            return await self.memory.store.search(
+                embedding=embedding,
+                user_id=user_id,
+                threshold=settings.RETRIEVAL_VECTOR_THRESHOLD,
+                limit=settings.RETRIEVAL_CANDIDATES
+            )
+
+    def _rerank(self, candidates: dict[str, dict], query_terms: list[str], exact: set[str], deadline: float) -> bool:
+        """Blend features into each candidate's `rerank` score; False if cut short."""
+        w_vector, w_lexical, w_coverage, w_importance = RERANK_WEIGHTS
+        top_bm25 = max((c["bm25"] for c in candidates.values()), default=0.0) or 1.0
+        unique_terms = set(query_terms)
+        now = time.time()
+        for candidate in candidates.values():
+            if time.perf_counter() > deadline:
+                BUDGET_EXCEEDED.inc("rerank")
+                return False
+            terms = candidate["terms"]
+            coverage = len(unique_terms & terms.keys()) / len(unique_terms) if unique_terms else 0.0
+            importance = decayed_importance(
+                candidate["importance"], candidate["accessed_at"], now, settings.MEMORY_HALF_LIFE_DAYS
+            )
+            candidate["rerank"] = (
+                w_vector * candidate["similarity"]
+                + w_lexical * candidate["bm25"] / top_bm25
+                + w_coverage * coverage
+                + w_importance * importance
+                + (EXACT_MATCH_BOOST if exact and exact <= terms.keys() else 0.0)
+            )
+        return True
+
+    @staticmethod
+    def _mmr(ranked: list[dict], limit: int, diversity: float, deadline: float) -> list[dict]:
+        """Maximal marginal relevance: relevant but not redundant."""
+        if len(ranked) <= limit:
+            return ranked
+        top = ranked[0]["score"] or 1.0
+        selected = [ranked[0]]
+        remaining = ranked[1:]
+        while remaining and len(selected) < limit:
+            if time.perf_counter() > deadline:
+                BUDGET_EXCEEDED.inc("mmr")
+                return selected + remaining[:limit - len(selected)]
+            best = max(
+                remaining,
+                key=lambda c: diversity * c["score"] / top
+                - (1 - diversity) * max(_cosine(c["terms"], s["terms"]) for s in selected)
+            )
+            selected.append(best)
+            remaining.remove(best)
+        return selected
+
+    # ---- Query ----
+
+    async def retrieve(self, query: str, user_id: Optional[str], limit: int = 3) -> list[dict]:
+        """Best `limit` memories for the query, each with `id`, `content`,
+        `metadata`, `similarity` (vector, 0 if lexical only) and `score`.
+        """
+        vector_task = asyncio.create_task(self._vector(query, user_id))
+
+        query_terms = tokenize(query)
+        lexical: list[tuple[str, float]] = []
+        lexicon = self._lexicon(user_id) if user_id else None
+        if lexicon is not None and query_terms:
+            with metrics.span("retrieval_lexical"):
+                deadline = time.perf_counter() + settings.RETRIEVAL_LEXICAL_BUDGET_MS / 1000
+                lexical = lexicon.search(query_terms, settings.RETRIEVAL_CANDIDATES, deadline)
+
+        try:
+            vector = await asyncio.wait_for(vector_task, settings.RETRIEVAL_VECTOR_BUDGET_MS / 1000)
+        except asyncio.TimeoutError:
+            BUDGET_EXCEEDED.inc("vector")
+            vector = []
+        except Exception as e:
+            logger.error(f"Vector retrieval failed: {e}")
+            vector = []
+
+        # Reciprocal rank fusion keyed by memory id
+        candidates: dict[str, dict] = {}
+
+        def candidate(memory_id: str, content: str, metadata: Optional[dict]) -> dict:
+            if memory_id not in candidates:
+                doc = lexicon.docs.get(memory_id) if lexicon is not None else None
+                candidates[memory_id] = {
+                    "id": memory_id,
+                    "content": content,
+                    "metadata": metadata or {},
+                    "similarity": 0.0,
+                    "bm25": 0.0,
+                    "rrf": 0.0,
+                    "terms": doc.terms if doc else Counter(tokenize(content)),
+                    "importance": doc.importance if doc else DEFAULT_IMPORTANCE,
+                    "accessed_at": doc.accessed_at if doc else time.time()
+                }
+            return candidates[memory_id]
+
+        for rank, row in enumerate(vector):
+            entry = candidate(str(row["id"]), row["content"], row.get("metadata"))
+            entry["similarity"] = row.get("similarity", 0.0)
+            entry["rrf"] += 1 / (RRF_K + rank + 1)
+        for rank, (memory_id, score) in enumerate(lexical):
+            doc = lexicon.docs[memory_id]
+            entry = candidate(memory_id, doc.content, doc.metadata)
+            entry["bm25"] = score
+            entry["rrf"] += 1 / (RRF_K + rank + 1)
+        if not candidates:
+            return []
+
+        with metrics.span("retrieval_rerank", candidates=len(candidates)):
+            deadline = time.perf_counter() + settings.RETRIEVAL_RERANK_BUDGET_MS / 1000
+            # Scores stay on one scale: reranked for all, or fused for all
+            reranked = settings.RETRIEVAL_RERANK and self._rerank(
+                candidates, query_terms, exact_terms(query), deadline
+            )
+            for entry in candidates.values():
+                entry["score"] = entry["rerank"] if reranked else entry["rrf"]
+            ranked = sorted(candidates.values(), key=lambda c: -c["score"])
+            if reranked:
+                ranked = [c for c in ranked if c["score"] >= settings.RETRIEVAL_MIN_SCORE]
+            selected = self._mmr(ranked, limit, settings.RETRIEVAL_MMR_LAMBDA, deadline)
+
+        return [
+            {
+                "id": c["id"],
+                "content": c["content"],
+                "metadata": c["metadata"],
+                "similarity": c["similarity"],
+                "score": round(c["score"], 4)
+            }
+            for c in selected[:limit]
+        ]
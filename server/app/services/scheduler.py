@@ -0,0 +1,264 @@
+"""
+A.B.E.L LLM Scheduler - Fair, rate-limited admission of LLM calls
+"""
+import asyncio
+import bisect
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger("abel.scheduler")
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+PositionCallback = Callable[[int], Awaitable[None]]
+
+
+class SchedulerBusy(Exception):
+    """The queue is full or the wait exceeded LLM_QUEUE_TIMEOUT."""
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, up to one minute of burst.
+
+    A rate of 0 disables the bucket. The level may go negative when a
+    call used more than it reserved; later calls then wait it out.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 = now)."""
+        if not self.rate:
+            return 0.0
+        self._refill()
+        # A single request larger than the bucket only waits for a full bucket
+        missing = min(amount, self.capacity) - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float):
+        if self.rate:
+            self._refill()
+            self.level -= amount
+
+    def give(self, amount: float):
+        if self.rate:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class Ticket:
+    """A queued or admitted LLM call."""
+
+    __slots__ = ("key", "priority", "seq", "tokens", "granted", "position", "enqueued")
+
+    def __init__(self, key: str, priority: int, seq: int, tokens: int):
+        self.key = key
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.granted: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.position = 0
+        self.enqueued = time.monotonic()
+
+    def __lt__(self, other: "Ticket") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class LLMScheduler:
+    """Admission control in front of the LLM provider.
+
+    A call is admitted when a global and a per-user concurrency slot are
+    free and both token buckets (requests and tokens per minute) allow it.
+    Waiting calls are ordered by priority then arrival; a call whose user
+    is already at its cap is skipped so one client cannot hold the queue.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        per_user: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_queue: Optional[int] = None,
+        queue_timeout: Optional[float] = None
+    ):
+        self.max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        self.per_user = per_user or settings.LLM_MAX_CONCURRENCY_PER_USER
+        self.requests = TokenBucket(
+            requests_per_minute if requests_per_minute is not None else settings.LLM_REQUESTS_PER_MINUTE
+        )
+        self.tokens = TokenBucket(
+            tokens_per_minute if tokens_per_minute is not None else settings.LLM_TOKENS_PER_MINUTE
+        )
+        self.max_queue = max_queue or settings.LLM_MAX_QUEUE
+        self.queue_timeout = queue_timeout if queue_timeout is not None else settings.LLM_QUEUE_TIMEOUT
+
+        self._queue: list[Ticket] = []
+        self._running: dict[str, int] = {}
+        self._in_flight = 0
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.waited = 0.0
+
+    def _dispatch(self):
+        """Admit as many queued calls as the limits allow."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        index = 0
+        while index < len(self._queue) and self._in_flight < self.max_concurrency:
+            ticket = self._queue[index]
+            if self._running.get(ticket.key, 0) >= self.per_user:
+                index += 1
+                continue
+            wait = max(self.requests.delay(1), self.tokens.delay(ticket.tokens))
+            if wait > 0:
+                # Rate limited: retry when the buckets have refilled
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                break
+            self._queue.pop(index)
+            self._grant(ticket)
+
+        for position, ticket in enumerate(self._queue, 1):
+            ticket.position = position
+
+    def _grant(self, ticket: Ticket):
+        self.requests.take(1)
+        self.tokens.take(ticket.tokens)
+        self._in_flight += 1
+        self._running[ticket.key] = self._running.get(ticket.key, 0) + 1
+        self.admitted += 1
+        self.waited += time.monotonic() - ticket.enqueued
+        ticket.granted.set_result(None)
+
+    def _release(self, ticket: Ticket):
+        self._in_flight -= 1
+        remaining = self._running[ticket.key] - 1
+        if remaining:
+            self._running[ticket.key] = remaining
+        else:
+            del self._running[ticket.key]
+        self._dispatch()
+
+    def _withdraw(self, ticket: Ticket):
+        index = bisect.bisect_left(self._queue, ticket)
+        if index < len(self._queue) and self._queue[index] is ticket:
+            self._queue.pop(index)
+            self._dispatch()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        key: str,
+        tokens: int = 0,
+        priority: int = PRIORITY_INTERACTIVE,
+        on_position: Optional[PositionCallback] = None
+    ) -> AsyncIterator[Ticket]:
+        """Hold an admission slot for the duration of an LLM call.
+
+        `on_position(n)` is awaited whenever the caller's place in the
+        queue changes. Cancelling the caller (e.g. the client went away)
+        removes it from the queue or frees its slot.
+        """
+        if len(self._queue) >= self.max_queue:
+            self.rejected += 1
+            raise SchedulerBusy("LLM queue full")
+
+        ticket = Ticket(key, priority, next(self._seq), tokens)
+        bisect.insort(self._queue, ticket)
+        self._dispatch()
+
+        try:
+            deadline = ticket.enqueued + self.queue_timeout if self.queue_timeout > 0 else None
+            reported = 0
+            while not ticket.granted.done():
+                if on_position is not None and ticket.position != reported:
+                    reported = ticket.position
+                    await on_position(reported)
+                    continue
+                timeout = 0.5 if on_position is not None else None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise SchedulerBusy("LLM queue timeout")
+                    timeout = min(timeout, remaining) if timeout is not None else remaining
+                await asyncio.wait({ticket.granted}, timeout=timeout)
+        except BaseException:
+            if ticket.granted.done() and not ticket.granted.cancelled():
+                self._release(ticket)
+            else:
+                ticket.granted.cancel()
+                self._withdraw(ticket)
+            raise
+
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    def hedge(self, ticket: Ticket) -> Optional[Callable[[], None]]:
+        """Reserve a duplicate of an admitted call, without queueing.
+
+        Takes a global slot and the ticket's requests and tokens. Returns
+        the callback releasing the slot, or None when nothing is free
+        right now (or calls are waiting): the caller then does not hedge.
+        """
+        if self._queue or self._in_flight >= self.max_concurrency:
+            return None
+        if self.requests.delay(1) or self.tokens.delay(ticket.tokens):
+            return None
+        self.requests.take(1)
+        self.tokens.take(ticket.tokens)
+        self._in_flight += 1
+        self.hedges += 1
+
+        def release():
+            self._in_flight -= 1
+            self._dispatch()
+        return release
+
+    def settle(self, ticket: Ticket, used_tokens: int):
+        """Correct a token reservation with what the call actually used."""
+        self.tokens.give(ticket.tokens - used_tokens)
+        ticket.tokens = used_tokens
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "queued": len(self._queue),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "avg_wait_ms": round(self.waited / self.admitted * 1000, 1) if self.admitted else 0.0
+        }
+
+
+# Singleton instance
+scheduler = LLMScheduler()
+
+metrics.gauge("abel_llm_in_flight", "LLM calls running", lambda: scheduler._in_flight)
+metrics.gauge("abel_llm_queue_depth", "LLM calls waiting for a slot", lambda: len(scheduler._queue))
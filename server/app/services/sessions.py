@@ -0,0 +1,525 @@
+"""
+A.B.E.L Session Store - Bounded conversation history with eviction
+"""
+import asyncio
+import functools
+import logging
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("abel.sessions")
+
+# Compact message representation: (role byte, content)
+ROLE_USER = 0
+ROLE_ASSISTANT = 1
+ROLES = {"user": ROLE_USER, "assistant": ROLE_ASSISTANT}
+
+Turn = tuple[int, str]
+
+
+def turn_size(content: str) -> int:
+    """Bytes a message counts against the session budget."""
+    return len(content.encode("utf-8")) + 1
+
+
+class SessionStore(ABC):
+    """Conversation history per session_id with bounded memory.
+
+    Limits: `max_sessions` (least recently used sessions are evicted),
+    `idle_ttl` seconds without activity, and per-session `max_messages`
+    and `max_bytes` (oldest turns are dropped first).
+    """
+
+    name: str = "base"
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        idle_ttl: Optional[float] = None,
+        max_messages: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        self.max_sessions = max_sessions or settings.SESSION_MAX_SESSIONS
+        self.idle_ttl = idle_ttl if idle_ttl is not None else settings.SESSION_IDLE_TTL
+        self.max_messages = max_messages or settings.SESSION_MAX_MESSAGES
+        self.max_bytes = max_bytes or settings.SESSION_MAX_BYTES
+        self.evicted = 0
+
+    @abstractmethod
+    async def get(self, session_id: str) -> list[Turn]:
+        """Turns of a session, oldest first (empty if unknown)."""
+
+    @abstractmethod
+    async def append(self, session_id: str, role: int, content: str):
+        """Add a turn, enforcing the per-session limits."""
+
+    @abstractmethod
+    async def pop_oldest(self, session_id: str, count: int) -> list[Turn]:
+        """Remove and return up to `count` of the oldest turns."""
+
+    @abstractmethod
+    async def get_summary(self, session_id: str) -> str:
+        """Rolling summary of turns already removed from the session."""
+
+    @abstractmethod
+    async def set_summary(self, session_id: str, summary: str):
+        """Replace the rolling summary."""
+
+    @abstractmethod
+    async def clear(self, session_id: str):
+        """Forget a session."""
+
+    @abstractmethod
+    async def sweep(self) -> int:
+        """Evict idle and excess sessions; returns how many were removed."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of live sessions."""
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "sessions": self.count(), "evicted": self.evicted}
+
+    async def close(self):
+        """Release resources."""
+
+
+class Session:
+    __slots__ = ("turns", "size", "last_access", "summary")
+
+    def __init__(self):
+        self.turns: deque[Turn] = deque()
+        self.size = 0
+        self.last_access = time.monotonic()
+        self.summary = ""
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local store: an LRU-ordered dict of compact sessions."""
+
+    name = "memory"
+
+    def __init__(self, **limits):
+        super().__init__(**limits)
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._ops = 0
+
+    async def get(self, session_id):
+        session = self._sessions.get(session_id)
+        if session is None:
+            return []
+        if self._idle(session, time.monotonic()):
+            del self._sessions[session_id]
+            self.evicted += 1
+            return []
+        session.last_access = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return list(session.turns)
+
+    async def append(self, session_id, role, content):
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = Session()
+        session.turns.append((role, content))
+        session.size += turn_size(content)
+        session.last_access = time.monotonic()
+        self._sessions.move_to_end(session_id)
+
+        while session.turns and (
+            len(session.turns) > self.max_messages or session.size > self.max_bytes
+        ):
+            _, dropped = session.turns.popleft()
+            session.size -= turn_size(dropped)
+
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+        self._ops += 1
+        if self._ops % 256 == 0:
+            await self.sweep()
+
+    async def pop_oldest(self, session_id, count):
+        session = self._sessions.get(session_id)
+        if session is None:
+            return []
+        popped = []
+        while session.turns and len(popped) < count:
+            turn = session.turns.popleft()
+            session.size -= turn_size(turn[1])
+            popped.append(turn)
+        return popped
+
+    async def get_summary(self, session_id):
+        session = self._sessions.get(session_id)
+        return session.summary if session else ""
+
+    async def set_summary(self, session_id, summary):
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.summary = summary
+
+    async def clear(self, session_id):
+        self._sessions.pop(session_id, None)
+
+    def _idle(self, session: Session, now: float) -> bool:
+        return self.idle_ttl > 0 and now - session.last_access > self.idle_ttl
+
+    async def sweep(self):
+        now = time.monotonic()
+        removed = 0
+        # Sessions are in LRU order, so idle ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if not self._idle(session, now):
+                break
+            del self._sessions[session_id]
+            removed += 1
+        self.evicted += removed
+        return removed
+
+    def count(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite-backed store: survives restarts and is shared by workers.
+
+    Uses WAL mode so several uvicorn worker processes on the same host can
+    read and append concurrently. Timestamps are wall-clock seconds.
+    Per-session budgets apply on every append; the session count and idle
+    TTL are enforced by periodic sweeps. Queries run on a dedicated thread
+    so a busy lock (up to the 5 s timeout) never stalls the event loop.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Optional[str] = None, **limits):
+        super().__init__(**limits)
+        self.path = path or settings.SESSION_DB_PATH
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        # One thread owns the connection: statements and transactions never interleave
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="abel-sessions")
+        self._db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                size INTEGER NOT NULL DEFAULT 0,
+                last_access REAL NOT NULL,
+                summary TEXT NOT NULL DEFAULT ''
+            );
+            CREATE INDEX IF NOT EXISTS sessions_access_idx ON sessions(last_access);
+            CREATE TABLE IF NOT EXISTS turns (
+                session_id TEXT NOT NULL,
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                role INTEGER NOT NULL,
+                content TEXT NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS turns_session_idx ON turns(session_id, seq);
+        """)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(sessions)")}
+        if "summary" not in columns:
+            self._db.execute("ALTER TABLE sessions ADD COLUMN summary TEXT NOT NULL DEFAULT ''")
+        self._ops = 0
+
+    async def _run(self, fn, *args):
+        """Run a blocking sqlite3 call on the store's own thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+
+    async def get(self, session_id):
+        turns, expired = await self._run(self._get, session_id)
+        if expired:
+            self.evicted += 1
+        return turns
+
+    def _get(self, session_id: str) -> tuple[list[Turn], bool]:
+        row = self._db.execute(
+            "SELECT last_access FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return [], False
+        now = time.time()
+        if self.idle_ttl > 0 and now - row[0] > self.idle_ttl:
+            self._clear(session_id)
+            return [], True
+
+        self._db.execute("UPDATE sessions SET last_access = ? WHERE id = ?", (now, session_id))
+        rows = self._db.execute(
+            "SELECT role, content FROM turns WHERE session_id = ? ORDER BY seq", (session_id,)
+        ).fetchall()
+        return [(role, content) for role, content in rows], False
+
+    async def append(self, session_id, role, content):
+        await self._run(self._append, session_id, role, content)
+        self._ops += 1
+        if self._ops % 256 == 0:
+            await self.sweep()
+
+    def _append(self, session_id: str, role: int, content: str):
+        size = turn_size(content)
+        now = time.time()
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute(
+                "INSERT INTO turns (session_id, role, content, size) VALUES (?, ?, ?, ?)",
+                (session_id, role, content, size)
+            )
+            db.execute(
+                "INSERT INTO sessions (id, size, last_access) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET size = size + excluded.size, last_access = excluded.last_access",
+                (session_id, size, now)
+            )
+            self._trim(session_id)
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    def _trim(self, session_id: str):
+        """Drop the oldest turns past the message or byte budget."""
+        db = self._db
+        count, total = db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM turns WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if count <= self.max_messages and total <= self.max_bytes:
+            return
+
+        drop = []
+        for seq, size in db.execute(
+            "SELECT seq, size FROM turns WHERE session_id = ? ORDER BY seq", (session_id,)
+        ).fetchall():
+            if count <= self.max_messages and total <= self.max_bytes:
+                break
+            drop.append((seq,))
+            count -= 1
+            total -= size
+        db.executemany("DELETE FROM turns WHERE seq = ?", drop)
+        db.execute("UPDATE sessions SET size = ? WHERE id = ?", (total, session_id))
+
+    async def pop_oldest(self, session_id, count):
+        return await self._run(self._pop_oldest, session_id, count)
+
+    def _pop_oldest(self, session_id: str, count: int) -> list[Turn]:
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = db.execute(
+                "SELECT seq, role, content, size FROM turns WHERE session_id = ? ORDER BY seq LIMIT ?",
+                (session_id, count)
+            ).fetchall()
+            db.executemany("DELETE FROM turns WHERE seq = ?", [(seq,) for seq, _, _, _ in rows])
+            db.execute(
+                "UPDATE sessions SET size = size - ? WHERE id = ?",
+                (sum(size for _, _, _, size in rows), session_id)
+            )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return [(role, content) for _, role, content, _ in rows]
+
+    async def get_summary(self, session_id):
+        return await self._run(self._get_summary, session_id)
+
+    def _get_summary(self, session_id: str) -> str:
+        row = self._db.execute("SELECT summary FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return row[0] if row else ""
+
+    async def set_summary(self, session_id, summary):
+        await self._run(
+            self._db.execute, "UPDATE sessions SET summary = ? WHERE id = ?", (summary, session_id)
+        )
+
+    async def clear(self, session_id):
+        await self._run(self._clear, session_id)
+
+    def _clear(self, session_id: str):
+        self._db.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+        self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    async def sweep(self):
+        removed = await self._run(self._sweep)
+        self.evicted += removed
+        return removed
+
+    def _sweep(self) -> int:
+        db = self._db
+        doomed = []
+        if self.idle_ttl > 0:
+            doomed += db.execute(
+                "SELECT id FROM sessions WHERE last_access < ?", (time.time() - self.idle_ttl,)
+            ).fetchall()
+        excess = self.count() - len(doomed) - self.max_sessions
+        if excess > 0:
+            # Idle sessions are the oldest ones, skip past them
+            doomed += db.execute(
+                "SELECT id FROM sessions ORDER BY last_access LIMIT ? OFFSET ?", (excess, len(doomed))
+            ).fetchall()
+        if not doomed:
+            return 0
+
+        db.execute("BEGIN IMMEDIATE")
+        db.executemany("DELETE FROM turns WHERE session_id = ?", doomed)
+        db.executemany("DELETE FROM sessions WHERE id = ?", doomed)
+        db.execute("COMMIT")
+        return len(doomed)
+
+    def count(self):
+        return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    async def close(self):
+        await self._run(self._db.close)
+        self._executor.shutdown(wait=False)
+
+
+class RedisSessionStore(SessionStore):
+    """Redis-backed store shared by every worker and host.
+
+    A session is a list of turns (role digit + content) and a hash with
+    its byte size and summary; both keys EXPIRE after the idle TTL. A
+    sorted set scored by last access drives LRU eviction and the count.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "abel:session:", **limits):
+        super().__init__(**limits)
+        self.url = url or settings.REDIS_URL
+        self.prefix = prefix
+        self._redis = None
+        self._count = 0
+        self._ops = 0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            try:
+                from redis import asyncio as aioredis
+            except ImportError as e:
+                raise RuntimeError("redis package not installed. Run: pip install redis") from e
+            self._redis = aioredis.from_url(self.url, decode_responses=True)
+        return self._redis
+
+    def _keys(self, session_id: str) -> tuple[str, str]:
+        return f"{self.prefix}{session_id}:turns", f"{self.prefix}{session_id}"
+
+    @property
+    def _index(self) -> str:
+        return f"{self.prefix}index"
+
+    def _touch(self, pipe, session_id: str):
+        turns_key, meta_key = self._keys(session_id)
+        pipe.zadd(self._index, {session_id: time.time()})
+        if self.idle_ttl > 0:
+            ttl = int(self.idle_ttl) or 1
+            pipe.expire(turns_key, ttl)
+            pipe.expire(meta_key, ttl)
+
+    @staticmethod
+    def _decode(raw: str) -> Turn:
+        return int(raw[0]), raw[1:]
+
+    async def get(self, session_id):
+        turns_key, _ = self._keys(session_id)
+        raw = await self.redis.lrange(turns_key, 0, -1)
+        if not raw:
+            return []
+        async with self.redis.pipeline(transaction=False) as pipe:
+            self._touch(pipe, session_id)
+            await pipe.execute()
+        return [self._decode(item) for item in raw]
+
+    async def append(self, session_id, role, content):
+        turns_key, meta_key = self._keys(session_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(turns_key, f"{role}{content}")
+            pipe.hincrby(meta_key, "size", turn_size(content))
+            self._touch(pipe, session_id)
+            length, size = (await pipe.execute())[:2]
+
+        # Drop the oldest turns past the message or byte budget
+        while length > self.max_messages or size > self.max_bytes:
+            dropped = await self.redis.lpop(turns_key)
+            if dropped is None:
+                break
+            length -= 1
+            size = await self.redis.hincrby(meta_key, "size", -turn_size(dropped[1:]))
+
+        self._ops += 1
+        if self._ops % 256 == 0:
+            await self.sweep()
+
+    async def pop_oldest(self, session_id, count):
+        turns_key, meta_key = self._keys(session_id)
+        raw = await self.redis.lpop(turns_key, count) or []
+        if raw:
+            await self.redis.hincrby(meta_key, "size", -sum(turn_size(item[1:]) for item in raw))
+        return [self._decode(item) for item in raw]
+
+    async def get_summary(self, session_id):
+        _, meta_key = self._keys(session_id)
+        return await self.redis.hget(meta_key, "summary") or ""
+
+    async def set_summary(self, session_id, summary):
+        _, meta_key = self._keys(session_id)
+        if await self.redis.exists(meta_key):
+            await self.redis.hset(meta_key, "summary", summary)
+
+    async def clear(self, session_id):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(*self._keys(session_id))
+            pipe.zrem(self._index, session_id)
+            await pipe.execute()
+
+    async def sweep(self):
+        redis = self.redis
+        removed = 0
+        if self.idle_ttl > 0:
+            # Their keys already expired, only the index entries remain
+            removed += await redis.zremrangebyscore(self._index, "-inf", time.time() - self.idle_ttl)
+        excess = await redis.zcard(self._index) - self.max_sessions
+        if excess > 0:
+            doomed = await redis.zrange(self._index, 0, excess - 1)
+            async with redis.pipeline(transaction=False) as pipe:
+                for session_id in doomed:
+                    pipe.delete(*self._keys(session_id))
+                pipe.zrem(self._index, *doomed)
+                await pipe.execute()
+            removed += len(doomed)
+        self._count = await redis.zcard(self._index)
+        self.evicted += removed
+        return removed
+
+    def count(self):
+        # Refreshed by sweeps; exact counts would need a round trip
+        return self._count
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+def create_session_store(backend: Optional[str] = None) -> SessionStore:
+    """Build the session store selected by SESSION_BACKEND."""
+    backend = (backend or settings.SESSION_BACKEND).lower()
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend == "redis":
+        return RedisSessionStore()
+    raise ValueError(f"Unknown session backend: {backend}")
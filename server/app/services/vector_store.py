@@ -0,0 +1,711 @@
+"""
+A.B.E.L Vector Store - Pluggable storage backends for long-term memories
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.database import chunked, run_db
+from .ann_index import IVFIndex, assign_lists, auto_nlist, train_centroids
+
+logger = logging.getLogger("abel.vector_store")
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds from a Postgres timestamptz string."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() if value else None
+
+
+class VectorStore(ABC):
+    """Interface for memory storage with vector similarity search.
+
+    Search results use the same shape as the Supabase `search_memories`
+    RPC: dicts with `id`, `content`, `metadata` and `similarity`.
+    """
+
+    name: str = "base"
+
+    @abstractmethod
+    async def add(
+        self,
+        user_id: Optional[str],
+        content: str,
+        embedding: list[float],
+        metadata: Optional[dict] = None,
+        importance: float = 0.5
+    ) -> Optional[str]:
+        """Store a memory and return its id."""
+
+    async def add_many(self, rows: list[dict]) -> list[Optional[str]]:
+        """Store several memories (dicts of `add` kwargs); ids in order.
+
+        Backends with a bulk insert override this.
+        """
+        return [await self.add(**row) for row in rows]
+
+    @abstractmethod
+    async def search(
+        self,
+        embedding: list[float],
+        user_id: Optional[str] = None,
+        threshold: float = 0.7,
+        limit: int = 5
+    ) -> list[dict]:
+        """Return the most similar memories above threshold."""
+
+    @abstractmethod
+    async def delete(self, memory_id: str, user_id: Optional[str] = None) -> bool:
+        """Delete a memory by id."""
+
+    async def delete_many(self, memory_ids: list[str], user_id: Optional[str] = None) -> int:
+        """Delete several memories; returns how many existed.
+
+        Backends with a bulk delete override this.
+        """
+        return sum([await self.delete(memory_id, user_id) for memory_id in memory_ids])
+
+    async def touch(self, memory_ids: list[str], user_id: Optional[str] = None):
+        """Record that memories were just used (their decay restarts)."""
+
+    async def user_ids(self) -> list[str]:
+        """Users that have memories (for maintenance jobs)."""
+        raise NotImplementedError(f"The {self.name} store cannot list users")
+
+    async def scan(
+        self, user_id: str, offset: int = 0, limit: int = 1000, with_embedding: bool = True
+    ) -> list[dict]:
+        """A page of one user's memories, oldest first.
+
+        Rows carry `id`, `content`, `metadata`, `importance`, `embedding`,
+        `created_at` and `accessed_at` (epoch seconds; None for memories
+        stored before access tracking and never used since). Without
+        `with_embedding`, vectors are neither fetched nor returned.
+        """
+        raise NotImplementedError(f"The {self.name} store cannot scan memories")
+
+    async def close(self):
+        """Release resources / persist state."""
+
+
+class SupabaseVectorStore(VectorStore):
+    """Memories in the Supabase `memories` table, searched via pgvector RPC.
+
+    Queries run in the bounded DB thread pool (`run_db`) so they never
+    block the event loop; multi-row writes are sent in DB_BATCH_SIZE chunks.
+    """
+
+    name = "supabase"
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def supabase(self):
+        """Lazy load Supabase admin client."""
+        if self._client is None:
+            from app.core.database import get_supabase_admin
+            self._client = get_supabase_admin()
+        return self._client
+
+    async def add(self, user_id, content, embedding, metadata=None, importance=0.5):
+        result = await run_db(self.supabase.table("memories").insert({
+            "user_id": user_id,
+            "content": content,
+            "embedding": embedding if embedding else None,
+            "metadata": metadata or {},
+            "importance": importance
+        }).execute)
+        if result.data:
+            return result.data[0]["id"]
+        return None
+
+    async def add_many(self, rows):
+        ids = []
+        for batch in chunked(rows):
+            result = await run_db(self.supabase.table("memories").insert([
+                {
+                    "user_id": row["user_id"],
+                    "content": row["content"],
+                    "embedding": row.get("embedding") or None,
+                    "metadata": row.get("metadata") or {},
+                    "importance": row.get("importance", 0.5)
+                }
+                for row in batch
+            ]).execute)
+            batch_ids = [item["id"] for item in result.data or []]
+            ids += batch_ids + [None] * (len(batch) - len(batch_ids))
+        return ids
+
+    async def search(self, embedding, user_id=None, threshold=0.7, limit=5):
+        result = await run_db(self.supabase.rpc("search_memories", {
+            "query_embedding": embedding,
+            "match_threshold": threshold,
+            "match_count": limit,
+            "p_user_id": user_id
+        }).execute)
+        return result.data if result.data else []
+
+    async def delete(self, memory_id, user_id=None):
+        query = self.supabase.table("memories").delete().eq("id", memory_id)
+        if user_id:
+            query = query.eq("user_id", user_id)
+        result = await run_db(query.execute)
+        return bool(result.data)
+
+    async def delete_many(self, memory_ids, user_id=None):
+        deleted = 0
+        for batch in chunked(memory_ids):
+            query = self.supabase.table("memories").delete().in_("id", batch)
+            if user_id:
+                query = query.eq("user_id", user_id)
+            result = await run_db(query.execute)
+            deleted += len(result.data or [])
+        return deleted
+
+    async def touch(self, memory_ids, user_id=None):
+        now = datetime.now(timezone.utc).isoformat()
+        for batch in chunked(memory_ids):
+            query = self.supabase.table("memories").update({"last_accessed_at": now}).in_("id", batch)
+            if user_id:
+                query = query.eq("user_id", user_id)
+            await run_db(query.execute)
+
+    async def user_ids(self):
+        result = await run_db(self.supabase.rpc("memory_users", {}).execute)
+        return [row["user_id"] for row in result.data or []]
+
+    async def scan(self, user_id, offset=0, limit=1000, with_embedding=True):
+        columns = "id,content,metadata,importance,created_at,last_accessed_at"
+        query = (
+            self.supabase.table("memories")
+            .select(columns + ",embedding" if with_embedding else columns)
+            .eq("user_id", user_id).order("created_at").order("id")
+            .range(offset, offset + limit - 1)
+        )
+        result = await run_db(query.execute)
+        rows = []
+        for row in result.data or []:
+            entry = {
+                "id": row["id"],
+                "content": row["content"],
+                "metadata": row.get("metadata") or {},
+                "importance": row.get("importance") or 0.0,
+                "created_at": _timestamp(row.get("created_at")) or time.time(),
+                "accessed_at": _timestamp(row.get("last_accessed_at"))
+            }
+            if with_embedding:
+                embedding = row.get("embedding")
+                if isinstance(embedding, str):  # pgvector comes back as "[0.1,...]"
+                    embedding = json.loads(embedding)
+                entry["embedding"] = embedding or []
+            rows.append(entry)
+        return rows
+
+
+class UserVectors:
+    """Growable float32 matrix of unit vectors for one user.
+
+    Rows are L2-normalised on insert so cosine similarity is a single
+    matrix-vector product. Capacity doubles on growth; deletes swap the
+    last row into the freed slot. Large matrices get an IVF index so a
+    query only scores the rows of a few inverted lists.
+    """
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.dim = dim
+        self.matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self.size = 0
+        self.ids: list[str] = []
+        self.contents: list[str] = []
+        self.metadata: list[dict] = []
+        self.importance: list[float] = []
+        self.created_at: list[float] = []
+        # None: stored before access tracking and not used since
+        self.accessed_at: list[Optional[float]] = []
+        self.row_of: dict[str, int] = {}
+        self.index: Optional[IVFIndex] = None
+        # Bumped on deletes, which move rows around
+        self.version = 0
+
+    def append(
+        self,
+        memory_id: str,
+        vector: np.ndarray,
+        content: str,
+        metadata: dict,
+        importance: float,
+        created_at: float
+    ):
+        if self.size == self.matrix.shape[0] or not self.matrix.flags.writeable:
+            # Grow (or detach from a read-only snapshot memmap)
+            capacity = max(self.size * 2, 64)
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:self.size] = self.matrix[:self.size]
+            self.matrix = grown
+
+        self.matrix[self.size] = vector
+        self.row_of[memory_id] = self.size
+        self.ids.append(memory_id)
+        self.contents.append(content)
+        self.metadata.append(metadata)
+        self.importance.append(importance)
+        self.created_at.append(created_at)
+        self.accessed_at.append(created_at)
+        if self.index is not None:
+            self.index.add(self.size, vector)
+        self.size += 1
+
+    def remove(self, memory_id: str) -> bool:
+        row = self.row_of.pop(memory_id, None)
+        if row is None:
+            return False
+        if not self.matrix.flags.writeable:
+            self.matrix = np.array(self.matrix)
+
+        last = self.size - 1
+        if row != last:
+            self.matrix[row] = self.matrix[last]
+            for column in self._columns():
+                column[row] = column[last]
+            self.row_of[self.ids[row]] = row
+        for column in self._columns():
+            column.pop()
+        if self.index is not None:
+            self.index.remove(row, last)
+        self.size -= 1
+        self.version += 1
+        return True
+
+    def _columns(self) -> tuple[list, ...]:
+        return (self.ids, self.contents, self.metadata, self.importance, self.created_at, self.accessed_at)
+
+    def touch(self, memory_id: str, now: float):
+        row = self.row_of.get(memory_id)
+        if row is not None:
+            self.accessed_at[row] = now
+
+    def install_index(self, index: IVFIndex, assign: np.ndarray):
+        """Attach a trained index; rows appended since training are added."""
+        index.build(assign)
+        for row in range(assign.shape[0], self.size):
+            index.add(row, self.matrix[row])
+        self.index = index
+
+    def top_k(
+        self,
+        query: np.ndarray,
+        k: int,
+        threshold: float,
+        nprobe: int = 0
+    ) -> list[tuple[int, float]]:
+        """Rows with the k highest cosine scores above threshold.
+
+        Exact unless an IVF index is attached and nprobe > 0.
+        """
+        if self.size == 0:
+            return []
+        if self.index is not None and nprobe > 0:
+            rows = self.index.candidates(query, nprobe)
+            scores = self.matrix[rows] @ query
+        else:
+            rows = None
+            scores = self.matrix[:self.size] @ query
+
+        candidates = np.flatnonzero(scores > threshold)
+        if candidates.size == 0:
+            return []
+        if candidates.size > k:
+            top = np.argpartition(scores[candidates], -k)[-k:]
+            candidates = candidates[top]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        if rows is None:
+            return [(int(i), float(scores[i])) for i in candidates]
+        return [(int(rows[i]), float(scores[i])) for i in candidates]
+
+    def row(self, index: int, similarity: float) -> dict:
+        return {
+            "id": self.ids[index],
+            "content": self.contents[index],
+            "metadata": self.metadata[index],
+            "similarity": similarity
+        }
+
+
+class LocalVectorStore(VectorStore):
+    """In-process vector store: one NumPy float32 matrix per user.
+
+    Needs no network, so it doubles as the offline RAG backend and the
+    test backend. `snapshot` writes each user's matrix as a .npy file
+    which is reopened memory-mapped on startup.
+
+    Once a user holds `ann_min_rows` memories, an IVF index is trained in
+    a worker thread (and retrained each time the set grows 4x); searches
+    then probe `nprobe` lists instead of scanning every row.
+    """
+
+    name = "local"
+    GLOBAL_USER = "_global"
+
+    def __init__(
+        self,
+        snapshot_dir: Optional[str] = None,
+        ann_min_rows: Optional[int] = None,
+        nlist: Optional[int] = None,
+        nprobe: Optional[int] = None
+    ):
+        self.snapshot_dir = snapshot_dir if snapshot_dir is not None else settings.VECTOR_STORE_DIR
+        self.ann_min_rows = ann_min_rows if ann_min_rows is not None else settings.ANN_MIN_ROWS
+        self.nlist = nlist if nlist is not None else settings.ANN_NLIST
+        self.nprobe = nprobe if nprobe is not None else settings.ANN_NPROBE
+        self.users: dict[str, UserVectors] = {}
+        self._training: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+        if self.snapshot_dir:
+            try:
+                self.load()
+            except Exception as e:
+                logger.error(f"Failed to load vector snapshot: {e}")
+
+    @staticmethod
+    def _normalize(embedding: list[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+
+    def _bucket(self, user_id: Optional[str]) -> str:
+        return user_id or self.GLOBAL_USER
+
+    async def add(self, user_id, content, embedding, metadata=None, importance=0.5, memory_id=None):
+        memory_id = memory_id or str(uuid.uuid4())
+        vector = self._normalize(embedding) if embedding else None
+        if vector is None:
+            logger.warning("Local vector store skips memories without embedding")
+            return None
+
+        bucket = self._bucket(user_id)
+        vectors = self.users.get(bucket)
+        if vectors is None:
+            vectors = self.users[bucket] = UserVectors(dim=vector.shape[0])
+        if vector.shape[0] != vectors.dim:
+            logger.warning(f"Embedding dimension {vector.shape[0]} != {vectors.dim}, skipped")
+            return None
+
+        vectors.append(memory_id, vector, content, metadata or {}, importance, time.time())
+        self._maybe_train(bucket, vectors)
+        return memory_id
+
+    async def search(self, embedding, user_id=None, threshold=0.7, limit=5):
+        query = self._normalize(embedding) if embedding else None
+        if query is None:
+            return []
+
+        if user_id is None:
+            buckets = list(self.users.values())
+        else:
+            buckets = [self.users[user_id]] if user_id in self.users else []
+
+        results = []
+        for vectors in buckets:
+            if vectors.dim != query.shape[0]:
+                continue
+            results.extend(
+                vectors.row(row, score)
+                for row, score in vectors.top_k(query, limit, threshold, self.nprobe)
+            )
+        results.sort(key=lambda r: r["similarity"], reverse=True)
+        return results[:limit]
+
+    async def delete(self, memory_id, user_id=None):
+        buckets = [self.users.get(self._bucket(user_id))] if user_id else list(self.users.values())
+        return any(vectors.remove(memory_id) for vectors in buckets if vectors)
+
+    async def touch(self, memory_ids, user_id=None):
+        now = time.time()
+        buckets = [self.users.get(self._bucket(user_id))] if user_id else list(self.users.values())
+        for vectors in buckets:
+            if vectors:
+                for memory_id in memory_ids:
+                    vectors.touch(memory_id, now)
+
+    async def user_ids(self):
+        return [bucket for bucket, vectors in self.users.items() if bucket != self.GLOBAL_USER and vectors.size]
+
+    async def scan(self, user_id, offset=0, limit=1000, with_embedding=True):
+        vectors = self.users.get(user_id)
+        if vectors is None:
+            return []
+        rows = sorted(range(vectors.size), key=lambda row: (vectors.created_at[row], vectors.ids[row]))
+        rows = rows[offset:offset + limit]
+        page = [
+            {
+                "id": vectors.ids[row],
+                "content": vectors.contents[row],
+                "metadata": vectors.metadata[row],
+                "importance": vectors.importance[row],
+                "created_at": vectors.created_at[row],
+                "accessed_at": vectors.accessed_at[row]
+            }
+            for row in rows
+        ]
+        if with_embedding:
+            # Copied: deletes move rows around in the live matrix
+            block = np.array(vectors.matrix[rows])
+            for i, entry in enumerate(page):
+                entry["embedding"] = block[i]
+        return page
+
+    # ---- ANN index -------------------------------------------------------
+
+    def _maybe_train(self, bucket: str, vectors: UserVectors):
+        """Schedule index (re)training when a user's set is large enough."""
+        if self.ann_min_rows <= 0 or bucket in self._training:
+            return
+        if vectors.size < self.ann_min_rows:
+            return
+        if vectors.index is not None and vectors.size < vectors.index.trained_size * 4:
+            return
+
+        self._training.add(bucket)
+        task = asyncio.create_task(self._train(bucket, vectors))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    def _fit(matrix: np.ndarray, size: int, nlist: int) -> tuple[np.ndarray, np.ndarray]:
+        centroids = train_centroids(matrix[:size], nlist)
+        return centroids, assign_lists(matrix[:size], centroids)
+
+    async def _train(self, bucket: str, vectors: UserVectors):
+        """Train off the event loop; appends may continue meanwhile."""
+        try:
+            size, version = vectors.size, vectors.version
+            nlist = self.nlist or auto_nlist(size)
+            started = time.perf_counter()
+            centroids, assign = await asyncio.to_thread(self._fit, vectors.matrix, size, nlist)
+
+            if vectors.version != version or self.users.get(bucket) is not vectors:
+                # Rows moved during training; retried on a later insert
+                return
+            vectors.install_index(IVFIndex(centroids, size), assign)
+            logger.info(
+                f"IVF index built for {size} memories "
+                f"({nlist} lists) in {time.perf_counter() - started:.2f}s"
+            )
+        except Exception as e:
+            logger.error(f"IVF index training failed: {e}")
+        finally:
+            self._training.discard(bucket)
+
+    def count(self, user_id: Optional[str] = None) -> int:
+        """Number of stored memories (for one user or overall)."""
+        if user_id is not None:
+            vectors = self.users.get(user_id)
+            return vectors.size if vectors else 0
+        return sum(vectors.size for vectors in self.users.values())
+
+    # ---- Snapshots -------------------------------------------------------
+
+    def _paths(self, bucket: str) -> tuple[str, str, str]:
+        stem = hashlib.sha1(bucket.encode("utf-8")).hexdigest()[:16]
+        return (
+            os.path.join(self.snapshot_dir, f"{stem}.npy"),
+            os.path.join(self.snapshot_dir, f"{stem}.json"),
+            os.path.join(self.snapshot_dir, f"{stem}.ivf.npz")
+        )
+
+    def snapshot(self):
+        """Persist every user's matrix (.npy), row data (.json) and IVF index."""
+        if not self.snapshot_dir:
+            return
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        for bucket, vectors in self.users.items():
+            matrix_path, rows_path, index_path = self._paths(bucket)
+            # Write to temp files first: the current matrix may be a memmap of matrix_path
+            np.save(matrix_path + ".tmp.npy", np.ascontiguousarray(vectors.matrix[:vectors.size]))
+            with open(rows_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({
+                    "user_id": bucket,
+                    "ids": vectors.ids,
+                    "contents": vectors.contents,
+                    "metadata": vectors.metadata,
+                    "importance": vectors.importance,
+                    "created_at": vectors.created_at,
+                    "accessed_at": vectors.accessed_at
+                }, f, ensure_ascii=False)
+            if not vectors.matrix.flags.writeable:
+                # Detach from the memmap so the file can be replaced
+                vectors.matrix = np.array(vectors.matrix)
+            os.replace(matrix_path + ".tmp.npy", matrix_path)
+            os.replace(rows_path + ".tmp", rows_path)
+
+            if vectors.index is not None:
+                np.savez(index_path, **vectors.index.state(vectors.size))
+            elif os.path.exists(index_path):
+                os.remove(index_path)
+        logger.info(f"Vector snapshot written: {self.count()} memories")
+
+    def load(self):
+        """Reopen snapshots; matrices stay memory-mapped until first write."""
+        if not os.path.isdir(self.snapshot_dir):
+            return
+        for filename in os.listdir(self.snapshot_dir):
+            if not filename.endswith(".json"):
+                continue
+            rows_path = os.path.join(self.snapshot_dir, filename)
+            matrix_path = rows_path[:-len(".json")] + ".npy"
+            if not os.path.exists(matrix_path):
+                continue
+            with open(rows_path, encoding="utf-8") as f:
+                rows = json.load(f)
+            matrix = np.load(matrix_path, mmap_mode="r")
+            if matrix.ndim != 2 or matrix.shape[0] != len(rows["ids"]):
+                continue
+
+            vectors = UserVectors(dim=matrix.shape[1], capacity=0)
+            vectors.matrix = matrix
+            vectors.size = matrix.shape[0]
+            vectors.ids = rows["ids"]
+            vectors.contents = rows["contents"]
+            vectors.metadata = rows["metadata"]
+            vectors.importance = rows["importance"]
+            vectors.created_at = rows["created_at"]
+            vectors.accessed_at = rows.get("accessed_at") or [None] * vectors.size
+            vectors.row_of = {memory_id: i for i, memory_id in enumerate(vectors.ids)}
+
+            index_path = rows_path[:-len(".json")] + ".ivf.npz"
+            if os.path.exists(index_path):
+                with np.load(index_path) as state:
+                    vectors.index = IVFIndex.from_state(state, vectors.size)
+            self.users[rows["user_id"]] = vectors
+        logger.info(f"Vector snapshot loaded: {self.count()} memories")
+
+    async def close(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.snapshot()
+
+
+class MirroredVectorStore(VectorStore):
+    """Primary store with a local mirror used when the primary fails.
+
+    Searches hit the primary and fall back to the local mirror, so RAG
+    keeps working when Supabase is down. Writes are mirrored once the
+    primary has stored them; a failed primary write raises, so the memory
+    writer retries it rather than leaving it in the volatile mirror only.
+
+    The mirror is bounded to the `max_users` most recently active users
+    (0 = unbounded): each worker holds their vectors in RAM, about 6 KB
+    per 1536-d memory.
+    """
+
+    name = "mirrored"
+
+    def __init__(self, primary: VectorStore, fallback: LocalVectorStore, max_users: int = 0):
+        self.primary = primary
+        self.fallback = fallback
+        self.max_users = max_users
+        self._recent: OrderedDict[str, None] = OrderedDict()
+        for bucket in list(fallback.users):
+            self._use(bucket)
+
+    def _use(self, user_id: Optional[str]):
+        """Mark a user active and evict the least recently active ones."""
+        bucket = self.fallback._bucket(user_id)
+        self._recent[bucket] = None
+        self._recent.move_to_end(bucket)
+        while self.max_users > 0 and len(self._recent) > self.max_users:
+            evicted, _ = self._recent.popitem(last=False)
+            self.fallback.users.pop(evicted, None)
+
+    async def add(self, user_id, content, embedding, metadata=None, importance=0.5):
+        memory_id = await self.primary.add(user_id, content, embedding, metadata, importance)
+        if memory_id is not None:
+            self._use(user_id)
+            # Mirrored under the primary id so deletes reach both stores
+            await self.fallback.add(user_id, content, embedding, metadata, importance, memory_id=memory_id)
+        return memory_id
+
+    async def add_many(self, rows):
+        ids = await self.primary.add_many(rows)
+        for row, memory_id in zip(rows, ids):
+            if memory_id is not None:
+                self._use(row["user_id"])
+                await self.fallback.add(**row, memory_id=memory_id)
+        return ids
+
+    async def search(self, embedding, user_id=None, threshold=0.7, limit=5):
+        if self.fallback._bucket(user_id) in self._recent:
+            self._use(user_id)
+        try:
+            return await self.primary.search(embedding, user_id, threshold, limit)
+        except Exception as e:
+            logger.warning(f"Primary vector store search failed, using local: {e}")
+            return await self.fallback.search(embedding, user_id, threshold, limit)
+
+    async def delete(self, memory_id, user_id=None):
+        local = await self.fallback.delete(memory_id, user_id)
+        try:
+            return await self.primary.delete(memory_id, user_id) or local
+        except Exception as e:
+            logger.warning(f"Primary vector store delete failed: {e}")
+            return local
+
+    async def delete_many(self, memory_ids, user_id=None):
+        local = await self.fallback.delete_many(memory_ids, user_id)
+        try:
+            return max(await self.primary.delete_many(memory_ids, user_id), local)
+        except Exception as e:
+            logger.warning(f"Primary vector store batch delete failed: {e}")
+            return local
+
+    async def touch(self, memory_ids, user_id=None):
+        await self.fallback.touch(memory_ids, user_id)
+        try:
+            await self.primary.touch(memory_ids, user_id)
+        except Exception as e:
+            logger.warning(f"Primary vector store touch failed: {e}")
+
+    async def user_ids(self):
+        try:
+            return await self.primary.user_ids()
+        except Exception as e:
+            logger.warning(f"Primary vector store user listing failed, using local: {e}")
+            return await self.fallback.user_ids()
+
+    async def scan(self, user_id, offset=0, limit=1000, with_embedding=True):
+        try:
+            return await self.primary.scan(user_id, offset, limit, with_embedding)
+        except Exception as e:
+            logger.warning(f"Primary vector store scan failed, using local: {e}")
+            return await self.fallback.scan(user_id, offset, limit, with_embedding)
+
+    async def close(self):
+        await self.fallback.close()
+        await self.primary.close()
+
+
+def create_vector_store(backend: Optional[str] = None) -> VectorStore:
+    """Build the vector store selected by VECTOR_STORE_BACKEND."""
+    backend = (backend or settings.VECTOR_STORE_BACKEND).lower()
+    if backend == "local":
+        return LocalVectorStore()
+    if backend == "supabase":
+        return SupabaseVectorStore()
+    if backend == "auto":
+        if settings.VECTOR_STORE_MIRROR_USERS <= 0:
+            return SupabaseVectorStore()
+        return MirroredVectorStore(SupabaseVectorStore(), LocalVectorStore(), settings.VECTOR_STORE_MIRROR_USERS)
+    raise ValueError(f"Unknown vector store backend: {backend}")
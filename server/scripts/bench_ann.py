@@ -0,0 +1,93 @@
+"""
+A.B.E.L - ANN Index Benchmark
+Compares IVF search against exact search on synthetic clustered embeddings:
+latency per query and recall@k for several nprobe values.
+
+Usage (from server/):
+    python scripts/bench_ann.py --sizes 1000,10000,100000 --dim 512
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ann_index import IVFIndex, auto_nlist  # noqa: E402
+from app.services.vector_store import LocalVectorStore, UserVectors  # noqa: E402
+
+
+def make_dataset(size: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Unit vectors drawn around random topic centres (like real embeddings)."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size)
+    data = centres[labels] + 0.6 * rng.normal(size=(size, dim)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data
+
+
+def build(data: np.ndarray) -> tuple[UserVectors, float]:
+    """Load vectors and train the IVF index synchronously."""
+    vectors = UserVectors(dim=data.shape[1], capacity=data.shape[0])
+    for i, vector in enumerate(data):
+        vectors.append(str(i), vector, "", {}, 0.5, 0.0)
+
+    started = time.perf_counter()
+    nlist = auto_nlist(data.shape[0])
+    centroids, assign = LocalVectorStore._fit(vectors.matrix, vectors.size, nlist)
+    vectors.install_index(IVFIndex(centroids, vectors.size), assign)
+    return vectors, time.perf_counter() - started
+
+
+def timed_queries(vectors: UserVectors, queries: np.ndarray, k: int, nprobe: int) -> tuple[list, float]:
+    results = []
+    started = time.perf_counter()
+    for query in queries:
+        results.append([row for row, _ in vectors.top_k(query, k, -1.0, nprobe)])
+    return results, (time.perf_counter() - started) / len(queries) * 1000
+
+
+def run(sizes: list[int], dim: int, k: int, nprobes: list[int], n_queries: int):
+    print(f"dim={dim} k={k} queries={n_queries}")
+    print(f"{'size':>8} {'nlist':>6} {'train s':>8} {'mode':>10} {'ms/query':>9} {'recall':>7}")
+
+    for size in sizes:
+        data = make_dataset(size, dim, clusters=max(8, size // 500))
+        rng = np.random.default_rng(1)
+        queries = data[rng.choice(size, n_queries, replace=False)]
+        queries = queries + 0.05 * rng.normal(size=queries.shape).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        vectors, train_time = build(data)
+        exact, exact_ms = timed_queries(vectors, queries, k, nprobe=0)
+        print(f"{size:>8} {vectors.index.nlist:>6} {train_time:>8.2f} {'exact':>10} {exact_ms:>9.3f} {1.0:>7.3f}")
+
+        for nprobe in nprobes:
+            approx, approx_ms = timed_queries(vectors, queries, k, nprobe)
+            hits = sum(len(set(a) & set(e)) for a, e in zip(approx, exact))
+            recall = hits / sum(len(e) for e in exact)
+            print(f"{'':>8} {'':>6} {'':>8} {f'nprobe={nprobe}':>10} {approx_ms:>9.3f} {recall:>7.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="A.B.E.L ANN index benchmark")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nprobe", default="4,8,16,32")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print("A.B.E.L - ANN Index Benchmark")
+    print("=" * 40)
+    run(
+        sizes=[int(size) for size in args.sizes.split(",")],
+        dim=args.dim,
+        k=args.k,
+        nprobes=[int(nprobe) for nprobe in args.nprobe.split(",")],
+        n_queries=args.queries
+    )
@@ -0,0 +1,289 @@
+"""
+A.B.E.L - Load Benchmark
+Starts the fake OpenAI server (scripts/fake_openai.py) and the API on the
+local vector store, then drives N concurrent WebSocket clients against
+/ws/chat/{client_id}. Reports time-to-first-token, turn latency
+percentiles, frames/sec, server memory growth and the server's own stage
+timings from /metrics. No OpenAI or Supabase account is needed.
+
+Save a run with --save and compare later runs with --baseline to catch
+regressions in BrainService or ConnectionManager (exit code 1 when a
+metric is worse than the baseline by more than --tolerance).
+
+Usage (from server/):
+    python scripts/bench_load.py --clients 50 --turns 5
+    python scripts/bench_load.py --clients 50 --save bench.json
+    python scripts/bench_load.py --clients 50 --baseline bench.json --tolerance 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from typing import Optional
+
+import httpx
+import websockets
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, os.path.join(SERVER_DIR, "scripts"))
+
+from fake_openai import add_arguments  # noqa: E402
+
+# Metric -> True when higher is worse (used by --baseline)
+GATED = {
+    "ttft_p95_ms": True,
+    "turn_p95_ms": True,
+    "frames_per_sec": False,
+    "rss_growth_mb": True
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def start(args: list[str], env: Optional[dict] = None) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *args], cwd=SERVER_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def wait_until_up(url: str, process: Optional[subprocess.Popen], timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"{url} exited with code {process.returncode}")
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} not up after {timeout:.0f}s")
+
+
+async def run_client(url: str, index: int, turns: int, think_ms: float, timeout: float, stats: dict):
+    """One user: connect, then send `turns` messages one after another."""
+    try:
+        async with websockets.connect(f"{url}/ws/chat/bench-{index}", max_size=None) as ws:
+            await asyncio.wait_for(ws.recv(), timeout)  # Welcome frame
+            for turn in range(turns):
+                sent = time.perf_counter()
+                first = None
+                await ws.send(json.dumps({
+                    "type": "message",
+                    "content": f"Question {turn} de l'utilisateur {index} : que me conseilles-tu ?",
+                    "user_id": f"bench-user-{index}"
+                }))
+                while True:
+                    frame = json.loads(await asyncio.wait_for(ws.recv(), timeout))
+                    kind = frame.get("type")
+                    if kind not in ("stream", "assistant"):
+                        continue
+                    stats["frames"] += 1
+                    if first is None and frame.get("content"):
+                        first = time.perf_counter()
+                        stats["ttft"].append((first - sent) * 1000)
+                    if kind == "assistant":
+                        break
+                stats["turns"].append((time.perf_counter() - sent) * 1000)
+                if think_ms:
+                    await asyncio.sleep(think_ms / 1000)
+    except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+        stats["errors"].append(f"client {index}: {type(e).__name__} {e}")
+
+
+def stage_timings(exposition: str) -> dict[str, tuple[float, int]]:
+    """stage -> (total seconds, count) from abel_stage_seconds."""
+    sums, counts = {}, {}
+    for match in re.finditer(r'^abel_stage_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$', exposition, re.M):
+        kind, stage, value = match.groups()
+        (sums if kind == "sum" else counts)[stage] = float(value)
+    return {stage: (sums.get(stage, 0.0), int(count)) for stage, count in counts.items()}
+
+
+async def run(args) -> dict:
+    processes = []
+    server_pid = None
+    url = args.server
+    try:
+        if url is None:
+            provider_port, server_port = free_port(), free_port()
+            processes.append(start([
+                "scripts/fake_openai.py", "--port", str(provider_port),
+                "--ttft-ms", str(args.ttft_ms), "--tokens-per-sec", str(args.tokens_per_sec),
+                "--tokens", str(args.tokens), "--dim", str(args.dim),
+                "--embedding-ms", str(args.embedding_ms)
+            ]))
+            await wait_until_up(f"http://127.0.0.1:{provider_port}/v1/models", processes[-1])
+
+            env = {
+                **os.environ,
+                "OPENAI_API_KEY": "bench",
+                "OPENAI_BASE_URL": f"http://127.0.0.1:{provider_port}/v1",
+                "VECTOR_STORE_BACKEND": "local",
+                "VECTOR_STORE_DIR": "",
+                "SESSION_BACKEND": "memory",
+                "BROKER_BACKEND": "memory",
+                "EMBEDDING_CACHE_DIR": "",
+                "HEALTH_CRITICAL": "",
+                "METRICS_ENABLED": "true"
+            }
+            for pair in args.server_env:
+                key, _, value = pair.partition("=")
+                env[key] = value
+            processes.append(start([
+                "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+                "--port", str(server_port), "--log-level", "warning"
+            ], env))
+            server_pid = processes[-1].pid
+            url = f"http://127.0.0.1:{server_port}"
+            await wait_until_up(f"{url}/health/live", processes[-1])
+
+        ws_url = url.replace("http", "ws", 1)
+        timeout = args.timeout
+
+        # Warm-up: first-use imports and client pools are not part of the run
+        await run_client(ws_url, -1, 1, 0, timeout, {"frames": 0, "ttft": [], "turns": [], "errors": []})
+        rss_before = rss_mb(server_pid) if server_pid else None
+
+        stats = {"frames": 0, "ttft": [], "turns": [], "errors": []}
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            run_client(ws_url, i, args.turns, args.think_ms, timeout, stats)
+            for i in range(args.clients)
+        ))
+        elapsed = time.perf_counter() - started
+        rss_after = rss_mb(server_pid) if server_pid else None
+
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"{url}/metrics")
+            exposition = response.text if response.status_code == 200 else ""
+            stages = stage_timings(exposition)
+            cache_ratio = re.search(r"^abel_llm_prompt_cache_hit_ratio (\S+)$", exposition, re.M)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    return {
+        "clients": args.clients,
+        "turns": len(stats["turns"]),
+        "errors": len(stats["errors"]),
+        "error_samples": stats["errors"][:5],
+        "elapsed_s": round(elapsed, 2),
+        "turns_per_sec": round(len(stats["turns"]) / elapsed, 2),
+        "frames_per_sec": round(stats["frames"] / elapsed, 1),
+        "ttft_p50_ms": round(percentile(stats["ttft"], 0.50), 1),
+        "ttft_p95_ms": round(percentile(stats["ttft"], 0.95), 1),
+        "ttft_p99_ms": round(percentile(stats["ttft"], 0.99), 1),
+        "turn_p50_ms": round(percentile(stats["turns"], 0.50), 1),
+        "turn_p95_ms": round(percentile(stats["turns"], 0.95), 1),
+        "turn_p99_ms": round(percentile(stats["turns"], 0.99), 1),
+        "rss_before_mb": round(rss_before, 1) if rss_before else None,
+        "rss_growth_mb": round(rss_after - rss_before, 1) if rss_before and rss_after else None,
+        "prompt_cache_hit_ratio": round(float(cache_ratio.group(1)), 3) if cache_ratio else None,
+        "stages_ms": {
+            stage: round(total / count * 1000, 2) for stage, (total, count) in stages.items() if count
+        }
+    }
+
+
+def report(result: dict):
+    print(f"{result['clients']} clients, {result['turns']} turns in {result['elapsed_s']}s "
+          f"({result['turns_per_sec']} turns/s), {result['errors']} errors")
+    for sample in result["error_samples"]:
+        print(f"  ! {sample}")
+    print(f"{'':14} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name in ("ttft", "turn"):
+        print(f"{name + ' (ms)':14} " + " ".join(
+            f"{result[f'{name}_{q}_ms']:9.1f}" for q in ("p50", "p95", "p99")
+        ))
+    print(f"frames/sec     {result['frames_per_sec']}")
+    if result["rss_growth_mb"] is not None:
+        print(f"server RSS     {result['rss_before_mb']}MB, +{result['rss_growth_mb']}MB during the run")
+    if result.get("prompt_cache_hit_ratio") is not None:
+        print(f"prompt cache   {result['prompt_cache_hit_ratio']:.1%} of prompt tokens")
+    if result["stages_ms"]:
+        print("\nServer stages (avg ms):")
+        for stage, ms in result["stages_ms"].items():
+            print(f"  {ms:9.2f}  {stage}")
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Metrics worse than the baseline by more than `tolerance`."""
+    regressions = []
+    for metric, higher_is_worse in GATED.items():
+        now, then = result.get(metric), baseline.get(metric)
+        if now is None or not then:
+            continue
+        change = (now - then) / then if higher_is_worse else (then - now) / then
+        if change > tolerance:
+            regressions.append(f"{metric}: {then} -> {now} ({change:.0%} worse)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="A.B.E.L WebSocket load benchmark")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=3, help="Messages per client")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause between a client's turns")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Max wait for one frame")
+    parser.add_argument("--server", help="Benchmark a running server (e.g. http://127.0.0.1:8000)")
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra setting for the launched server (repeatable)")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results saved with --save")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    report(result)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regression against the baseline")
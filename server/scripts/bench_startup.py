@@ -0,0 +1,101 @@
+"""
+A.B.E.L - Startup Benchmark
+Measures the cold start of the server in fresh interpreters: import time
+of `app.main` (with the slowest modules from `python -X importtime`) and
+the lifespan startup, compared against STARTUP_BUDGET_MS.
+
+Usage (from server/):
+    python scripts/bench_startup.py --runs 5 --top 15
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imports app.main, then runs the lifespan startup and prints both timings (ms)
+LIFESPAN_SNIPPET = """
+import asyncio, time
+started = time.perf_counter()
+import app.main as main
+imported = time.perf_counter()
+
+async def boot():
+    async with main.app.router.lifespan_context(main.app):
+        booted = time.perf_counter()
+    return booted
+
+booted = asyncio.run(boot())
+print(f"{(imported - started) * 1000:.1f} {(booted - started) * 1000:.1f}")
+"""
+
+
+def python(args: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=SERVER_DIR, capture_output=True, text=True, check=True
+    )
+
+
+def import_profile() -> dict[str, tuple[int, int]]:
+    """module -> (self us, cumulative us) from one `-X importtime` run."""
+    result = python(["-X", "importtime", "-c", "import app.main"])
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        profile[module.strip()] = (int(self_us), int(cumulative_us))
+    return profile
+
+
+def top_level(profile: dict[str, tuple[int, int]]) -> dict[str, int]:
+    """Self time summed per top-level package (us)."""
+    totals: dict[str, int] = {}
+    for module, (self_us, _) in profile.items():
+        package = module.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return totals
+
+
+def run(runs: int, top: int, lifespan: bool):
+    from app.core.config import settings
+
+    imports = []
+    for _ in range(runs):
+        imports.append(import_profile()["app.main"][1] / 1000)
+    profile = import_profile()
+
+    print(f"import app.main over {runs} runs: median {statistics.median(imports):.0f}ms, "
+          f"min {min(imports):.0f}ms, max {max(imports):.0f}ms")
+
+    print("\nSlowest packages (self time):")
+    for package, us in sorted(top_level(profile).items(), key=lambda item: -item[1])[:top]:
+        print(f"  {us / 1000:8.1f}ms  {package}")
+
+    print("\nSlowest app modules (cumulative):")
+    app_modules = [(m, cum) for m, (_, cum) in profile.items() if m.startswith("app.")]
+    for module, us in sorted(app_modules, key=lambda item: -item[1])[:top]:
+        print(f"  {us / 1000:8.1f}ms  {module}")
+
+    if lifespan:
+        timings = [list(map(float, python(["-c", LIFESPAN_SNIPPET]).stdout.split()[-2:]))
+                   for _ in range(runs)]
+        cold = statistics.median(t[1] for t in timings)
+        print(f"\nCold start (imports + lifespan startup): median {cold:.0f}ms, "
+              f"budget {settings.STARTUP_BUDGET_MS:.0f}ms "
+              f"-> {'OK' if cold <= settings.STARTUP_BUDGET_MS else 'OVER BUDGET'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="A.B.E.L startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--no-lifespan", action="store_true",
+                        help="Only measure imports (the lifespan probes external services)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, SERVER_DIR)
+    run(args.runs, args.top, not args.no_lifespan)
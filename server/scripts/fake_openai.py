@@ -0,0 +1,184 @@
+"""
+A.B.E.L - Fake OpenAI Server
+Deterministic OpenAI-compatible endpoint for benchmarks and offline
+development: streamed and plain chat completions with a configurable
+time-to-first-token and token rate, hash-seeded embeddings and /v1/models.
+The same input always gives the same answer and the same vector. Usage
+reports cached prompt tokens like OpenAI's prefix cache does.
+
+Usage (from server/):
+    python scripts/fake_openai.py --port 8911 --ttft-ms 200 --tokens-per-sec 50
+    OPENAI_BASE_URL=http://127.0.0.1:8911/v1 OPENAI_API_KEY=fake uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+CACHE_BLOCK_CHARS = 512  # 128 tokens at ~4 characters per token
+CACHE_MIN_CHARS = 4096  # Prompts under 1024 tokens are never cached
+CACHE_PREFIXES = 100000
+
+WORDS = (
+    "je", "vous", "propose", "une", "réponse", "claire", "sur", "ce", "sujet", "avec",
+    "quelques", "détails", "utiles", "pour", "la", "suite", "de", "notre", "échange", "aujourd'hui"
+)
+
+
+def _seed(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def answer_tokens(prompt: str, count: int) -> list[str]:
+    """Deterministic answer of `count` tokens for a prompt."""
+    rng = np.random.default_rng(_seed(prompt))
+    picks = rng.integers(0, len(WORDS), count)
+    return [WORDS[i] if n == 0 else " " + WORDS[i] for n, i in enumerate(picks)]
+
+
+def embedding(text: str, dim: int) -> list[float]:
+    """Unit vector seeded by the text (identical texts collide, others don't)."""
+    vector = np.random.default_rng(_seed(text)).normal(size=dim).astype(np.float32)
+    vector /= np.linalg.norm(vector)
+    return vector.tolist()
+
+
+class PrefixCache:
+    """Longest previously seen prompt prefix, in whole blocks."""
+
+    def __init__(self):
+        self.seen: OrderedDict[bytes, None] = OrderedDict()
+
+    def cached_chars(self, prompt: str) -> int:
+        digest = hashlib.blake2b(digest_size=16)
+        cached = 0
+        for end in range(CACHE_BLOCK_CHARS, len(prompt) + 1, CACHE_BLOCK_CHARS):
+            digest.update(prompt[end - CACHE_BLOCK_CHARS:end].encode("utf-8"))
+            key = digest.copy().digest()
+            if cached == end - CACHE_BLOCK_CHARS and key in self.seen:
+                self.seen.move_to_end(key)
+                cached = end
+            else:
+                self.seen[key] = None
+        while len(self.seen) > CACHE_PREFIXES:
+            self.seen.popitem(last=False)
+        return cached if cached >= CACHE_MIN_CHARS else 0
+
+
+def create_app(
+    ttft_ms: float = 200.0,
+    tokens_per_sec: float = 50.0,
+    tokens: int = 60,
+    dim: int = 1536,
+    embedding_ms: float = 20.0
+) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI")
+    calls = {"chat": 0, "embeddings": 0}
+    prefixes = PrefixCache()
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "abel"}]}
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        calls["embeddings"] += 1
+        await asyncio.sleep(embedding_ms / 1000)
+        return {
+            "object": "list",
+            "model": body.get("model", "fake"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": embedding(text, dim)}
+                for i, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)}
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat(request: Request):
+        body = await request.json()
+        calls["chat"] += 1
+        model = body.get("model", "fake")
+        prompt = json.dumps(body["messages"][-1:], ensure_ascii=False)
+        count = min(body.get("max_tokens") or tokens, tokens)
+        parts = answer_tokens(prompt, count)
+        serialized = json.dumps(body["messages"], ensure_ascii=False)
+        usage = {
+            "prompt_tokens": len(serialized) // 4,
+            "completion_tokens": count,
+            "total_tokens": len(serialized) // 4 + count,
+            "prompt_tokens_details": {"cached_tokens": prefixes.cached_chars(serialized) // 4}
+        }
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(ttft_ms / 1000 + count / tokens_per_sec)
+            return {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": created, "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(parts)},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            }
+
+        def chunk(delta: dict, finish: str = None) -> str:
+            return "data: " + json.dumps({
+                "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]
+            }, ensure_ascii=False) + "\n\n"
+
+        async def stream():
+            await asyncio.sleep(ttft_ms / 1000)
+            yield chunk({"role": "assistant", "content": ""})
+            for part in parts:
+                yield chunk({"content": part})
+                await asyncio.sleep(1 / tokens_per_sec)
+            yield chunk({}, "stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield "data: " + json.dumps({
+                    "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created,
+                    "model": model, "choices": [], "usage": usage
+                }) + "\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return calls
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--ttft-ms", type=float, default=200.0, help="Delay before the first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0)
+    parser.add_argument("--tokens", type=int, default=60, help="Tokens per answer")
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding dimension")
+    parser.add_argument("--embedding-ms", type=float, default=20.0, help="Latency of an embeddings call")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Deterministic OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8911)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(args.ttft_ms, args.tokens_per_sec, args.tokens, args.dim, args.embedding_ms),
+        host=args.host, port=args.port, log_level="warning"
+    )
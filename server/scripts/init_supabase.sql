@@ -45,6 +45,12 @@ CREATE INDEX IF NOT EXISTS memories_embedding_idx ON memories
 
 CREATE INDEX IF NOT EXISTS memories_user_idx ON memories(user_id);
 
+-- Dernière utilisation (la décroissance d'importance part de là).
+-- Ajoutée sans valeur par défaut : les souvenirs existants restent NULL,
+-- ce qui les exclut de l'élagage tant qu'ils n'ont pas été réutilisés.
+ALTER TABLE memories ADD COLUMN IF NOT EXISTS last_accessed_at TIMESTAMPTZ;
+ALTER TABLE memories ALTER COLUMN last_accessed_at SET DEFAULT NOW();
+
 -- ================================
 -- Table: api_directory (+1400 APIs)
 -- ================================
@@ -64,8 +70,19 @@ CREATE TABLE IF NOT EXISTS api_directory (
   created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Mise à jour de chaque ligne (trigger plus bas) : le service d'annuaire
+-- compare (nombre de lignes, dernier updated_at) avant de relire la table.
+ALTER TABLE api_directory ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
 CREATE INDEX IF NOT EXISTS api_directory_category_idx ON api_directory(category);
+CREATE INDEX IF NOT EXISTS api_directory_updated_idx ON api_directory(updated_at);
 CREATE INDEX IF NOT EXISTS api_directory_name_idx ON api_directory(name);
+-- Upsert key of seed_apis.py sync. Older seeds inserted duplicates:
+-- keep one row per (name, category) so the index can be created
+DELETE FROM api_directory a
+  USING api_directory b
+  WHERE a.name = b.name AND a.category = b.category AND a.id > b.id;
+CREATE UNIQUE INDEX IF NOT EXISTS api_directory_name_category_key ON api_directory(name, category);
 
 -- ================================
 -- Table: sessions (conversations)
@@ -190,6 +207,14 @@ BEGIN
 END;
 $$;
 
+-- Users owning memories (consolidation job)
+CREATE OR REPLACE FUNCTION memory_users()
+RETURNS TABLE (user_id UUID)
+LANGUAGE sql STABLE
+AS $$
+  SELECT DISTINCT m.user_id FROM memories m WHERE m.user_id IS NOT NULL;
+$$;
+
 -- Function to update timestamps
 CREATE OR REPLACE FUNCTION update_updated_at()
 RETURNS TRIGGER AS $$
@@ -208,7 +233,12 @@ CREATE TRIGGER update_sessions_updated_at
   BEFORE UPDATE ON sessions
   FOR EACH ROW EXECUTE FUNCTION update_updated_at();
 
+DROP TRIGGER IF EXISTS update_api_directory_updated_at ON api_directory;
+CREATE TRIGGER update_api_directory_updated_at
+  BEFORE UPDATE ON api_directory
+  FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
 -- ================================
 -- Initial Data: API Categories
 -- ================================
--- Note: Full seed data will be inserted via seed_apis.py script
+-- Note: Full seed data is loaded with scripts/seed_apis.py (copy or sync)
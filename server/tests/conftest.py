@@ -0,0 +1,96 @@
+"""
+Test setup: offline backends only (no OpenAI, Supabase or Redis needed)
+"""
+import os
+
+os.environ.update(
+    OPENAI_API_KEY="",
+    VECTOR_STORE_BACKEND="local",
+    VECTOR_STORE_DIR="",
+    SESSION_BACKEND="memory",
+    BROKER_BACKEND="memory",
+    METRICS_SPAN_FILE="",
+    EMBEDDING_CACHE_DIR=""
+)
+
+# Settings are read at import time: app modules only after the environment
+import pytest  # noqa: E402
+
+from app.services.embedding_cache import EmbeddingCache  # noqa: E402
+from app.services.memory import MemoryService  # noqa: E402
+from app.services.response_cache import SemanticCache  # noqa: E402
+from app.services.scheduler import LLMScheduler  # noqa: E402
+from app.services.sessions import SQLiteSessionStore  # noqa: E402
+from app.services.vector_store import LocalVectorStore  # noqa: E402
+
+
+@pytest.fixture
+def make_local_store():
+    """In-memory vector store, without snapshots or ANN index by default."""
+    def make(**kwargs) -> LocalVectorStore:
+        options = {"snapshot_dir": "", "ann_min_rows": 0}
+        options.update(kwargs)
+        return LocalVectorStore(**options)
+    return make
+
+
+@pytest.fixture
+def make_memory():
+    """MemoryService with offline embeddings: `embedding` for every text, else [1, len(text)]."""
+    def make(store, embedding=None) -> MemoryService:
+        memory = MemoryService(store)
+
+        def embed(text):
+            return list(embedding) if embedding else [1.0, float(len(text))]
+
+        async def get_embedding(text):
+            return embed(text)
+
+        async def get_embeddings(texts):
+            return [embed(text) for text in texts]
+
+        memory.get_embedding = get_embedding
+        memory.get_embeddings = get_embeddings
+        return memory
+    return make
+
+
+@pytest.fixture
+def make_scheduler():
+    def make(**kwargs) -> LLMScheduler:
+        options = {
+            "max_concurrency": 2, "per_user": 1, "requests_per_minute": 0,
+            "tokens_per_minute": 0, "max_queue": 10, "queue_timeout": 5
+        }
+        options.update(kwargs)
+        return LLMScheduler(**options)
+    return make
+
+
+@pytest.fixture
+def make_semantic_cache():
+    def make(**kwargs) -> SemanticCache:
+        options = {"threshold": 0.9, "ttl": 60, "max_entries": 100, "scope": "user"}
+        options.update(kwargs)
+        return SemanticCache(**options)
+    return make
+
+
+@pytest.fixture
+def make_session_store(tmp_path):
+    """SQLite session store in `tmp_path/sessions.db`."""
+    def make(**limits) -> SQLiteSessionStore:
+        options = {"max_sessions": 10, "idle_ttl": 0, "max_messages": 4, "max_bytes": 10_000}
+        options.update(limits)
+        return SQLiteSessionStore(str(tmp_path / "sessions.db"), **options)
+    return make
+
+
+@pytest.fixture
+def make_embedding_cache(tmp_path):
+    """Embedding cache with its disk tier in `tmp_path`."""
+    def make(**kwargs) -> EmbeddingCache:
+        options = {"max_entries": 100, "ttl_seconds": 3600, "disk_path": str(tmp_path), "model": "test-model"}
+        options.update(kwargs)
+        return EmbeddingCache(**options)
+    return make
@@ -0,0 +1,46 @@
+import asyncio
+
+from app.services.api_directory import ApiDirectory
+from scripts.seed_apis import normalize_record, read_source
+
+
+def test_catalog_shared_with_seed_script():
+    async def main():
+        directory = ApiDirectory(source="catalog", refresh=0, embeddings=False)
+        assert await directory.load()
+        assert not await directory.load()  # Unchanged file is not re-indexed
+
+        seeded = [normalize_record(row) for row in read_source("catalog")]
+        assert all(seeded)
+        assert {(row["name"], row["category"]) for row in seeded} == {
+            (entry.name, entry.category) for entry in directory.index.entries
+        }
+        assert directory.lookup("weather")[0]["category"] == "Weather"
+
+    asyncio.run(main())
+
+
+def test_supabase_reread_only_when_probe_changes():
+    async def main():
+        directory = ApiDirectory(source="supabase", refresh=0, embeddings=False)
+        version = [(1, "2026-01-01T00:00:00+00:00")]
+        reads = []
+
+        async def probe():
+            return version[0]
+
+        async def read():
+            reads.append(1)
+            return [{"id": str(len(reads)), "name": "Open-Meteo", "category": "Weather"}]
+
+        directory._probe_supabase = probe
+        directory._read_supabase = read
+        assert await directory.load()
+        assert not await directory.load()
+        assert len(reads) == 1
+
+        version[0] = (1, "2026-01-02T00:00:00+00:00")
+        assert await directory.load()
+        assert len(reads) == 2
+
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+from app.services import batch
+from app.services.batch import BatchService, JobStore, parse_conversation
+
+
+class FakeBrain:
+    """Answers instantly, or waits for `release` when given one."""
+
+    def __init__(self, release: asyncio.Event = None):
+        self.release = release
+        self.calls = 0
+
+    async def complete(self, message, history, memory, key=None, priority=None):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        return f"réponse: {message}", 10, 5
+
+
+def conversations(count: int) -> list[dict]:
+    return [
+        parse_conversation({"id": f"c{i}", "messages": [{"role": "user", "content": f"question {i}"}]})
+        for i in range(count)
+    ]
+
+
+def write_results(store: JobStore, job_id: str, lines: list[str]):
+    with store.open_results(job_id) as output:
+        for line in lines:
+            output.write(line + "\n")
+
+
+def test_results_replay_latest_wins(tmp_path):
+    store = JobStore(str(tmp_path))
+    job = store.create(conversations(3), use_memory=False)
+    assert store.load(job.id).status == "pending"
+
+    write_results(store, job.id, [
+        json.dumps({"index": 0, "response": "a"}),
+        json.dumps({"index": 1, "error": "timeout"}),
+    ])
+    job = store.load(job.id)
+    assert (job.completed, job.failed, job.status) == (1, 1, "partial")
+
+    # A resumed run appends the retry; a crash can leave a torn last line
+    write_results(store, job.id, [
+        json.dumps({"index": 1, "response": "b"}),
+        json.dumps({"index": 2, "response": "c"}),
+        '{"index": 0, "resp',
+    ])
+    results = store.results(job.id)
+    assert [results[i]["response"] for i in range(3)] == ["a", "b", "c"]
+    job = store.load(job.id)
+    assert (job.completed, job.failed, job.status) == (3, 0, "done")
+
+    assert store.delete(job.id)
+    assert store.load(job.id) is None
+
+
+def test_lock_is_exclusive_across_stores(tmp_path):
+    store, other = JobStore(str(tmp_path)), JobStore(str(tmp_path))
+    job = store.create(conversations(1), use_memory=False)
+    fd = store.lock(job.id)
+    assert fd is not None
+    assert other.lock(job.id) is None
+    assert other.locked(job.id) and other.load(job.id).status == "running"
+
+    store.unlock(fd)
+    assert not other.locked(job.id)
+    other.unlock(other.lock(job.id))
+
+
+def test_second_worker_cannot_start_a_running_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "FOLLOW_INTERVAL", 0.01)
+
+    async def main():
+        release = asyncio.Event()
+        brain = FakeBrain(release)
+        worker = BatchService(brain=brain, memory=object(), store=JobStore(str(tmp_path)))
+        other = BatchService(brain=FakeBrain(), memory=object(), store=JobStore(str(tmp_path)))
+
+        job = await worker.submit([{"messages": [{"role": "user", "content": "bonjour"}]}], use_memory=False)
+        assert job.status == "running"
+        assert not other.resume(job.id)
+        assert (await other.get(job.id)).status == "running"
+
+        async def follow():
+            return [line async for line in other.follow(job.id)]
+
+        follower = asyncio.create_task(follow())
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.wait(set(worker._runners.values()))
+        lines = await follower
+        assert [line["type"] for line in lines] == ["job", "result", "done"]
+        assert lines[-1]["status"] == "done"
+        job = await other.get(job.id)
+        assert (job.status, job.completed) == ("done", 1)
+        assert brain.calls == 1
+        assert other.resume(job.id)  # Nothing left to answer: returns at once
+        await asyncio.wait(set(other._runners.values()))
+
+    asyncio.run(main())
+
+
+def test_delete_unknown_or_malformed_job_is_404(tmp_path, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api import batch as batch_api
+
+    service = BatchService(brain=FakeBrain(), memory=object(), store=JobStore(str(tmp_path)))
+    monkeypatch.setattr(batch_api, "batch_service", service)
+    app = FastAPI()
+    app.include_router(batch_api.router)
+    client = TestClient(app)
+
+    assert not service.store.delete("nothex")
+    assert client.delete("/api/batch/nothex").status_code == 404
+    assert client.delete("/api/batch/" + "0" * 32).status_code == 404
+    assert client.get("/api/batch/nothex").status_code == 404
@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import numpy as np
+
+from app.services.consolidation import plan_consolidation, score_importance
+
+DAY = 86400.0
+NOW = 1_000 * DAY
+
+
+def row(embedding, importance=0.5, age_days=0.0, accessed_days=0.0):
+    return {
+        "embedding": np.asarray(embedding, dtype=np.float32),
+        "importance": importance,
+        "created_at": NOW - age_days * DAY,
+        "accessed_at": None if accessed_days is None else NOW - accessed_days * DAY
+    }
+
+
+def plan(rows, prune_threshold=0.05):
+    return plan_consolidation(
+        rows, NOW, merge_threshold=0.88, duplicate_threshold=0.97,
+        half_life_days=30, prune_threshold=prune_threshold
+    )
+
+
+def test_clusters_led_by_most_important():
+    rows = [
+        row([1, 0, 0], importance=0.3),
+        row([0.99, 0.05, 0], importance=0.8),
+        row([0.9, 0.35, 0], importance=0.5),
+        row([0, 1, 0])
+    ]
+    result = plan(rows)
+    assert result.clusters == [[1, 0, 2]]
+    assert result.duplicates == [False]
+    assert result.prune == []
+
+
+def test_near_identical_cluster_is_duplicate():
+    result = plan([row([1, 0, 0]), row([1, 0.01, 0])])
+    assert result.duplicates == [True]
+
+
+def test_decay_counts_from_last_use():
+    rows = [
+        row([1, 0, 0], importance=0.3, age_days=400, accessed_days=1),
+        row([0, 1, 0], importance=0.3, age_days=400, accessed_days=200),
+    ]
+    assert plan(rows).prune == [1]
+
+
+def test_legacy_rows_and_disabled_pruning_keep_everything():
+    legacy = [row([1, 0, 0], importance=0.3, age_days=400, accessed_days=None)]
+    assert plan(legacy).prune == []
+    stale = [row([1, 0, 0], importance=0.3, age_days=400, accessed_days=400)]
+    assert plan(stale, prune_threshold=0).prune == []
+
+
+def test_score_importance():
+    assert score_importance("Je m'appelle Lina et j'habite à Lyon") > score_importance("Quelle heure est-il ?")
+
+
+def test_local_store_tracks_last_use(make_local_store, tmp_path):
+    async def main():
+        store = make_local_store(snapshot_dir=str(tmp_path))
+        memory_id = await store.add("u1", "souvenir", [1.0, 0.0], importance=0.3)
+        vectors = store.users["u1"]
+        vectors.accessed_at[0] = 0.0
+        await store.touch([memory_id], "u1")
+        assert (await store.scan("u1"))[0]["accessed_at"] > 0.0
+        store.snapshot()
+
+        # Snapshots from before access tracking load as never used
+        rows_file = next(p for p in tmp_path.iterdir() if p.suffix == ".json")
+        rows = json.loads(rows_file.read_text())
+        del rows["accessed_at"]
+        rows_file.write_text(json.dumps(rows))
+        reloaded = make_local_store(snapshot_dir=str(tmp_path))
+        assert (await reloaded.scan("u1"))[0]["accessed_at"] is None
+
+    asyncio.run(main())
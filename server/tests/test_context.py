@@ -0,0 +1,17 @@
+import sys
+
+from app.services.context import TokenCounter
+
+
+def test_warm_loads_once_and_falls_back_without_tiktoken(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tiktoken", None)  # Import fails, as offline without the package
+    counter = TokenCounter(model="gpt-4o-mini")
+    counter.warm()
+    assert counter._loaded and counter._encode is None
+    assert counter.count("12345678") == 2
+
+    loads = []
+    monkeypatch.setattr(counter, "_load", lambda: loads.append(1))
+    counter.warm()
+    counter.count("autre texte")
+    assert loads == []
@@ -0,0 +1,67 @@
+import os
+import time
+
+from app.services.embedding_cache import EmbeddingCache
+
+
+def test_memory_lru_eviction(make_embedding_cache):
+    cache = make_embedding_cache(max_entries=2, disk_path="")
+    cache.put("a", [1.0, 0.0])
+    cache.put("b", [0.0, 1.0])
+    assert cache.get("a") == [1.0, 0.0]
+    cache.put("c", [1.0, 1.0])
+    assert cache.get("b") is None and cache.evictions == 1
+
+
+def test_disk_round_trip(make_embedding_cache):
+    cache = make_embedding_cache()
+    cache.put("bonjour", [0.5, 0.25, 1.0])
+    cache.close()
+
+    reopened = make_embedding_cache()
+    assert reopened.get("bonjour") == [0.5, 0.25, 1.0]
+    assert reopened.disk_hits == 1
+    reopened.close()
+
+    # Another model must not read these vectors
+    other = make_embedding_cache(model="other-model")
+    assert other.get("bonjour") is None
+    other.close()
+
+
+def test_disk_ttl_expiry(make_embedding_cache, tmp_path):
+    cache = make_embedding_cache(ttl_seconds=60)
+    cache.put("vieux", [1.0, 0.0])
+    cache.put("récent", [0.0, 1.0])
+    cache.clear()
+    cache._disk_index[cache.key("vieux")] = (0, time.time() - 3600)
+    assert cache.get("vieux") is None
+    assert cache.get("récent") == [0.0, 1.0]
+    cache.close()
+
+    # Rewrite the index with an expired entry: dropped and compacted on open
+    with open(os.path.join(tmp_path, EmbeddingCache.INDEX_FILE), "w") as f:
+        f.write(f"{cache.key('vieux')} 0 {time.time() - 3600}\n{cache.key('récent')} 1 {time.time()}\n")
+    reopened = make_embedding_cache(ttl_seconds=60)
+    assert reopened.stats()["disk_entries"] == 1 and reopened._disk_rows == 1
+    assert reopened.get("récent") == [0.0, 1.0]
+    reopened.close()
+
+
+def test_disk_compaction_at_runtime(make_embedding_cache, tmp_path):
+    cache = make_embedding_cache(disk_max_entries=5)
+    for i in range(5):
+        cache.put(f"texte {i}", [float(i), 1.0])
+        time.sleep(0.001)  # Distinct creation times
+    # The 5th row reached the cap: the oldest go, down to 3/4 of it
+    assert cache.compactions == 1 and cache.disk_evictions == 2
+    assert cache._disk_rows == 3
+    assert os.path.getsize(os.path.join(tmp_path, EmbeddingCache.VECTORS_FILE)) == 3 * 2 * 4
+
+    cache.put("texte 5", [5.0, 1.0])  # Appends after the compacted rows
+    cache.close()
+
+    reopened = make_embedding_cache(disk_max_entries=5)
+    assert reopened.get("texte 1") is None
+    assert [reopened.get(f"texte {i}") for i in range(2, 6)] == [[float(i), 1.0] for i in range(2, 6)]
+    reopened.close()
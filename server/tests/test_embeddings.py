@@ -0,0 +1,77 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services.embeddings import EmbeddingService
+
+
+class FakeEmbeddings:
+    """Stands in for `client.embeddings`, recording each request's inputs."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.requests: list[list[str]] = []
+
+    async def create(self, model, input):
+        self.requests.append(list(input))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise ConnectionError("embeddings down")
+        return SimpleNamespace(data=[
+            SimpleNamespace(index=i, embedding=[float(len(text)), float(i)])
+            for i, text in enumerate(input)
+        ])
+
+
+class OfflineEmbeddingService(EmbeddingService):
+    """Embedding service answering from a FakeEmbeddings instead of OpenAI."""
+
+    def __init__(self, api: FakeEmbeddings, **kwargs):
+        super().__init__(model="test-model", **kwargs)
+        self.api = api
+
+    @property
+    def client(self):
+        return SimpleNamespace(embeddings=self.api)
+
+
+def test_concurrent_calls_share_one_request():
+    async def main():
+        api = FakeEmbeddings()
+        service = OfflineEmbeddingService(api, max_batch_size=16, batch_window_ms=20)
+        texts = ["bonjour", "météo à Lyon", "bonjour", "rappelle-moi demain"]
+        vectors = await asyncio.gather(*(service.embed(text) for text in texts))
+
+        # One round-trip, each distinct text sent once
+        assert api.requests == [["bonjour", "météo à Lyon", "rappelle-moi demain"]]
+        assert vectors[0] == vectors[2] == [7.0, 0.0]
+        assert vectors[1] == [12.0, 1.0]
+        assert vectors[3] == [19.0, 2.0]
+
+    asyncio.run(main())
+
+
+def test_full_batch_flushes_before_the_window():
+    async def main():
+        api = FakeEmbeddings()
+        service = OfflineEmbeddingService(api, max_batch_size=2, batch_window_ms=10_000)
+        waiters = [asyncio.create_task(service.embed(text)) for text in ("a", "bb", "ccc")]
+        await asyncio.sleep(0.01)
+
+        # The first two filled a batch; the third waits for the window
+        assert api.requests == [["a", "bb"]]
+        assert [waiter.done() for waiter in waiters] == [True, True, False]
+
+        await service.close()
+        assert api.requests[-1] == ["ccc"]
+        assert [await waiter for waiter in waiters] == [[1.0, 0.0], [2.0, 1.0], [3.0, 0.0]]
+
+    asyncio.run(main())
+
+
+def test_failed_request_reaches_every_waiter():
+    async def main():
+        service = OfflineEmbeddingService(FakeEmbeddings(fail=True), batch_window_ms=1)
+        results = await asyncio.gather(service.embed("a"), service.embed("b"), return_exceptions=True)
+        assert all(isinstance(result, ConnectionError) for result in results)
+
+    asyncio.run(main())
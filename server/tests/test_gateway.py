@@ -0,0 +1,154 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.gateway import CircuitBreaker, GatewayUnavailable, ProviderGateway
+
+
+class FakeRunnable:
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+
+    async def ainvoke(self, messages):
+        return await self.behaviour()
+
+
+class Answer:
+    content = "ok"
+    usage_metadata = None
+
+
+def make_gateway(behaviours: dict, threshold: int = 2) -> ProviderGateway:
+    gateway = ProviderGateway(models=list(behaviours), timeout=5, hedge_after_ms=0)
+    for breaker in gateway.breakers.values():
+        breaker.threshold = threshold
+    gateway._runnable = lambda model, bind: FakeRunnable(behaviours[model])
+    return gateway
+
+
+def open_then_half_open(breaker: CircuitBreaker):
+    for _ in range(breaker.threshold):
+        breaker.failure()
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout - 1
+
+
+def test_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(threshold=2, reset_timeout=30)
+    breaker.failure()
+    assert breaker.state == "closed"
+    breaker.failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    breaker.opened_at = time.monotonic() - 31
+    assert breaker.allow()
+    assert not breaker.allow()  # One trial at a time
+    breaker.success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_breaker_release_frees_trial():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=30)
+    open_then_half_open(breaker)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_cancelled_trial_does_not_wedge_breaker():
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(10)
+        return Answer()
+
+    async def fast():
+        return Answer()
+
+    async def main():
+        behaviours = {"m": slow}
+        gateway = make_gateway(behaviours)
+        open_then_half_open(gateway.breakers["m"])
+
+        call = asyncio.create_task(gateway.ainvoke([]))
+        await started.wait()
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+        behaviours["m"] = fast
+        assert (await gateway.ainvoke([])).content == "ok"
+        assert gateway.breakers["m"].state == "closed"
+
+    asyncio.run(main())
+
+
+def test_programming_errors_are_not_provider_failures():
+    async def broken():
+        raise TypeError("bug")
+
+    async def main():
+        gateway = make_gateway({"a": broken, "b": broken})
+        for _ in range(3):
+            with pytest.raises(TypeError):
+                await gateway.ainvoke([])
+        assert gateway.breakers["a"].failures == 0
+        assert gateway.fallbacks == 0
+
+    asyncio.run(main())
+
+
+def test_timeouts_fail_over_and_open_the_circuit():
+    async def timeout():
+        raise asyncio.TimeoutError()
+
+    async def answer():
+        return Answer()
+
+    async def main():
+        gateway = make_gateway({"a": timeout, "b": answer})
+        for _ in range(2):
+            assert (await gateway.ainvoke([])).content == "ok"
+        assert gateway.breakers["a"].state == "open"
+
+        gateway = make_gateway({"a": timeout})
+        with pytest.raises(GatewayUnavailable):
+            await gateway.ainvoke([])
+
+    asyncio.run(main())
+
+
+def test_hedge_only_with_a_scheduler_slot():
+    from app.services.scheduler import LLMScheduler
+
+    async def main():
+        calls = []
+
+        async def slow():
+            calls.append(time.monotonic())
+            await asyncio.sleep(0.2 if len(calls) == 1 else 0.01)
+            return Answer()
+
+        gateway = make_gateway({"m1": slow})
+        gateway.hedge_after = 0.02
+        scheduler = LLMScheduler(max_concurrency=2, per_user=2, requests_per_minute=0, tokens_per_minute=0)
+
+        # No reservation callback: never hedged
+        await gateway.ainvoke([])
+        assert len(calls) == 1 and gateway.hedged == 0
+
+        async with scheduler.slot("u1", tokens=100) as ticket:
+            calls.clear()
+            await gateway.ainvoke([], hedge_slot=lambda: scheduler.hedge(ticket))
+            assert len(calls) == 2 and gateway.hedge_wins == 1
+            assert scheduler.stats()["in_flight"] == 1  # Duplicate's slot released
+
+            async with scheduler.slot("u2"):
+                # Both slots taken: the duplicate is skipped
+                calls.clear()
+                await gateway.ainvoke([], hedge_slot=lambda: scheduler.hedge(ticket))
+                assert len(calls) == 1 and gateway.hedges_skipped == 1
+        assert scheduler.stats()["in_flight"] == 0
+
+    asyncio.run(main())
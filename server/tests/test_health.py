@@ -0,0 +1,57 @@
+import asyncio
+
+from app.core.health import HealthMonitor
+
+
+def check(result):
+    async def probe():
+        if isinstance(result, Exception):
+            raise result
+        if result is None:
+            await asyncio.sleep(1)
+        return result
+    return probe
+
+
+def test_readiness_follows_critical_dependencies():
+    async def main():
+        monitor = HealthMonitor(interval=60, timeout=0.1, critical=["supabase"])
+        assert monitor.status == "unavailable"  # Nothing probed yet
+
+        monitor.register("supabase", check(True))
+        monitor.register("openai", check(None))
+        await monitor.probe_all()
+        # Only a non-critical dependency is down
+        assert monitor.ready and monitor.status == "degraded"
+        assert monitor.is_up("supabase") and not monitor.is_up("openai")
+        assert monitor.snapshot()["dependencies"]["openai"]["error"] == "timeout after 0.1s"
+
+        monitor.register("supabase", check(ConnectionError("refused")))
+        await monitor.probe_all()
+        await monitor.probe_all()
+        supabase = monitor.snapshot()["dependencies"]["supabase"]
+        assert monitor.status == "unavailable"
+        assert (supabase["error"], supabase["consecutive_failures"]) == ("refused", 2)
+        assert supabase["latency"]["count"] == 2
+
+    asyncio.run(main())
+
+
+def test_background_probes_refresh_the_cache():
+    async def main():
+        state = {"up": False}
+
+        async def flaky():
+            return state["up"]
+
+        monitor = HealthMonitor(interval=0.01, timeout=1, critical=["supabase"])
+        monitor.register("supabase", flaky)
+        await monitor.start()
+        assert monitor.status == "unavailable"
+
+        state["up"] = True
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        assert monitor.status == "ready"
+
+    asyncio.run(main())
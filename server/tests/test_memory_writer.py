@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from app.services.memory_writer import MemoryWriter
+from app.services.vector_store import LocalVectorStore, MirroredVectorStore
+
+
+class FlakyStore(LocalVectorStore):
+    """Local store whose first `failures` writes raise, like Supabase during an outage."""
+
+    name = "flaky"
+
+    def __init__(self, failures: int):
+        super().__init__(snapshot_dir="", ann_min_rows=0)
+        self.failures = failures
+
+    async def add_many(self, rows):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("primary down")
+        return await super().add_many(rows)
+
+
+def test_mirrored_write_raises_when_primary_fails(make_local_store):
+    async def main():
+        primary = FlakyStore(failures=1)
+        mirror = make_local_store()
+        store = MirroredVectorStore(primary, mirror)
+        with pytest.raises(ConnectionError):
+            await store.add_many([{"user_id": "u1", "content": "a", "embedding": [1.0, 0.0]}])
+        assert mirror.count() == 0
+
+        ids = await store.add_many([{"user_id": "u1", "content": "a", "embedding": [1.0, 0.0]}])
+        assert primary.count("u1") == mirror.count("u1") == 1
+        assert mirror.users["u1"].ids == ids
+
+    asyncio.run(main())
+
+
+def test_writer_retries_primary_outage(make_local_store, make_memory):
+    async def main():
+        primary = FlakyStore(failures=2)
+        store = MirroredVectorStore(primary, make_local_store())
+        writer = MemoryWriter(make_memory(store), batch_size=10, flush_interval=0.01, max_retries=3)
+        writer.enqueue("u1", "Je m'appelle Lina")
+        writer.enqueue("u1", "J'habite à Lyon")
+        await writer.stop(timeout=10)
+
+        assert writer.retries == 2 and writer.failed == 0
+        assert primary.count("u1") == 2
+
+    asyncio.run(main())
+
+
+def test_mirror_keeps_only_recent_users(make_local_store):
+    async def main():
+        mirror = make_local_store()
+        store = MirroredVectorStore(make_local_store(), mirror, max_users=2)
+        for user_id in ("u1", "u2", "u3"):
+            await store.add(user_id, "souvenir", [1.0, 0.0])
+        assert set(mirror.users) == {"u2", "u3"}
+
+        await store.search([1.0, 0.0], "u2")
+        await store.add("u4", "souvenir", [1.0, 0.0])
+        assert set(mirror.users) == {"u2", "u4"}
+
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.metrics import Metrics
+
+
+def test_counter_and_histogram_render_as_prometheus():
+    registry = Metrics(enabled=True, span_file="")
+    requests = registry.counter("abel_test_requests_total", "Requests", ("route",))
+    latency = registry.histogram("abel_test_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.gauge("abel_test_queue", "Queue depth", lambda: 3)
+    registry.gauge("abel_test_broken", "Unavailable", lambda: 1 / 0)
+
+    requests.inc("chat")
+    requests.inc("chat", amount=2)
+    for seconds in (0.05, 0.5, 5.0):
+        latency.observe(seconds)
+    assert registry.counter("abel_test_requests_total", "Requests") is requests
+
+    lines = registry.render().splitlines()
+    assert "# TYPE abel_test_requests_total counter" in lines
+    assert 'abel_test_requests_total{route="chat"} 3' in lines
+    # Buckets are cumulative, the overflow lands in +Inf only
+    assert [line for line in lines if line.startswith("abel_test_seconds")] == [
+        'abel_test_seconds_bucket{le="0.1"} 1',
+        'abel_test_seconds_bucket{le="1.0"} 2',
+        'abel_test_seconds_bucket{le="+Inf"} 3',
+        "abel_test_seconds_sum 5.55",
+        "abel_test_seconds_count 3"
+    ]
+    assert "abel_test_queue 3.0" in lines
+    assert not any(line.startswith("abel_test_broken ") for line in lines)
+
+
+def test_disabled_registry_records_nothing():
+    registry = Metrics(enabled=False, span_file="")
+    registry.counter("abel_test_total", "Test").inc()
+    with registry.span("embedding"):
+        pass
+    assert registry.stages.values == {}
+    assert "abel_test_total 1" not in registry.render()
+
+
+def test_spans_time_stages_and_export_traces(tmp_path):
+    span_file = tmp_path / "spans.jsonl"
+    registry = Metrics(enabled=True, span_file=str(span_file))
+
+    async def turn():
+        trace = registry.new_trace()
+        with registry.span("retrieval", user="u1"):
+            await asyncio.sleep(0.01)
+        with pytest.raises(ValueError):
+            with registry.span("llm"):
+                raise ValueError("boom")
+        return trace
+
+    first, second = asyncio.run(turn()), asyncio.run(turn())
+    registry.close()
+
+    assert sum(registry.stages.values[("retrieval",)][:-1]) == 2
+    records = [json.loads(line) for line in span_file.read_text().splitlines()]
+    assert [(r["trace"], r["span"]) for r in records] == [
+        (first, "retrieval"), (first, "llm"), (second, "retrieval"), (second, "llm")
+    ]
+    assert first != second
+    assert records[0]["user"] == "u1" and records[0]["ms"] >= 10
+    assert records[1]["error"] == "ValueError"
@@ -0,0 +1,36 @@
+from app.services.prompts import PrefixCacheStats, PromptLayout
+from app.services.sessions import ROLE_ASSISTANT, ROLE_USER
+
+
+def test_stable_parts_come_first():
+    layout = PromptLayout()
+    history = [(ROLE_USER, "Salut"), (ROLE_ASSISTANT, "Bonjour !")]
+    messages = layout.messages("Et demain ?", history, summary="On parle météo", memory="Lina habite à Lyon")
+
+    assert [type(m).__name__ for m in messages] == [
+        "SystemMessage", "SystemMessage", "HumanMessage", "AIMessage", "SystemMessage", "HumanMessage"
+    ]
+    assert messages[1].content.endswith("On parle météo")
+    assert messages[4].content.endswith("Lina habite à Lyon")
+    assert messages[-1].content == "Et demain ?"
+
+    # Same persona object on every turn: the cached prefix stays byte-identical
+    other = layout.messages("Autre question", [])
+    assert other[0] is messages[0]
+    assert other[0].content == layout.system_prompt
+
+
+def test_prefix_cache_stats():
+    stats = PrefixCacheStats()
+    stats.record(None)
+    stats.record({"input_tokens": 1200})
+    stats.record({"input_tokens": 1300, "input_token_details": {"cache_read": 1024}})
+
+    assert stats.stats() == {
+        "calls": 2,
+        "calls_with_hit": 1,
+        "prompt_tokens": 2500,
+        "cached_tokens": 1024,
+        "hit_ratio": round(1024 / 2500, 3)
+    }
+    assert PrefixCacheStats().hit_ratio == 0.0
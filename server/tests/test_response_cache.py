@@ -0,0 +1,67 @@
+import time
+
+
+def test_hit_and_miss(make_semantic_cache):
+    cache = make_semantic_cache()
+    cache.put([1, 0, 0], "A", "u1")
+    assert cache.get([1, 0, 0], "u1") == "A"
+    assert cache.get([0, 1, 0], "u1") is None
+    assert cache.get([1, 0, 0], "u2") is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_expired_entry_skipped_without_stale_rows(make_semantic_cache):
+    # Removing A swap-deletes rows: the ranked rows after it must stay valid
+    cache = make_semantic_cache()
+    cache.put([1, 0, 0], "A", "u1")
+    cache.put([0, 1, 0], "B", "u1")
+    cache.put([0.95, 0.3, 0], "C", "u1")
+    entries = cache._scopes["u1"]
+    entries.created_at[0] = time.time() - 3600
+
+    assert cache.get([1, 0, 0], "u1") == "C"
+    assert cache.stats()["entries"] == 2
+    assert cache.get([0, 1, 0], "u1") == "B"
+
+
+def test_all_expired_is_a_miss(make_semantic_cache):
+    cache = make_semantic_cache(ttl=1)
+    cache.put([1, 0, 0], "A", "u1")
+    cache.put([0.99, 0.1, 0], "B", "u1")
+    cache._scopes["u1"].created_at[:] = [time.time() - 10] * 2
+    assert cache.get([1, 0, 0], "u1") is None
+    assert cache.stats() == {"entries": 0, "hits": 0, "misses": 1, "hit_ratio": 0.0}
+
+
+def test_lru_eviction(make_semantic_cache):
+    cache = make_semantic_cache(max_entries=2)
+    cache.put([1, 0, 0], "A", "u1")
+    cache.put([0, 1, 0], "B", "u1")
+    cache.get([1, 0, 0], "u1")
+    cache.put([0, 0, 1], "C", "u1")
+    assert cache.get([0, 1, 0], "u1") is None
+    assert cache.get([1, 0, 0], "u1") == "A"
+
+
+def test_global_scope_never_shares_personalized_answers(make_semantic_cache):
+    from app.services.prompts import PromptLayout
+
+    layout = PromptLayout()
+    generic = layout.messages("Quelle est la capitale de la France ?", [])
+    with_memory = layout.messages("Où est-ce que j'habite ?", [], memory="Lina habite à Lyon")
+    assert not layout.personalized(generic) and layout.personalized(with_memory)
+
+    cache = make_semantic_cache(scope="global")
+    cache.put([1, 0, 0], "Tu habites à Lyon", "u1", personalized=layout.personalized(with_memory))
+    assert cache.get([1, 0, 0], "u2") is None
+    assert cache.get([1, 0, 0], "u1") is None
+
+    cache.put([0, 1, 0], "Paris", "u1", personalized=layout.personalized(generic))
+    assert cache.get([0, 1, 0], "u2") == "Paris"
+
+    # Per-user scope: a user still gets their own personalized answers back
+    cache = make_semantic_cache(scope="user")
+    cache.put([1, 0, 0], "Tu habites à Lyon", "u1", personalized=True)
+    cache.put([1, 0, 0], "Tu habites à Nantes", "u2", personalized=True)
+    assert cache.get([1, 0, 0], "u1") == "Tu habites à Lyon"
+    assert cache.get([1, 0, 0], "u2") == "Tu habites à Nantes"
@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+from app.core.config import settings
+from app.services.retrieval import Document, Lexicon, tokenize
+from app.services.vector_store import LocalVectorStore
+
+
+class ScanSpy(LocalVectorStore):
+    """Local store recording whether scans asked for embeddings."""
+
+    name = "spy"
+
+    def __init__(self):
+        super().__init__(snapshot_dir="", ann_min_rows=0)
+        self.scans = []
+
+    async def scan(self, user_id, offset=0, limit=1000, with_embedding=True):
+        self.scans.append(with_embedding)
+        return await super().scan(user_id, offset, limit, with_embedding)
+
+
+def make_lexicon(*contents: str) -> Lexicon:
+    lexicon = Lexicon()
+    for i, content in enumerate(contents):
+        lexicon.add(Document(f"m{i}", content, {}, 0.5, time.time()))
+    return lexicon
+
+
+def test_tokenize_folds_accents_and_drops_stopwords():
+    assert tokenize("Le café de Noël à 8 h") == ["cafe", "noel", "8"]
+
+
+def test_bm25_prefers_rare_terms():
+    lexicon = make_lexicon("j'aime le café", "le café du matin", "mon code est 4821")
+    results = lexicon.search(tokenize("café 4821"), limit=10, deadline=time.perf_counter() + 1)
+    assert results[0][0] == "m2"
+    assert {memory_id for memory_id, _ in results} == {"m0", "m1", "m2"}
+
+    lexicon.remove("m2")
+    assert "4821" not in lexicon.postings
+    assert lexicon.search(["4821"], limit=10, deadline=time.perf_counter() + 1) == []
+
+
+def test_fusion_merges_vector_and_lexical_matches(monkeypatch, make_memory):
+    monkeypatch.setattr(settings, "RETRIEVAL_RERANK", False)
+
+    async def main():
+        store = ScanSpy()
+        both = await store.add("u1", "Je bois mon café noir", [1.0, 0.0, 0.0])
+        vector_only = await store.add("u1", "Un expresso serré", [0.9, 0.3, 0.0])
+        lexical_only = await store.add("u1", "Le code du café est 4821", [0.0, 0.0, 1.0])
+        memory = make_memory(store, embedding=[1.0, 0.0, 0.0])
+        retriever = memory.retriever
+
+        # First query runs vector-only and schedules the BM25 index load
+        first = await retriever.retrieve("café 4821", "u1", limit=3)
+        assert {m["id"] for m in first} == {both, vector_only}
+        await asyncio.gather(*retriever._loading.values())
+        assert store.scans == [False]
+
+        results = await retriever.retrieve("café 4821", "u1", limit=3)
+        ids = [m["id"] for m in results]
+        assert ids[0] == both
+        assert set(ids) == {both, vector_only, lexical_only}
+        lexical = next(m for m in results if m["id"] == lexical_only)
+        assert lexical["similarity"] == 0.0
+        assert results[0]["score"] > lexical["score"]
+
+    asyncio.run(main())
+
+
+def test_scan_without_embeddings(make_local_store):
+    async def main():
+        store = make_local_store()
+        await store.add("u1", "souvenir", [1.0, 0.0])
+        assert "embedding" not in (await store.scan("u1", with_embedding=False))[0]
+        assert len((await store.scan("u1"))[0]["embedding"]) == 2
+
+    asyncio.run(main())
+
+
+def test_rerank_decays_importance_from_last_use(make_local_store, make_memory):
+    async def main():
+        store = make_local_store()
+        recalled = await store.add("u1", "Mon chat Tom est noir", [1.0, 0.0, 0.0], importance=1.0)
+        forgotten = await store.add("u1", "Mon chat Tom est roux", [1.0, 0.0, 0.0], importance=1.0)
+        vectors = store.users["u1"]
+        old = time.time() - 120 * 86400
+        vectors.created_at[:] = [old, old]
+        vectors.accessed_at[:] = [time.time(), old]
+
+        memory = make_memory(store, embedding=[1.0, 0.0, 0.0])
+        retriever = memory.retriever
+        retriever._lexicon("u1")
+        await asyncio.gather(*retriever._loading.values())
+
+        results = await retriever.retrieve("chat Tom", "u1", limit=2)
+        assert [m["id"] for m in results] == [recalled, forgotten]
+        assert results[0]["score"] > results[1]["score"]
+
+        # Recalling the other one restarts its decay in the loaded index
+        retriever.touch("u1", [forgotten])
+        assert retriever._lexicons["u1"].docs[forgotten].accessed_at > old
+
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+
+from app.services.scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, LLMScheduler, SchedulerBusy
+
+
+class Calls:
+    """Runs calls through the scheduler, each held until released."""
+
+    def __init__(self, scheduler: LLMScheduler):
+        self.scheduler = scheduler
+        self.order: list[str] = []
+        self.active = 0
+        self.peak = 0
+        self.gates: dict[str, asyncio.Event] = {}
+
+    async def call(self, name: str, key: str, priority: int = PRIORITY_INTERACTIVE):
+        self.gates[name] = asyncio.Event()
+        async with self.scheduler.slot(key, priority=priority):
+            self.order.append(name)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await self.gates[name].wait()
+            self.active -= 1
+
+    def start(self, name: str, key: str, priority: int = PRIORITY_INTERACTIVE) -> asyncio.Task:
+        return asyncio.create_task(self.call(name, key, priority))
+
+    def release(self, name: str):
+        self.gates[name].set()
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_concurrency_and_per_user_caps(make_scheduler):
+    async def main():
+        scheduler = make_scheduler()
+        calls = Calls(scheduler)
+        tasks = [calls.start("a1", "a"), calls.start("a2", "a"), calls.start("b1", "b"), calls.start("c1", "c")]
+        await settle()
+        # a2 waits for a's slot, c1 for a global slot
+        assert calls.order == ["a1", "b1"]
+        assert scheduler.stats()["queued"] == 2
+
+        calls.release("a1")
+        await settle()
+        # a1's slot goes to a2, first in the queue
+        assert calls.order == ["a1", "b1", "a2"]
+        calls.release("b1")
+        await settle()
+        assert calls.order[-1] == "c1"
+
+        for name in ("a2", "c1"):
+            calls.release(name)
+        await asyncio.gather(*tasks)
+        assert calls.peak == 2
+        assert scheduler.stats()["in_flight"] == 0 and scheduler.admitted == 4
+
+    asyncio.run(main())
+
+
+def test_user_at_cap_does_not_hold_the_queue(make_scheduler):
+    async def main():
+        scheduler = make_scheduler(max_concurrency=3)
+        calls = Calls(scheduler)
+        tasks = [calls.start("a1", "a"), calls.start("a2", "a"), calls.start("b1", "b")]
+        await settle()
+        # a2 waits although a global slot is free; b1 behind it still runs
+        assert calls.order == ["a1", "b1"]
+        assert scheduler.stats()["in_flight"] == 2 and scheduler.stats()["queued"] == 1
+
+        for name in ("a1", "b1"):
+            calls.release(name)
+        await settle()
+        calls.release("a2")
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+
+
+def test_interactive_calls_go_before_background(make_scheduler):
+    async def main():
+        scheduler = make_scheduler(max_concurrency=1, per_user=5)
+        calls = Calls(scheduler)
+        tasks = [calls.start("first", "u")]
+        await settle()
+        tasks.append(calls.start("batch", "u", PRIORITY_BACKGROUND))
+        await settle()
+        tasks.append(calls.start("chat", "u", PRIORITY_INTERACTIVE))
+        await settle()
+
+        calls.release("first")
+        await settle()
+        assert calls.order == ["first", "chat"]
+        calls.release("chat")
+        await settle()
+        calls.release("batch")
+        await asyncio.gather(*tasks)
+        assert calls.order == ["first", "chat", "batch"]
+
+    asyncio.run(main())
+
+
+def test_full_queue_and_queue_timeout(make_scheduler):
+    async def main():
+        scheduler = make_scheduler(max_concurrency=1, per_user=5, max_queue=1, queue_timeout=0.05)
+        calls = Calls(scheduler)
+        running = calls.start("running", "u")
+        await settle()
+        waiting = calls.start("waiting", "u")
+        await settle()
+
+        with pytest.raises(SchedulerBusy):
+            await calls.call("rejected", "u")
+        assert scheduler.rejected == 1
+
+        with pytest.raises(SchedulerBusy):
+            await waiting
+        assert scheduler.timeouts == 1 and scheduler.stats()["queued"] == 0
+
+        calls.release("running")
+        await running
+        assert calls.order == ["running"]
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_leaves_the_queue(make_scheduler):
+    async def main():
+        scheduler = make_scheduler(max_concurrency=1, per_user=5)
+        calls = Calls(scheduler)
+        running = calls.start("running", "u")
+        await settle()
+        waiting = calls.start("waiting", "u")
+        await settle()
+        assert scheduler.stats()["queued"] == 1
+
+        waiting.cancel()
+        await settle()
+        assert scheduler.stats()["queued"] == 0
+        calls.release("running")
+        await running
+        assert scheduler.stats()["in_flight"] == 0
+
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+import asyncio
+import sqlite3
+import time
+
+from app.services.sessions import ROLE_ASSISTANT, ROLE_USER
+
+
+def test_sqlite_append_trim_and_summary(make_session_store):
+    async def main():
+        store = make_session_store()
+        for i in range(6):
+            await store.append("s1", ROLE_USER if i % 2 == 0 else ROLE_ASSISTANT, f"message {i}")
+        turns = await store.get("s1")
+        assert [content for _, content in turns] == ["message 2", "message 3", "message 4", "message 5"]
+
+        assert await store.pop_oldest("s1", 2) == [(ROLE_USER, "message 2"), (ROLE_ASSISTANT, "message 3")]
+        await store.set_summary("s1", "résumé")
+        assert await store.get_summary("s1") == "résumé"
+
+        await store.clear("s1")
+        assert await store.get("s1") == []
+        assert store.count() == 0
+        await store.close()
+
+    asyncio.run(main())
+
+
+def test_sqlite_idle_session_expires(make_session_store):
+    async def main():
+        store = make_session_store(idle_ttl=60)
+        await store.append("s1", ROLE_USER, "bonjour")
+        store._db.execute("UPDATE sessions SET last_access = ?", (time.time() - 3600,))
+        assert await store.get("s1") == []
+        assert store.evicted == 1
+        await store.close()
+
+    asyncio.run(main())
+
+
+def test_sqlite_lock_wait_does_not_block_event_loop(make_session_store, tmp_path):
+    async def main():
+        store = make_session_store()
+        await store.append("s1", ROLE_USER, "bonjour")
+
+        # Another worker holds the write lock: the append waits on the busy timeout
+        other = sqlite3.connect(str(tmp_path / "sessions.db"), isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        append = asyncio.create_task(store.append("s1", ROLE_ASSISTANT, "salut"))
+
+        ticks = 0
+        start = time.monotonic()
+        while time.monotonic() - start < 0.3:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert ticks > 10
+        assert not append.done()
+
+        other.execute("COMMIT")
+        other.close()
+        await append
+        assert len(await store.get("s1")) == 2
+        await store.close()
+
+    asyncio.run(main())
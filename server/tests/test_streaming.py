@@ -0,0 +1,89 @@
+import asyncio
+from typing import Optional
+
+import pytest
+
+from app.core.streaming import StreamWriter
+
+
+class FakeWebSocket:
+    """Records sent frames; each send waits for `gate` when one is set."""
+
+    def __init__(self, gate: Optional[asyncio.Event] = None):
+        self.gate = gate
+        self.frames: list[dict] = []
+
+    async def send_json(self, message: dict):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.frames.append(message)
+
+
+def test_chunks_within_the_window_share_a_frame():
+    async def main():
+        websocket = FakeWebSocket()
+        stream = StreamWriter(websocket, window_ms=20, max_bytes=10_000, send_timeout=1)
+        for word in ["Bon", "jour", " à", " toi", " !"]:
+            stream.write(word)
+            stream.write("")
+        await stream.close(full_text=True)
+
+        assert websocket.frames == [
+            {"type": "stream", "content": "Bonjour à toi !"},
+            {"type": "assistant", "complete": True, "content": "Bonjour à toi !"}
+        ]
+        assert (stream.chunks, stream.frames) == (5, 2)
+
+    asyncio.run(main())
+
+
+def test_slow_client_gets_merged_frames():
+    async def main():
+        gate = asyncio.Event()
+        websocket = FakeWebSocket(gate)
+        stream = StreamWriter(websocket, window_ms=1, max_bytes=10_000, send_timeout=1)
+        stream.write("a")
+        await asyncio.sleep(0.02)  # "a" is being sent, the client does not read
+
+        for chunk in "bcdef":
+            stream.write(chunk)
+        await asyncio.sleep(0.02)
+        gate.set()
+        await stream.close(full_text=False)
+
+        # One frame in flight at a time: the backlog went out as one frame
+        assert websocket.frames == [
+            {"type": "stream", "content": "a"},
+            {"type": "stream", "content": "bcdef"},
+            {"type": "assistant", "complete": True}
+        ]
+        assert stream.slow_sends >= 1
+
+    asyncio.run(main())
+
+
+def test_full_buffer_skips_the_window():
+    async def main():
+        websocket = FakeWebSocket()
+        stream = StreamWriter(websocket, window_ms=10_000, max_bytes=4, send_timeout=1)
+        stream.write("abcd")
+        await asyncio.sleep(0.01)
+        assert websocket.frames == [{"type": "stream", "content": "abcd"}]
+        await stream.close(final_frame=False)
+
+    asyncio.run(main())
+
+
+def test_stuck_client_aborts_the_stream():
+    async def main():
+        websocket = FakeWebSocket(asyncio.Event())  # Never released
+        stream = StreamWriter(websocket, window_ms=1, max_bytes=10_000, send_timeout=0.05)
+        stream.write("a")
+        await asyncio.sleep(0.1)
+        with pytest.raises(asyncio.TimeoutError):
+            stream.write("b")
+        with pytest.raises(asyncio.TimeoutError):
+            await stream.close()
+        assert websocket.frames == []
+
+    asyncio.run(main())
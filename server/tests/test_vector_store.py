@@ -0,0 +1,48 @@
+import asyncio
+
+import numpy as np
+
+
+def test_search_is_per_user_and_thresholded(make_local_store):
+    async def main():
+        store = make_local_store()
+        close = await store.add("u1", "café noir", [1.0, 0.1])
+        await store.add("u1", "thé vert", [0.0, 1.0])
+        await store.add("u2", "café au lait", [1.0, 0.0])
+
+        results = await store.search([1.0, 0.0], "u1", threshold=0.7)
+        assert [r["id"] for r in results] == [close]
+        assert await store.search([1.0, 0.0], "u3") == []
+        assert len(await store.search([1.0, 0.0], None, threshold=0.7)) == 2
+
+        assert await store.delete(close, "u1")
+        assert await store.search([1.0, 0.0], "u1", threshold=0.7) == []
+
+    asyncio.run(main())
+
+
+def test_ann_index_matches_exact_search(make_local_store, tmp_path):
+    async def main():
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(200, 8))
+        exact = make_local_store()
+        ann = make_local_store(snapshot_dir=str(tmp_path), ann_min_rows=100, nlist=4, nprobe=4)
+        for i, vector in enumerate(vectors):
+            await exact.add("u1", f"souvenir {i}", vector.tolist(), memory_id=f"m{i}")
+            await ann.add("u1", f"souvenir {i}", vector.tolist(), memory_id=f"m{i}")
+        await asyncio.gather(*ann._tasks)
+        assert ann.users["u1"].index is not None
+
+        # Probing every list must find the same neighbours as a full scan
+        for query in rng.normal(size=(5, 8)):
+            expected = [r["id"] for r in await exact.search(query.tolist(), "u1", threshold=-1, limit=5)]
+            found = [r["id"] for r in await ann.search(query.tolist(), "u1", threshold=-1, limit=5)]
+            assert found == expected
+
+        ann.snapshot()
+        reloaded = make_local_store(snapshot_dir=str(tmp_path))
+        assert reloaded.count("u1") == 200
+        query = vectors[7].tolist()
+        assert (await reloaded.search(query, "u1", limit=1))[0]["id"] == "m7"
+
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core.config import settings
+
+CANCELLED = {"type": "assistant", "complete": True, "cancelled": True}
+
+
+class StuckBrain:
+    """Streams a first chunk, then waits forever like a stalled LLM."""
+
+    def __init__(self):
+        self.started: list[str] = []
+        self.closed: list[str] = []
+
+    async def stream_message(self, message, session_id, user_id=None, on_queued=None):
+        self.started.append(message)
+        try:
+            yield "Bonjour"
+            await asyncio.Event().wait()
+        finally:
+            self.closed.append(message)
+
+    def prefetch_context(self, session_id, text, user_id):
+        pass
+
+    def discard_prefetch(self, session_id):
+        pass
+
+
+def receive_until(websocket, frame_type: str) -> dict:
+    while True:
+        frame = websocket.receive_json()
+        if frame["type"] == frame_type:
+            return frame
+
+
+def test_generation_stops_on_new_message_cancel_and_disconnect(monkeypatch):
+    brain = StuckBrain()
+    monkeypatch.setattr(main, "brain_service", brain)
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    client = TestClient(main.app)
+
+    with client.websocket_connect("/ws/chat/c1") as websocket:
+        receive_until(websocket, "system")
+        websocket.send_json({"type": "message", "content": "premier"})
+        assert receive_until(websocket, "stream")["content"] == "Bonjour"
+
+        # A new message supersedes the stalled answer
+        websocket.send_json({"type": "message", "content": "second"})
+        assert websocket.receive_json() == CANCELLED
+        assert brain.closed == ["premier"]
+        receive_until(websocket, "stream")
+
+        websocket.send_json({"type": "cancel"})
+        assert websocket.receive_json() == CANCELLED
+        assert brain.closed == ["premier", "second"]
+
+        websocket.send_json({"type": "message", "content": "troisième"})
+        receive_until(websocket, "stream")
+
+    # Disconnecting closes the upstream stream too
+    deadline = time.monotonic() + 2
+    while len(brain.closed) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert brain.started == brain.closed == ["premier", "second", "troisième"]